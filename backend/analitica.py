@@ -0,0 +1,317 @@
+"""Instantánea columnar de `gastos` para agregaciones ad hoc (`GET /analytics/aggregate`).
+
+Preguntas como "gasto por medio de pago × banco × mes en cinco años" recorren
+toda la tabla fila por fila. Aquí cada columna se guarda en un archivo binario
+propio y se abre con `numpy.memmap`: filtrar, agrupar y sumar son operaciones
+vectorizadas sobre arreglos que el sistema operativo pagina desde disco.
+
+Columnas (una fila por gasto, en orden de id):
+- `id` (int64), `fecha` (int32, días desde 1970-01-01), `monto` (float64)
+- `categoria_id`, `subcategoria_id`, `medio_pago_id`, `banco_id` (int32, -1 = NULL)
+
+`meta.json` guarda cuántas filas son válidas, el último id leído y la versión
+del dominio `gastos_editados` con la que se construyó.
+
+Antes de cada agregación, una consulta trae esa versión, el id máximo y la
+cantidad de gastos:
+- si nada cambió se usan los arreglos ya abiertos
+- si solo hay gastos nuevos (altas e importaciones) se agregan al final de
+  cada archivo los de id mayor al último leído
+- si se editó o borró un gasto (cambia la versión) o la cantidad no cuadra
+  (ids confirmados fuera de orden, base reemplazada) se reconstruye completa.
+  Borrar una categoría, subcategoría, banco o medio de pago también cambia la
+  versión: sus gastos quedan con esa columna en NULL
+
+El directorio es `ANALITICA_DIR`; por defecto `<base>.analitica/` junto al
+archivo SQLite, o `./analitica/` con otros motores. Los procesos que lo
+comparten se coordinan con un bloqueo de archivo (fcntl, donde exista).
+
+Reconstrucción manual:
+    python -m backend.migrations --reconstruir-analitica
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.cache import DOMINIO_GASTOS_EDITADOS
+from backend.database import SQLALCHEMY_DATABASE_URL
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo el bloqueo entre hilos
+    fcntl = None
+
+FORMATO = 1
+TAMANO_LOTE = 50_000
+
+COLUMNAS = {
+    "id": np.int64,
+    "fecha": np.int32,
+    "monto": np.float64,
+    "categoria_id": np.int32,
+    "subcategoria_id": np.int32,
+    "medio_pago_id": np.int32,
+    "banco_id": np.int32,
+}
+COLUMNAS_ID = ("categoria_id", "subcategoria_id", "medio_pago_id", "banco_id")
+AGRUPACIONES = COLUMNAS_ID + ("anio", "mes")
+MAX_AGRUPACIONES = 4
+NULO = -1
+_EPOCA = date(1970, 1, 1)
+
+
+def directorio_por_defecto() -> Path:
+    if os.getenv("ANALITICA_DIR"):
+        return Path(os.environ["ANALITICA_DIR"])
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return Path(url.database + ".analitica")
+    return Path("analitica")
+
+
+def _consulta_filas(desde_id: int):
+    """Filas con id > `desde_id` en orden de id; los NULL llegan como -1.
+    La fecha llega como texto ISO: numpy la convierte en bloque, sin crear objetos `date`"""
+    g = models.Gasto.__table__.c
+    return select(
+        g.id, cast(g.fecha, String), g.monto, g.categoria_id,
+        func.coalesce(g.subcategoria_id, NULO),
+        func.coalesce(g.medio_pago_id, NULO),
+        func.coalesce(g.banco_id, NULO),
+    ).where(g.id > desde_id).order_by(g.id)
+
+
+def _lote_a_columnas(filas: list) -> dict:
+    ids, fechas, montos, categorias, subcategorias, medios, bancos = zip(*filas)
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "fecha": np.array(fechas, dtype="datetime64[D]").astype(np.int32),
+        "monto": np.array(montos, dtype=np.float64),
+        "categoria_id": np.array(categorias, dtype=np.int32),
+        "subcategoria_id": np.array(subcategorias, dtype=np.int32),
+        "medio_pago_id": np.array(medios, dtype=np.int32),
+        "banco_id": np.array(bancos, dtype=np.int32),
+    }
+
+
+class InstantaneaGastos:
+    """Columnas de `gastos` en archivos mapeados en memoria, al día con la base"""
+
+    def __init__(self, directorio: Optional[Path] = None):
+        self._directorio = directorio
+        self._lock = threading.Lock()
+        self._estado = None    # (version, id máximo, cantidad) de la base al abrir las columnas
+        self._columnas = None
+        self.meta = None
+
+    @property
+    def directorio(self) -> Path:
+        if self._directorio is None:
+            self._directorio = directorio_por_defecto()
+        return self._directorio
+
+    def _archivo(self, columna: str) -> Path:
+        return self.directorio / f"{columna}.bin"
+
+    @contextmanager
+    def _bloqueo(self):
+        """Exclusión entre hilos y, con fcntl, entre procesos que comparten el directorio"""
+        with self._lock:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(self.directorio / ".lock", "w") as archivo:
+                fcntl.flock(archivo, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(archivo, fcntl.LOCK_UN)
+
+    def _leer_meta(self) -> Optional[dict]:
+        try:
+            meta = json.loads((self.directorio / "meta.json").read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("formato") != FORMATO:
+            return None
+        for columna, tipo in COLUMNAS.items():
+            archivo = self._archivo(columna)
+            if not archivo.exists() or archivo.stat().st_size < meta["filas"] * np.dtype(tipo).itemsize:
+                return None
+        return meta
+
+    def _guardar_meta(self, meta: dict):
+        # Reemplazo atómico: un lector ve la meta anterior o la nueva, nunca una a medias
+        temporal = self.directorio / "meta.json.tmp"
+        temporal.write_text(json.dumps(meta))
+        os.replace(temporal, self.directorio / "meta.json")
+
+    def _agregar_filas(self, db: Session, desde_id: int, filas_validas: int, reemplazar: bool) -> tuple:
+        """Escribe al final de cada archivo las filas con id > `desde_id`.
+        Devuelve (filas totales, último id)."""
+        sufijo = ".tmp" if reemplazar else ""
+        archivos = {}
+        for columna in COLUMNAS:
+            ruta = Path(str(self._archivo(columna)) + sufijo)
+            archivo = open(ruta, "wb" if reemplazar else "r+b")
+            if not reemplazar:
+                # Descartar lo que haya quedado de una escritura interrumpida
+                archivo.truncate(filas_validas * np.dtype(COLUMNAS[columna]).itemsize)
+                archivo.seek(0, os.SEEK_END)
+            archivos[columna] = archivo
+
+        filas, ultimo_id = filas_validas, desde_id
+        try:
+            # Por la conexión (Core): el ORM no aporta nada a filas de columnas sueltas
+            resultado = db.connection().execute(
+                _consulta_filas(desde_id).execution_options(yield_per=TAMANO_LOTE)
+            )
+            for lote in resultado.partitions(TAMANO_LOTE):
+                columnas = _lote_a_columnas(lote)
+                for columna, valores in columnas.items():
+                    archivos[columna].write(valores.tobytes())
+                filas += len(lote)
+                ultimo_id = int(columnas["id"][-1])
+        finally:
+            for archivo in archivos.values():
+                archivo.close()
+
+        if reemplazar:
+            for columna in COLUMNAS:
+                os.replace(str(self._archivo(columna)) + sufijo, self._archivo(columna))
+        return filas, ultimo_id
+
+    def _abrir(self, filas: int) -> dict:
+        if filas == 0:
+            return {columna: np.empty(0, dtype=tipo) for columna, tipo in COLUMNAS.items()}
+        return {
+            columna: np.memmap(self._archivo(columna), dtype=tipo, mode="r", shape=(filas,))
+            for columna, tipo in COLUMNAS.items()
+        }
+
+    def actualizar(self, db: Session, forzar: bool = False) -> dict:
+        """Pone la instantánea al día con la base y devuelve sus columnas"""
+        # Subconsultas separadas: juntos, max(id) y count(*) recorren el índice entero;
+        # por separado max(id) es una búsqueda y count(*) usa el índice más chico
+        version = select(models.VersionCache.version).where(
+            models.VersionCache.dominio == DOMINIO_GASTOS_EDITADOS
+        ).scalar_subquery()
+        maximo = select(func.max(models.Gasto.id)).scalar_subquery()
+        cantidad = select(func.count()).select_from(models.Gasto).scalar_subquery()
+        fila = db.execute(select(func.coalesce(version, 0), func.coalesce(maximo, 0), cantidad)).one()
+        estado = tuple(fila)
+        if not forzar and estado == self._estado:
+            return self._columnas
+
+        with self._bloqueo():
+            meta = None if forzar else self._leer_meta()
+            if meta is not None and (meta["version"] != estado[0] or meta["ultimo_id"] > estado[1]):
+                meta = None
+            if meta is None:
+                filas, ultimo_id = self._agregar_filas(db, 0, 0, reemplazar=True)
+            elif meta["ultimo_id"] < estado[1]:
+                filas, ultimo_id = self._agregar_filas(db, meta["ultimo_id"], meta["filas"], reemplazar=False)
+            else:
+                filas, ultimo_id = meta["filas"], meta["ultimo_id"]
+
+            if filas != estado[2]:
+                # Ids confirmados fuera de orden u otra inconsistencia: desde cero
+                filas, ultimo_id = self._agregar_filas(db, 0, 0, reemplazar=True)
+
+            self.meta = {"formato": FORMATO, "version": estado[0], "ultimo_id": ultimo_id, "filas": filas}
+            self._guardar_meta(self.meta)
+            self._columnas = self._abrir(filas)
+            self._estado = estado
+        return self._columnas
+
+
+def dias(fecha: date) -> int:
+    """Fecha -> días desde 1970-01-01, como la columna `fecha`"""
+    return (fecha - _EPOCA).days
+
+
+def _claves(columnas: dict, agrupacion: str) -> np.ndarray:
+    if agrupacion in COLUMNAS_ID:
+        return columnas[agrupacion].astype(np.int64)
+    meses = columnas["fecha"].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if agrupacion == "mes":
+        return meses
+    return meses // 12 + 1970
+
+
+def _formatear(agrupacion: str, valor: int):
+    if agrupacion == "mes":
+        return f"{valor // 12 + 1970:04d}-{valor % 12 + 1:02d}"
+    if agrupacion == "anio":
+        return int(valor)
+    return None if valor == NULO else int(valor)
+
+
+def agregar(
+    columnas: dict,
+    agrupar: list,
+    desde: Optional[int] = None,
+    hasta: Optional[int] = None,
+    filtros: Optional[dict] = None,
+) -> dict:
+    """Suma y cuenta los gastos que pasan los filtros, agrupados por `agrupar`.
+
+    `desde` y `hasta` son días desde 1970-01-01 (inclusive); `filtros` es
+    {columna_id: valor}. Los grupos salen ordenados por sus claves."""
+    mascara = np.ones(len(columnas["id"]), dtype=bool)
+    if desde is not None:
+        mascara &= columnas["fecha"] >= desde
+    if hasta is not None:
+        mascara &= columnas["fecha"] <= hasta
+    for columna, valor in (filtros or {}).items():
+        mascara &= columnas[columna] == valor
+
+    montos = columnas["monto"][mascara]
+    resultado = {"agrupar": agrupar, "cantidad": int(montos.size), "total": round(float(montos.sum()), 2)}
+    if not agrupar:
+        resultado["grupos"] = []
+        return resultado
+
+    # Cada combinación de claves se codifica en un solo entero (base mixta, la
+    # primera clave es la más significativa): así np.unique ordena por claves
+    claves = [_claves(columnas, a)[mascara] for a in agrupar]
+    minimos = [int(c.min()) if c.size else 0 for c in claves]
+    rangos = [int(c.max()) - m + 1 if c.size else 1 for c, m in zip(claves, minimos)]
+    combinada = np.zeros(montos.size, dtype=np.int64)
+    for c, minimo, rango in zip(claves, minimos, rangos):
+        combinada = combinada * rango + (c - minimo)
+
+    unicas, inversa = np.unique(combinada, return_inverse=True)
+    totales = np.round(np.bincount(inversa, weights=montos, minlength=unicas.size), 2)
+    cantidades = np.bincount(inversa, minlength=unicas.size)
+
+    valores = []
+    resto = unicas
+    for minimo, rango in zip(reversed(minimos), reversed(rangos)):
+        valores.append(resto % rango + minimo)
+        resto = resto // rango
+    valores.reverse()
+
+    resultado["grupos"] = [
+        {
+            **{a: _formatear(a, int(v[i])) for a, v in zip(agrupar, valores)},
+            "total": float(totales[i]),
+            "cantidad": int(cantidades[i]),
+        }
+        for i in range(unicas.size)
+    ]
+    return resultado
+
+
+instantanea_gastos = InstantaneaGastos()
@@ -0,0 +1,140 @@
+"""Búsqueda de texto en la descripción de los gastos (`GET /gastos/buscar`).
+
+En SQLite se usa una tabla virtual FTS5 de contenido externo (`gastos_fts`):
+guarda solo el índice invertido y lee el texto de `gastos`. Tres triggers la
+mantienen al día con cada INSERT, UPDATE y DELETE de `gastos`. Las
+importaciones masivas suspenden el de INSERT e indexan todas sus filas con
+una sola sentencia al final (`suspender_indexado` / `indexar_desde`).
+
+- El tokenizador `unicode61 remove_diacritics 2` ignora mayúsculas y tildes,
+  tanto al indexar como al buscar: "cafe" encuentra "Café".
+- Cada palabra buscada es un prefijo ("merc" encuentra "Mercado") y deben
+  aparecer todas. Los índices de prefijos de 2 y 3 letras evitan recorrer el
+  vocabulario en las búsquedas cortas.
+- El orden por relevancia usa la columna `rank` (bm25) de FTS5.
+
+Otros motores no tienen FTS5: se filtra con ILIKE por palabra y los
+resultados siempre se ordenan por fecha.
+
+Si el índice se desincroniza (p. ej. se editó `gastos` sin los triggers):
+    python -m backend.migrations --reconstruir-busqueda
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import Float, Integer, column, func, literal_column, select, table, text, tuple_
+
+from backend import models
+
+TABLA_FTS = "gastos_fts"
+MAX_TERMINOS = 10
+
+_TRIGGER_INSERT = "gastos_fts_insert"
+_DDL_TRIGGER_INSERT = f"""CREATE TRIGGER IF NOT EXISTS {_TRIGGER_INSERT} AFTER INSERT ON gastos BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, descripcion) VALUES (new.id, new.descripcion);
+    END"""
+
+_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        descripcion,
+        content='gastos',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    _DDL_TRIGGER_INSERT,
+    f"""CREATE TRIGGER IF NOT EXISTS gastos_fts_delete AFTER DELETE ON gastos BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, descripcion) VALUES ('delete', old.id, old.descripcion);
+    END""",
+    # Solo cuando cambia la descripción: editar monto o fecha no toca el índice
+    f"""CREATE TRIGGER IF NOT EXISTS gastos_fts_update AFTER UPDATE OF descripcion ON gastos BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, descripcion) VALUES ('delete', old.id, old.descripcion);
+        INSERT INTO {TABLA_FTS}(rowid, descripcion) VALUES (new.id, new.descripcion);
+    END""",
+)
+
+# Objetos que crea `crear_indice` (para saber si el esquema está al día)
+OBJETOS = (TABLA_FTS, _TRIGGER_INSERT, "gastos_fts_delete", "gastos_fts_update")
+
+gastos_fts = table(TABLA_FTS, column("rowid", Integer), column("rank", Float))
+
+_PALABRA = re.compile(r"\w+")
+
+
+def crear_indice(conn) -> bool:
+    """Crea la tabla FTS5 y sus triggers si faltan. Devuelve True si la tabla es nueva
+    (hay que reconstruirla si `gastos` ya tenía filas)."""
+    existia = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nombre"), {"nombre": TABLA_FTS}
+    ).first()
+    for sentencia in _DDL:
+        conn.exec_driver_sql(sentencia)
+    return existia is None
+
+
+def reconstruir_indice(conn):
+    """Vuelve a indexar todas las descripciones de `gastos`"""
+    conn.exec_driver_sql(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+
+
+def suspender_indexado(conn) -> Optional[int]:
+    """Quita el trigger de INSERT para una carga masiva y devuelve el último id de
+    `gastos` (None si no hay índice que mantener). Después de insertar, llamar a
+    `indexar_desde` con ese id en la misma transacción.
+
+    El trigger indexa fila por fila y más que duplica el costo de cada alta.
+    `conn` debe estar dentro de una transacción que ya escribió (con el bloqueo
+    de escritura tomado): ninguna otra conexión inserta sin el trigger, y si la
+    transacción se revierte el trigger vuelve con ella."""
+    if conn.dialect.name != "sqlite":
+        return None
+    existe = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :nombre"), {"nombre": _TRIGGER_INSERT}
+    ).first()
+    if existe is None:
+        return None
+    ultimo_id = conn.execute(select(func.max(models.Gasto.id))).scalar() or 0
+    conn.exec_driver_sql(f"DROP TRIGGER {_TRIGGER_INSERT}")
+    return ultimo_id
+
+
+def indexar_desde(conn, ultimo_id: int):
+    """Indexa en una sola sentencia los gastos con id mayor a `ultimo_id` y vuelve
+    a crear el trigger que quitó `suspender_indexado`"""
+    conn.execute(
+        text(f"INSERT INTO {TABLA_FTS}(rowid, descripcion) SELECT id, descripcion FROM gastos WHERE id > :ultimo_id"),
+        {"ultimo_id": ultimo_id}
+    )
+    conn.exec_driver_sql(_DDL_TRIGGER_INSERT)
+
+
+def terminos(q: str) -> list:
+    """Palabras de la búsqueda; la puntuación y los operadores de FTS5 se descartan"""
+    return _PALABRA.findall(q)[:MAX_TERMINOS]
+
+
+def expresion_fts(palabras: list) -> str:
+    # Entre comillas cada palabra es un literal (AND, OR, NEAR no actúan como operadores);
+    # el * la vuelve prefijo
+    return " ".join(f'"{p}"*' for p in palabras)
+
+
+def filtrar_fts(query, palabras: list, por_relevancia: bool, cursor_relevancia=None):
+    """Une la consulta de gastos con el índice FTS5 y, si se pide, ordena por relevancia.
+    `cursor_relevancia` es (rango, id) de la última fila entregada."""
+    query = query.join(gastos_fts, gastos_fts.c.rowid == models.Gasto.id).where(
+        literal_column(TABLA_FTS).op("MATCH")(expresion_fts(palabras))
+    )
+    if por_relevancia:
+        query = query.add_columns(gastos_fts.c.rank)
+        if cursor_relevancia:
+            query = query.where(tuple_(gastos_fts.c.rank, models.Gasto.id) > tuple_(*cursor_relevancia))
+        query = query.order_by(gastos_fts.c.rank, models.Gasto.id)
+    return query
+
+
+def filtrar_like(query, palabras: list):
+    """Alternativa sin FTS5: cada palabra debe aparecer en la descripción"""
+    for palabra in palabras:
+        query = query.where(models.Gasto.descripcion.icontains(palabra, autoescape=True))
+    return query
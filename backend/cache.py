@@ -0,0 +1,128 @@
+"""Caché en proceso de resultados calculados (resúmenes).
+
+Las entradas se indexan por (dominio, parámetros, versión). La versión de
+cada dominio vive en la tabla `versiones_cache`: las funciones CRUD que
+modifican datos la incrementan dentro de su transacción, de modo que todos
+los workers de uvicorn dejan de usar resultados obsoletos sin necesidad de
+comunicarse entre sí. Leer la versión cuesta una consulta por clave primaria.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import insert_dialecto
+
+# Dominios de invalidación
+DOMINIO_GASTOS = "gastos"    # /resumen: gastos y categorías
+DOMINIO_CUENTAS = "cuentas"  # /cuentas-bancarias/resumen: cuentas, ingresos, transferencias
+# Instantánea de analítica: ediciones y bajas de gastos, y bajas de categorías,
+# subcategorías, bancos y medios de pago que los modifican (las altas se agregan al final)
+DOMINIO_GASTOS_EDITADOS = "gastos_editados"
+# Categorías, subcategorías, bancos y medios de pago (backend.referencias)
+DOMINIO_REFERENCIAS = "referencias"
+
+TAMANO_MAXIMO = 256
+
+
+class CacheResultados:
+    """LRU de resultados con contadores de aciertos y fallos"""
+
+    def __init__(self, tamano_maximo: int = TAMANO_MAXIMO):
+        self.tamano_maximo = tamano_maximo
+        self._entradas: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self._oyentes = {}
+
+    def al_invalidar(self, dominio: str, funcion: Callable[[], None]):
+        """Registra `funcion` para llamarla cuando este proceso invalide `dominio`"""
+        self._oyentes.setdefault(dominio, []).append(funcion)
+
+    @staticmethod
+    def _consulta_version(dominio: str):
+        return select(models.VersionCache.version).where(models.VersionCache.dominio == dominio)
+
+    def _buscar(self, clave):
+        """(True, resultado) si la clave está en caché; cuenta el acierto o fallo"""
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return True, self._entradas[clave]
+            self.fallos += 1
+            return False, None
+
+    def _guardar(self, clave, resultado):
+        with self._lock:
+            self._entradas[clave] = resultado
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamano_maximo:
+                self._entradas.popitem(last=False)
+
+    def obtener(self, db: Session, dominio: str, parametros: Hashable, calcular: Callable[[], Any]):
+        """Devuelve el resultado en caché o lo calcula y lo guarda"""
+        version = db.execute(self._consulta_version(dominio)).scalar() or 0
+        clave = (dominio, parametros, version)
+        encontrado, resultado = self._buscar(clave)
+        if not encontrado:
+            resultado = calcular()
+            self._guardar(clave, resultado)
+        return resultado
+
+    async def obtener_async(
+        self,
+        db: AsyncSession,
+        dominio: str,
+        parametros: Hashable,
+        calcular: Callable[[], Awaitable[Any]]
+    ):
+        """Igual que `obtener`, para sesiones asíncronas"""
+        version = (await db.execute(self._consulta_version(dominio))).scalar() or 0
+        clave = (dominio, parametros, version)
+        encontrado, resultado = self._buscar(clave)
+        if not encontrado:
+            resultado = await calcular()
+            self._guardar(clave, resultado)
+        return resultado
+
+    def invalidar(self, db: Session, *dominios: str):
+        """Incrementa la versión de los dominios en la transacción actual (sin commit)"""
+        tabla = models.VersionCache.__table__
+        sentencia = insert_dialecto(db)(tabla)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=[tabla.c.dominio],
+            set_={"version": tabla.c.version + 1}
+        )
+        db.execute(sentencia, [{"dominio": dominio, "version": 1} for dominio in dominios])
+
+        # Las entradas locales de esos dominios ya no se volverán a pedir
+        with self._lock:
+            for clave in [c for c in self._entradas if c[0] in dominios]:
+                del self._entradas[clave]
+        for dominio in dominios:
+            for funcion in self._oyentes.get(dominio, ()):
+                funcion()
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "entradas": len(self._entradas),
+                "tamano_maximo": self.tamano_maximo,
+            }
+
+
+cache_resultados = CacheResultados()
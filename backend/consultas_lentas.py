@@ -0,0 +1,149 @@
+"""Registro de consultas SQL lentas (`GET /debug/slow-queries`).
+
+Toda sentencia que tarda más de `SLOW_QUERY_MS` se registra con sus
+parámetros, la ruta HTTP que la originó y, en SQLite, la salida de
+`EXPLAIN QUERY PLAN`. El plan se marca con `scan_completo` cuando alguna
+tabla se recorre con SCAN en lugar de SEARCH ... USING INDEX.
+
+Los registros van a un log JSON rotativo (una línea por consulta) y a un
+buffer circular en memoria que expone el endpoint de depuración.
+
+Variables de entorno:
+- SLOW_QUERY_MS: umbral en milisegundos (defecto 200; 0 registra todo)
+- SLOW_QUERY_LOG: archivo del log (defecto slow_queries.log; vacío lo desactiva)
+- SLOW_QUERY_LOG_MB / SLOW_QUERY_LOG_BACKUPS: rotación (defecto 10 MB y 5 archivos)
+- SLOW_QUERY_BUFFER: consultas que guarda el buffer (defecto 200)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.metricas import ruta_actual
+
+UMBRAL_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+ARCHIVO_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")
+MAX_PARAMETROS = 20
+MAX_SQL = 4000
+
+# Sentencias a las que se les puede pedir EXPLAIN QUERY PLAN
+_EXPLICABLES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _parametros(parametros, executemany: bool):
+    """Parámetros serializables y acotados (un executemany puede traer miles de filas)"""
+    if executemany:
+        filas = list(parametros or [])
+        return {"filas": len(filas), "primera": _parametros(filas[0], False) if filas else None}
+    if isinstance(parametros, dict):
+        return {k: v for k, v in list(parametros.items())[:MAX_PARAMETROS]}
+    return list(parametros or [])[:MAX_PARAMETROS]
+
+
+def explicar_sqlite(conexion_dbapi, sentencia: str, parametros) -> list:
+    """Filas de EXPLAIN QUERY PLAN como texto ("SEARCH gastos USING INDEX ...")"""
+    cursor = conexion_dbapi.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + sentencia, parametros)
+        return [fila[-1] for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _tablas_escaneadas(plan: list) -> list:
+    # "SCAN gastos" o "SCAN gastos USING COVERING INDEX ..." recorren toda la tabla o índice;
+    # "SCAN CONSTANT ROW" no lee nada
+    return [paso for paso in plan if paso.startswith("SCAN ") and paso != "SCAN CONSTANT ROW"]
+
+
+class RegistroConsultasLentas:
+    def __init__(self, umbral_ms: float = UMBRAL_MS, capacidad: int = int(os.getenv("SLOW_QUERY_BUFFER", "200"))):
+        self.umbral_ms = umbral_ms
+        self._buffer = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("expense_tracker.consultas_lentas")
+        self._logger.propagate = False
+        self._total = 0
+
+    def configurar_log(self, archivo: str = ARCHIVO_LOG):
+        if not archivo or self._logger.handlers:
+            return
+        manejador = RotatingFileHandler(
+            archivo,
+            maxBytes=int(float(os.getenv("SLOW_QUERY_LOG_MB", "10")) * 1024 * 1024),
+            backupCount=int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5")),
+            encoding="utf-8",
+            delay=True,  # el archivo se crea con la primera consulta lenta
+        )
+        manejador.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(manejador)
+        self._logger.setLevel(logging.WARNING)
+
+    def instrumentar_engine(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self._antes)
+        event.listen(engine, "after_cursor_execute", self._despues)
+
+    @staticmethod
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        # En el contexto de la ejecución, no en la conexión: una sentencia que
+        # falla no llega a after_cursor_execute y su inicio se va con el contexto
+        context._consultas_lentas_inicio = time.perf_counter()
+
+    def _despues(self, conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_consultas_lentas_inicio", None)
+        if inicio is None:
+            return
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if duracion_ms < self.umbral_ms:
+            return
+
+        registro = {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duracion_ms": round(duracion_ms, 3),
+            "ruta": ruta_actual(),
+            "sql": statement[:MAX_SQL],
+            "parametros": _parametros(parameters, executemany),
+        }
+        # El plan se pide por la conexión DBAPI del driver síncrono de SQLite:
+        # no dispara eventos del engine ni cuenta en las métricas
+        if conn.dialect.name == "sqlite" and conn.dialect.driver == "pysqlite" \
+                and statement.lstrip().upper().startswith(_EXPLICABLES):
+            try:
+                plan = explicar_sqlite(
+                    conn.connection.dbapi_connection, statement,
+                    parameters[0] if executemany and parameters else parameters,
+                )
+                escaneos = _tablas_escaneadas(plan)
+                registro.update(plan=plan, scan_completo=bool(escaneos), escaneos=escaneos)
+            except Exception as e:
+                registro["plan_error"] = str(e)
+
+        with self._lock:
+            self._buffer.append(registro)
+            self._total += 1
+        if self._logger.handlers:
+            self._logger.warning(json.dumps(registro, ensure_ascii=False, default=str))
+
+    def recientes(self, limit: int = None) -> list:
+        """Consultas del buffer, de la más reciente a la más antigua"""
+        with self._lock:
+            consultas = list(reversed(self._buffer))
+        return consultas[:limit] if limit else consultas
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"umbral_ms": self.umbral_ms, "total": self._total, "en_buffer": len(self._buffer)}
+
+    def limpiar(self):
+        with self._lock:
+            self._buffer.clear()
+
+
+consultas_lentas = RegistroConsultasLentas()
@@ -1,26 +1,57 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import extract, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import case, delete, extract, func, insert, select, tuple_, update, Integer
 from typing import Optional
-from datetime import date
-from backend import models, schemas
+from datetime import date, datetime
+from backend import busqueda, eventos, models, schemas, sincronizacion, tendencias
+from backend.cache import cache_resultados, DOMINIO_GASTOS, DOMINIO_GASTOS_EDITADOS, DOMINIO_REFERENCIAS
+from backend.database import insert_dialecto
+from backend.paginacion import (
+    aplicar_cursor, codificar_cursor_relevancia, decodificar_cursor_relevancia, siguiente_cursor
+)
+
+
+def rango_mes(mes: Optional[int], anio: int):
+    """Devuelve el rango semiabierto [inicio, fin) de un mes, o del año completo
+    si no se indica mes. Comparar `fecha` contra un rango permite usar los
+    índices de `gastos` en lugar de evaluar extract() fila por fila."""
+    if mes:
+        inicio = date(anio, mes, 1)
+        fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    else:
+        inicio = date(anio, 1, 1)
+        fin = date(anio + 1, 1, 1)
+    return inicio, fin
 
 
 # CRUD para Categorías
 def get_categoria(db: Session, categoria_id: int):
-    return db.query(models.Categoria).filter(models.Categoria.id == categoria_id).first()
+    return db.query(models.Categoria).options(
+        selectinload(models.Categoria.subcategorias)
+    ).filter(models.Categoria.id == categoria_id).first()
 
 
 def get_categoria_by_nombre(db: Session, nombre: str):
     return db.query(models.Categoria).filter(models.Categoria.nombre == nombre).first()
 
 
+def consulta_categorias(skip: int = 0, limit: int = 100):
+    # selectinload: una sola consulta extra para las subcategorías de toda la página
+    return select(models.Categoria).options(
+        selectinload(models.Categoria.subcategorias)
+    ).order_by(models.Categoria.id).offset(skip).limit(limit)
+
+
 def get_categorias(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Categoria).offset(skip).limit(limit).all()
+    return db.execute(consulta_categorias(skip, limit)).scalars().all()
 
 
 def create_categoria(db: Session, categoria: schemas.CategoriaCreate):
     db_categoria = models.Categoria(**categoria.model_dump())
     db.add(db_categoria)
+    db.flush()
+    eventos.publicar(db, "categoria", eventos.CREAR, db_categoria.id,
+                     schemas.Categoria.model_validate(db_categoria).model_dump(mode="json"))
+    cache_resultados.invalidar(db, DOMINIO_GASTOS, DOMINIO_REFERENCIAS)
     db.commit()
     db.refresh(db_categoria)
     return db_categoria
@@ -32,15 +63,51 @@ def update_categoria(db: Session, categoria_id: int, categoria: schemas.Categori
         update_data = categoria.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_categoria, key, value)
+        # Solo los campos que cambiaron: el cliente los combina con lo que tiene
+        eventos.publicar(db, "categoria", eventos.ACTUALIZAR, categoria_id, {"id": categoria_id, **update_data})
+        cache_resultados.invalidar(db, DOMINIO_GASTOS, DOMINIO_REFERENCIAS)
         db.commit()
         db.refresh(db_categoria)
     return db_categoria
 
 
+def get_categorias_faltantes(db: Session, categoria_ids) -> set:
+    """Ids de la lista que no corresponden a ninguna categoría"""
+    ids = set(categoria_ids)
+    existentes = db.query(models.Categoria.id).filter(models.Categoria.id.in_(ids)).all()
+    return ids - {id for (id,) in existentes}
+
+
+def update_presupuestos(db: Session, presupuestos: dict[int, float]):
+    """Actualiza el presupuesto mensual de varias categorías con un solo UPDATE"""
+    if presupuestos:
+        db.execute(
+            update(models.Categoria)
+            .where(models.Categoria.id.in_(presupuestos.keys()))
+            .values(
+                presupuesto_mensual=case(presupuestos, value=models.Categoria.id),
+                version=sincronizacion.siguiente_version(db),
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        for categoria_id, presupuesto in presupuestos.items():
+            eventos.publicar(db, "categoria", eventos.ACTUALIZAR, categoria_id,
+                             {"id": categoria_id, "presupuesto_mensual": presupuesto})
+        cache_resultados.invalidar(db, DOMINIO_GASTOS, DOMINIO_REFERENCIAS)
+        db.commit()
+    return get_categorias(db)
+
+
 def delete_categoria(db: Session, categoria_id: int):
     db_categoria = get_categoria(db, categoria_id)
     if db_categoria:
+        # Las filas agregadas quedan aunque la categoría ya no tenga gastos; con
+        # claves foráneas activas (PostgreSQL) impedirían borrar la categoría
+        db.execute(delete(models.ResumenMensual).where(models.ResumenMensual.categoria_id == categoria_id))
         db.delete(db_categoria)
+        eventos.publicar(db, "categoria", eventos.ELIMINAR, categoria_id)
+        cache_resultados.invalidar(db, DOMINIO_GASTOS, DOMINIO_GASTOS_EDITADOS, DOMINIO_REFERENCIAS)
         db.commit()
         return True
     return False
@@ -61,6 +128,10 @@ def get_subcategorias(db: Session, categoria_id: Optional[int] = None, skip: int
 def create_subcategoria(db: Session, subcategoria: schemas.SubcategoriaCreate):
     db_subcategoria = models.Subcategoria(**subcategoria.model_dump())
     db.add(db_subcategoria)
+    db.flush()
+    eventos.publicar(db, "subcategoria", eventos.CREAR, db_subcategoria.id,
+                     schemas.Subcategoria.model_validate(db_subcategoria).model_dump(mode="json"))
+    cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
     db.commit()
     db.refresh(db_subcategoria)
     return db_subcategoria
@@ -72,6 +143,10 @@ def update_subcategoria(db: Session, subcategoria_id: int, subcategoria: schemas
         update_data = subcategoria.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_subcategoria, key, value)
+        # Completa: si cambió de categoría, el cliente la mueve
+        eventos.publicar(db, "subcategoria", eventos.ACTUALIZAR, subcategoria_id,
+                         schemas.Subcategoria.model_validate(db_subcategoria).model_dump(mode="json"))
+        cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
         db.commit()
         db.refresh(db_subcategoria)
     return db_subcategoria
@@ -81,89 +156,311 @@ def delete_subcategoria(db: Session, subcategoria_id: int):
     db_subcategoria = get_subcategoria(db, subcategoria_id)
     if db_subcategoria:
         db.delete(db_subcategoria)
+        # Los gastos de la subcategoría quedan sin ella
+        eventos.publicar(db, "subcategoria", eventos.ELIMINAR, subcategoria_id)
+        cache_resultados.invalidar(db, DOMINIO_GASTOS_EDITADOS, DOMINIO_REFERENCIAS)
         db.commit()
         return True
     return False
 
 
 # CRUD para Gastos
+def _gastos_con_relaciones():
+    """SELECT de gastos que trae categoría y subcategoría en la misma consulta
+    (evita una consulta por fila al serializar GastoDetallado)"""
+    return select(models.Gasto).options(
+        joinedload(models.Gasto.categoria),
+        joinedload(models.Gasto.subcategoria)
+    )
+
+
 def get_gasto(db: Session, gasto_id: int):
-    return db.query(models.Gasto).filter(models.Gasto.id == gasto_id).first()
+    return db.execute(
+        _gastos_con_relaciones().filter(models.Gasto.id == gasto_id)
+    ).scalars().first()
 
 
-def get_gastos(
-    db: Session,
+def consulta_gastos(
     categoria_id: Optional[int] = None,
     mes: Optional[int] = None,
     anio: Optional[int] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
-    query = db.query(models.Gasto)
+    query = _filtrar_gastos(_gastos_con_relaciones(), categoria_id, mes, anio)
+    query = aplicar_cursor(query, models.Gasto.fecha, models.Gasto.id, cursor)
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit)
 
+
+def _filtrar_gastos(query, categoria_id: Optional[int], mes: Optional[int], anio: Optional[int]):
+    """Filtros por categoría y mes compartidos por /gastos y /gastos/buscar"""
     if categoria_id:
         query = query.filter(models.Gasto.categoria_id == categoria_id)
 
-    if mes:
+    if anio:
+        inicio, fin = rango_mes(mes, anio)
+        query = query.filter(models.Gasto.fecha >= inicio, models.Gasto.fecha < fin)
+    elif mes:
+        # Sin año no hay un rango contiguo: se mantiene el filtro por mes
         query = query.filter(extract('month', models.Gasto.fecha) == mes)
+    return query
 
-    if anio:
-        query = query.filter(extract('year', models.Gasto.fecha) == anio)
 
-    return query.order_by(models.Gasto.fecha.desc()).offset(skip).limit(limit).all()
+def get_gastos(
+    db: Session,
+    categoria_id: Optional[int] = None,
+    mes: Optional[int] = None,
+    anio: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    return db.execute(
+        consulta_gastos(categoria_id, mes, anio, skip, limit, cursor)
+    ).scalars().all()
 
 
-def create_gasto(db: Session, gasto: schemas.GastoCreate):
+def buscar_gastos(
+    db: Session,
+    q: str,
+    categoria_id: Optional[int] = None,
+    mes: Optional[int] = None,
+    anio: Optional[int] = None,
+    orden: str = "relevancia",
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """Gastos cuya descripción contiene todas las palabras de `q` (como prefijos).
+    Devuelve (gastos, cursor de la página siguiente o None).
+    Lanza ValueError si `q` no tiene palabras o el cursor no es válido."""
+    palabras = busqueda.terminos(q)
+    if not palabras:
+        raise ValueError("La búsqueda debe contener al menos una palabra")
+
+    query = _filtrar_gastos(_gastos_con_relaciones(), categoria_id, mes, anio)
+    por_relevancia = False
+    if db.get_bind().dialect.name == "sqlite":
+        por_relevancia = orden == "relevancia"
+        query = busqueda.filtrar_fts(
+            query, palabras, por_relevancia,
+            decodificar_cursor_relevancia(cursor) if por_relevancia and cursor else None
+        )
+    else:
+        query = busqueda.filtrar_like(query, palabras)
+    if not por_relevancia:
+        query = aplicar_cursor(query, models.Gasto.fecha, models.Gasto.id, cursor)
+
+    filas = db.execute(query.limit(limit)).unique().all()
+    gastos = [fila[0] for fila in filas]
+    if len(filas) < limit:
+        return gastos, None
+    if por_relevancia:
+        return gastos, codificar_cursor_relevancia(filas[-1].rank, gastos[-1].id)
+    return gastos, siguiente_cursor(gastos, limit)
+
+
+def create_gasto(db: Session, gasto: schemas.GastoCreate) -> schemas.Gasto:
+    """Inserta el gasto y devuelve su schema. La categoría y la subcategoría se
+    validan antes, contra `backend.referencias`."""
     db_gasto = models.Gasto(**gasto.model_dump())
     db.add(db_gasto)
+    # El flush asigna id y created_at; armar la respuesta antes del commit evita
+    # volver a leer la fila (el commit expira el objeto)
+    db.flush()
+    creado = schemas.Gasto.model_validate(db_gasto)
+    resumen = ajustar_resumen_mensual(db, {
+        (gasto.fecha.year, gasto.fecha.month, gasto.categoria_id): (gasto.monto, 1)
+    })
+    eventos.publicar(db, "gasto", eventos.CREAR, creado.id, creado.model_dump(mode="json"), resumen)
+    cache_resultados.invalidar(db, DOMINIO_GASTOS)
     db.commit()
-    db.refresh(db_gasto)
-    return db_gasto
+    return creado
 
 
-def update_gasto(db: Session, gasto_id: int, gasto: schemas.GastoUpdate):
+def update_gasto(db: Session, gasto_id: int, gasto: schemas.GastoUpdate) -> Optional[schemas.Gasto]:
+    """Actualiza el gasto y devuelve su schema, o None si no existe"""
     db_gasto = get_gasto(db, gasto_id)
     if db_gasto:
+        anterior = (db_gasto.fecha.year, db_gasto.fecha.month, db_gasto.categoria_id)
+        monto_anterior = db_gasto.monto
+
         update_data = gasto.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_gasto, key, value)
+
+        # Restar del mes/categoría anterior y sumar al nuevo (pueden ser el mismo)
+        nuevo = (db_gasto.fecha.year, db_gasto.fecha.month, db_gasto.categoria_id)
+        if anterior == nuevo:
+            resumen = ajustar_resumen_mensual(db, {nuevo: (db_gasto.monto - monto_anterior, 0)})
+        else:
+            resumen = ajustar_resumen_mensual(db, {
+                anterior: (-monto_anterior, -1),
+                nuevo: (db_gasto.monto, 1),
+            })
+        db.flush()
+        actualizado = schemas.Gasto.model_validate(db_gasto)
+        eventos.publicar(db, "gasto", eventos.ACTUALIZAR, gasto_id, actualizado.model_dump(mode="json"), resumen)
+        cache_resultados.invalidar(db, DOMINIO_GASTOS, DOMINIO_GASTOS_EDITADOS)
         db.commit()
-        db.refresh(db_gasto)
-    return db_gasto
+        return actualizado
+    return None
 
 
 def delete_gasto(db: Session, gasto_id: int):
     db_gasto = get_gasto(db, gasto_id)
     if db_gasto:
+        resumen = ajustar_resumen_mensual(db, {
+            (db_gasto.fecha.year, db_gasto.fecha.month, db_gasto.categoria_id): (-db_gasto.monto, -1)
+        })
         db.delete(db_gasto)
+        eventos.publicar(db, "gasto", eventos.ELIMINAR, gasto_id, resumen=resumen)
+        cache_resultados.invalidar(db, DOMINIO_GASTOS, DOMINIO_GASTOS_EDITADOS)
         db.commit()
         return True
     return False
 
 
-def get_gastos_por_categoria_mes(db: Session, mes: int, anio: int):
-    """Obtiene el total de gastos por categoría en un mes específico
+# Resumen mensual (tabla agregada)
+def ajustar_resumen_mensual(db: Session, deltas: dict[tuple[int, int, int], tuple[float, int]]) -> list[dict]:
+    """Suma {(anio, mes, categoria_id): (delta_total, delta_cantidad)} a la tabla agregada
+    y devuelve las filas afectadas como quedan (RETURNING, sin otra consulta).
+
+    No hace commit: se ejecuta dentro de la transacción del cambio que lo origina."""
+    if not deltas:
+        return []
+    tabla = models.ResumenMensual.__table__
+    sentencia = insert_dialecto(db)(tabla)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.anio, tabla.c.mes, tabla.c.categoria_id],
+        set_={
+            "total": tabla.c.total + sentencia.excluded.total,
+            "cantidad": tabla.c.cantidad + sentencia.excluded.cantidad,
+        }
+    ).returning(tabla.c.anio, tabla.c.mes, tabla.c.categoria_id, tabla.c.total, tabla.c.cantidad)
+    filas = db.execute(sentencia, [
+        {"anio": anio, "mes": mes, "categoria_id": categoria_id, "total": total, "cantidad": cantidad}
+        for (anio, mes, categoria_id), (total, cantidad) in deltas.items()
+    ])
+    # SQLite devuelve en RETURNING el valor antes de aplicar la afinidad REAL
+    return [{**fila._mapping, "total": float(fila.total)} for fila in filas]
+
+
+def reconstruir_resumen_mensual(db: Session):
+    """Recalcula la tabla agregada completa a partir de `gastos`"""
+    anio = extract('year', models.Gasto.fecha).cast(Integer)
+    mes = extract('month', models.Gasto.fecha).cast(Integer)
+    db.execute(delete(models.ResumenMensual))
+    db.execute(
+        insert(models.ResumenMensual).from_select(
+            ["anio", "mes", "categoria_id", "total", "cantidad"],
+            select(
+                anio, mes, models.Gasto.categoria_id,
+                func.sum(models.Gasto.monto), func.count(models.Gasto.id)
+            ).group_by(anio, mes, models.Gasto.categoria_id)
+        )
+    )
+    cache_resultados.invalidar(db, DOMINIO_GASTOS)
+    db.commit()
+
+
+def consulta_resumen_mes(mes: int, anio: int):
+    """Total gastado por categoría en un mes específico
     Incluye TODAS las categorías, incluso las que no tienen gastos"""
 
-    # Subconsulta para obtener gastos del mes
-    gastos_mes = db.query(
-        models.Gasto.categoria_id,
-        func.sum(models.Gasto.monto).label('total_gastado')
-    ).filter(
-        extract('month', models.Gasto.fecha) == mes,
-        extract('year', models.Gasto.fecha) == anio
-    ).group_by(
-        models.Gasto.categoria_id
-    ).subquery()
-
-    # LEFT JOIN para incluir todas las categorías
-    return db.query(
+    # LEFT JOIN contra la tabla agregada: una fila por categoría del mes
+    return select(
         models.Categoria.nombre,
         models.Categoria.presupuesto_mensual,
         models.Categoria.color,
-        func.coalesce(gastos_mes.c.total_gastado, 0).label('total_gastado')
+        func.coalesce(models.ResumenMensual.total, 0).label('total_gastado')
     ).outerjoin(
-        gastos_mes, models.Categoria.id == gastos_mes.c.categoria_id
+        models.ResumenMensual,
+        (models.ResumenMensual.categoria_id == models.Categoria.id)
+        & (models.ResumenMensual.anio == anio)
+        & (models.ResumenMensual.mes == mes)
     ).order_by(
         models.Categoria.id
-    ).all()
+    )
+
+
+def get_gastos_por_categoria_mes(db: Session, mes: int, anio: int):
+    """Obtiene el total de gastos por categoría en un mes específico"""
+    return db.execute(consulta_resumen_mes(mes, anio)).all()
+
+
+def consulta_tendencias(desde: tuple[int, int], hasta: tuple[int, int], categoria_id: Optional[int] = None):
+    """Totales por (año, mes, categoría) entre dos meses (anio, mes) inclusive.
+    La comparación por tuplas usa la llave primaria de `resumen_mensual`."""
+    periodo = tuple_(models.ResumenMensual.anio, models.ResumenMensual.mes)
+    consulta = select(
+        models.ResumenMensual.anio,
+        models.ResumenMensual.mes,
+        models.ResumenMensual.categoria_id,
+        models.ResumenMensual.total,
+        models.ResumenMensual.cantidad
+    ).where(
+        periodo >= tuple_(*desde),
+        periodo <= tuple_(*hasta)
+    )
+    if categoria_id is not None:
+        consulta = consulta.where(models.ResumenMensual.categoria_id == categoria_id)
+    return consulta
+
+
+def get_tendencias(db: Session, desde: int, hasta: int, categoria_id: Optional[int] = None,
+                   ventana: int = 3) -> Optional[dict]:
+    """Series mensuales por categoría entre dos índices de mes (ver backend.tendencias).
+    Devuelve None si se filtra por una categoría que no existe."""
+    consulta_categorias = select(
+        models.Categoria.id,
+        models.Categoria.nombre,
+        models.Categoria.color,
+        models.Categoria.icono,
+        models.Categoria.presupuesto_mensual
+    ).order_by(models.Categoria.id)
+    if categoria_id is not None:
+        consulta_categorias = consulta_categorias.where(models.Categoria.id == categoria_id)
+    categorias = db.execute(consulta_categorias).all()
+    if categoria_id is not None and not categorias:
+        return None
+
+    inicio = desde - tendencias.MESES_HISTORIA
+    filas = db.execute(consulta_tendencias(
+        (inicio // 12, inicio % 12 + 1), (hasta // 12, hasta % 12 + 1), categoria_id
+    )).all()
+    return tendencias.calcular_tendencias(categorias, filas, desde, hasta, ventana)
+
+
+def armar_resumen(mes: int, anio: int, filas) -> dict:
+    """Arma la respuesta de /resumen: gastos vs presupuesto por categoría y totales"""
+    resultado = []
+    total_presupuesto = 0.0
+    total_gastado = 0.0
+
+    for nombre, presupuesto, color, gastado in filas:
+        gastado = gastado or 0.0
+        total_presupuesto += presupuesto
+        total_gastado += gastado
+
+        resultado.append({
+            "categoria": nombre,
+            "presupuesto_mensual": presupuesto,
+            "total_gastado": gastado,
+            "diferencia": presupuesto - gastado,
+            "porcentaje_usado": (gastado / presupuesto * 100) if presupuesto > 0 else 0,
+            "color": color
+        })
+
+    return {
+        "mes": mes,
+        "anio": anio,
+        "categorias": resultado,
+        "totales": {
+            "presupuesto_total": total_presupuesto,
+            "gastado_total": total_gastado,
+            "diferencia_total": total_presupuesto - total_gastado
+        }
+    }
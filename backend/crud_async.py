@@ -0,0 +1,48 @@
+"""Lecturas asíncronas (modo DB_ASYNC).
+
+Ejecutan en una `AsyncSession` las mismas consultas que construyen `crud`
+y `crud_financiero`, para que ambos modos devuelvan exactamente lo mismo.
+"""
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import crud, crud_financiero
+from backend.cache import cache_resultados, DOMINIO_GASTOS
+
+
+async def get_gastos(
+    db: AsyncSession,
+    categoria_id: Optional[int] = None,
+    mes: Optional[int] = None,
+    anio: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    consulta = crud.consulta_gastos(categoria_id, mes, anio, skip, limit, cursor)
+    return (await db.execute(consulta)).scalars().all()
+
+
+async def get_resumen(db: AsyncSession, mes: int, anio: int):
+    async def calcular():
+        filas = (await db.execute(crud.consulta_resumen_mes(mes, anio))).all()
+        return crud.armar_resumen(mes, anio, filas)
+
+    return await cache_resultados.obtener_async(db, DOMINIO_GASTOS, ("resumen", mes, anio), calcular)
+
+
+async def get_ingresos(
+    db: AsyncSession,
+    cuenta_bancaria_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    consulta = crud_financiero.consulta_ingresos(cuenta_bancaria_id, skip, limit, cursor)
+    return (await db.execute(consulta)).scalars().all()
+
+
+async def get_transferencias(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = crud_financiero.consulta_transferencias(skip, limit, cursor)
+    return (await db.execute(consulta)).scalars().all()
@@ -1,6 +1,10 @@
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 from typing import Optional
-from backend import models, schemas
+from datetime import date, datetime
+from backend import libro_mayor, models, schemas, sincronizacion
+from backend.cache import cache_resultados, DOMINIO_CUENTAS, DOMINIO_GASTOS_EDITADOS, DOMINIO_REFERENCIAS
+from backend.paginacion import aplicar_cursor
 
 
 # ========== CRUD BANCOS ==========
@@ -18,6 +22,7 @@ def get_bancos(db: Session, activo: Optional[bool] = None):
 def create_banco(db: Session, banco: schemas.BancoCreate):
     db_banco = models.Banco(**banco.model_dump())
     db.add(db_banco)
+    cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
     db.commit()
     db.refresh(db_banco)
     return db_banco
@@ -29,6 +34,7 @@ def update_banco(db: Session, banco_id: int, banco: schemas.BancoUpdate):
         update_data = banco.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_banco, key, value)
+        cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
         db.commit()
         db.refresh(db_banco)
     return db_banco
@@ -38,6 +44,8 @@ def delete_banco(db: Session, banco_id: int):
     db_banco = get_banco(db, banco_id)
     if db_banco:
         db.delete(db_banco)
+        # Los gastos del banco quedan sin él: la instantánea de analítica se reconstruye
+        cache_resultados.invalidar(db, DOMINIO_REFERENCIAS, DOMINIO_GASTOS_EDITADOS)
         db.commit()
         return True
     return False
@@ -60,6 +68,7 @@ def get_medios_pago(db: Session, banco_id: Optional[int] = None, activo: Optiona
 def create_medio_pago(db: Session, medio_pago: schemas.MedioPagoCreate):
     db_medio_pago = models.MedioPago(**medio_pago.model_dump())
     db.add(db_medio_pago)
+    cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
     db.commit()
     db.refresh(db_medio_pago)
     return db_medio_pago
@@ -71,6 +80,7 @@ def update_medio_pago(db: Session, medio_pago_id: int, medio_pago: schemas.Medio
         update_data = medio_pago.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_medio_pago, key, value)
+        cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
         db.commit()
         db.refresh(db_medio_pago)
     return db_medio_pago
@@ -80,6 +90,8 @@ def delete_medio_pago(db: Session, medio_pago_id: int):
     db_medio_pago = get_medio_pago(db, medio_pago_id)
     if db_medio_pago:
         db.delete(db_medio_pago)
+        # Los gastos del medio de pago quedan sin él
+        cache_resultados.invalidar(db, DOMINIO_REFERENCIAS, DOMINIO_GASTOS_EDITADOS)
         db.commit()
         return True
     return False
@@ -100,6 +112,12 @@ def get_cuentas_bancarias(db: Session, activa: Optional[bool] = None):
 def create_cuenta_bancaria(db: Session, cuenta: schemas.CuentaBancariaCreate):
     db_cuenta = models.CuentaBancaria(**cuenta.model_dump())
     db.add(db_cuenta)
+    db.flush()
+    libro_mayor.registrar_movimiento(
+        db, db_cuenta.id, date.today(), "apertura",
+        transaccional=cuenta.saldo_transaccional, ahorro=cuenta.saldo_ahorro, total=cuenta.saldo_total
+    )
+    cache_resultados.invalidar(db, DOMINIO_CUENTAS)
     db.commit()
     db.refresh(db_cuenta)
     return db_cuenta
@@ -108,9 +126,21 @@ def create_cuenta_bancaria(db: Session, cuenta: schemas.CuentaBancariaCreate):
 def update_cuenta_bancaria(db: Session, cuenta_id: int, cuenta: schemas.CuentaBancariaUpdate):
     db_cuenta = get_cuenta_bancaria(db, cuenta_id)
     if db_cuenta:
+        saldos = ("saldo_total", "saldo_transaccional", "saldo_ahorro")
+        anteriores = [getattr(db_cuenta, campo) or 0.0 for campo in saldos]
+
         update_data = cuenta.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_cuenta, key, value)
+
+        # Un cambio manual de saldo queda en el libro como ajuste
+        deltas = [(getattr(db_cuenta, campo) or 0.0) - anterior for campo, anterior in zip(saldos, anteriores)]
+        if any(deltas):
+            libro_mayor.registrar_movimiento(
+                db, cuenta_id, date.today(), "ajuste",
+                transaccional=deltas[1], ahorro=deltas[2], total=deltas[0]
+            )
+        cache_resultados.invalidar(db, DOMINIO_CUENTAS)
         db.commit()
         db.refresh(db_cuenta)
     return db_cuenta
@@ -119,7 +149,9 @@ def update_cuenta_bancaria(db: Session, cuenta_id: int, cuenta: schemas.CuentaBa
 def delete_cuenta_bancaria(db: Session, cuenta_id: int):
     db_cuenta = get_cuenta_bancaria(db, cuenta_id)
     if db_cuenta:
+        libro_mayor.eliminar_cuenta(db, cuenta_id)
         db.delete(db_cuenta)
+        cache_resultados.invalidar(db, DOMINIO_CUENTAS)
         db.commit()
         return True
     return False
@@ -130,27 +162,82 @@ def get_ingreso(db: Session, ingreso_id: int):
     return db.query(models.Ingreso).filter(models.Ingreso.id == ingreso_id).first()
 
 
-def get_ingresos(db: Session, cuenta_bancaria_id: Optional[int] = None):
-    query = db.query(models.Ingreso)
+def consulta_ingresos(
+    cuenta_bancaria_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    query = select(models.Ingreso)
     if cuenta_bancaria_id:
         query = query.filter(models.Ingreso.cuenta_bancaria_id == cuenta_bancaria_id)
-    return query.order_by(models.Ingreso.fecha.desc()).all()
+    query = aplicar_cursor(query, models.Ingreso.fecha, models.Ingreso.id, cursor)
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def get_ingresos(
+    db: Session,
+    cuenta_bancaria_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    return db.execute(consulta_ingresos(cuenta_bancaria_id, skip, limit, cursor)).scalars().all()
+
+
+def _ajustar_saldo(
+    db: Session,
+    cuenta_id: int,
+    delta: float,
+    columna: str = "saldo_transaccional",
+    exigir_fondos: bool = False
+) -> bool:
+    """Suma `delta` a saldo_total y a la columna indicada con un UPDATE atómico.
+
+    Con exigir_fondos el UPDATE solo aplica si la columna alcanza para cubrir
+    el retiro; la verificación y el descuento ocurren en la misma sentencia.
+    Devuelve False si la cuenta no existe o no tiene fondos suficientes."""
+    cuenta = models.CuentaBancaria
+    saldo = getattr(cuenta, columna)
+    sentencia = update(cuenta).where(cuenta.id == cuenta_id).values({
+        cuenta.saldo_total: cuenta.saldo_total + delta,
+        saldo: saldo + delta,
+        cuenta.version: sincronizacion.siguiente_version(db),
+        cuenta.updated_at: datetime.utcnow(),
+    })
+    if exigir_fondos:
+        sentencia = sentencia.where(saldo >= -delta)
+    resultado = db.execute(sentencia.execution_options(synchronize_session=False))
+    return resultado.rowcount == 1
+
+
+def _columna_saldo(tipo: str) -> str:
+    return "saldo_ahorro" if tipo == "ahorro" else "saldo_transaccional"
+
+
+def _registrar_ingreso(db: Session, ingreso: models.Ingreso, signo: float):
+    """Movimiento del libro mayor por un ingreso (signo -1 para el reverso)"""
+    monto = signo * ingreso.monto
+    libro_mayor.registrar_movimiento(
+        db, ingreso.cuenta_bancaria_id, ingreso.fecha, "ingreso", ingreso.id,
+        transaccional=0.0 if ingreso.tipo == "ahorro" else monto,
+        ahorro=monto if ingreso.tipo == "ahorro" else 0.0,
+    )
 
 
 def create_ingreso(db: Session, ingreso: schemas.IngresoCreate):
     # Crear el ingreso
     db_ingreso = models.Ingreso(**ingreso.model_dump())
     db.add(db_ingreso)
+    db.flush()
 
     # Actualizar saldo de la cuenta
-    cuenta = get_cuenta_bancaria(db, ingreso.cuenta_bancaria_id)
-    if cuenta:
-        cuenta.saldo_total += ingreso.monto
-        if ingreso.tipo == "ahorro":
-            cuenta.saldo_ahorro += ingreso.monto
-        else:
-            cuenta.saldo_transaccional += ingreso.monto
+    if _ajustar_saldo(db, ingreso.cuenta_bancaria_id, ingreso.monto, _columna_saldo(ingreso.tipo)):
+        _registrar_ingreso(db, db_ingreso, 1)
 
+    cache_resultados.invalidar(db, DOMINIO_CUENTAS)
     db.commit()
     db.refresh(db_ingreso)
     return db_ingreso
@@ -159,18 +246,22 @@ def create_ingreso(db: Session, ingreso: schemas.IngresoCreate):
 def delete_ingreso(db: Session, ingreso_id: int):
     db_ingreso = get_ingreso(db, ingreso_id)
     if db_ingreso:
-        # Revertir saldo de la cuenta
-        cuenta = get_cuenta_bancaria(db, db_ingreso.cuenta_bancaria_id)
-        if cuenta:
-            cuenta.saldo_total -= db_ingreso.monto
-            if db_ingreso.tipo == "ahorro":
-                cuenta.saldo_ahorro -= db_ingreso.monto
-            else:
-                cuenta.saldo_transaccional -= db_ingreso.monto
-
-        db.delete(db_ingreso)
+        # Solo quien efectivamente borra la fila revierte el saldo: dos bajas
+        # concurrentes del mismo ingreso no lo descuentan dos veces
+        borrado = db.execute(
+            delete(models.Ingreso)
+            .where(models.Ingreso.id == ingreso_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        if borrado:
+            sincronizacion.registrar_eliminados(db, models.Ingreso, [ingreso_id])
+            if _ajustar_saldo(
+                db, db_ingreso.cuenta_bancaria_id, -db_ingreso.monto, _columna_saldo(db_ingreso.tipo)
+            ):
+                _registrar_ingreso(db, db_ingreso, -1)
+            cache_resultados.invalidar(db, DOMINIO_CUENTAS)
         db.commit()
-        return True
+        return borrado
     return False
 
 
@@ -179,8 +270,17 @@ def get_transferencia(db: Session, transferencia_id: int):
     return db.query(models.Transferencia).filter(models.Transferencia.id == transferencia_id).first()
 
 
-def get_transferencias(db: Session):
-    return db.query(models.Transferencia).order_by(models.Transferencia.fecha.desc()).all()
+def consulta_transferencias(skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = aplicar_cursor(
+        select(models.Transferencia), models.Transferencia.fecha, models.Transferencia.id, cursor
+    )
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def get_transferencias(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return db.execute(consulta_transferencias(skip, limit, cursor)).scalars().all()
 
 
 def create_transferencia(db: Session, transferencia: schemas.TransferenciaCreate):
@@ -188,32 +288,50 @@ def create_transferencia(db: Session, transferencia: schemas.TransferenciaCreate
     if transferencia.cuenta_origen_id == transferencia.cuenta_destino_id:
         return None
 
-    # Verificar saldo suficiente en cuenta origen
-    cuenta_origen = get_cuenta_bancaria(db, transferencia.cuenta_origen_id)
-    if not cuenta_origen or cuenta_origen.saldo_transaccional < transferencia.monto:
-        return None
+    # Débito (condicionado a saldo suficiente) y crédito como UPDATEs atómicos.
+    # Se aplican en orden de id de cuenta para que dos transferencias cruzadas
+    # tomen los bloqueos en el mismo orden y no se interbloqueen.
+    movimientos = sorted([
+        (transferencia.cuenta_origen_id, -transferencia.monto, True),
+        (transferencia.cuenta_destino_id, transferencia.monto, False),
+    ])
+    for cuenta_id, delta, exigir_fondos in movimientos:
+        if not _ajustar_saldo(db, cuenta_id, delta, exigir_fondos=exigir_fondos):
+            # Cuenta inexistente o saldo insuficiente
+            db.rollback()
+            return None
 
     # Crear transferencia
     db_transferencia = models.Transferencia(**transferencia.model_dump())
     db.add(db_transferencia)
+    db.flush()
 
-    # Actualizar saldos
-    cuenta_destino = get_cuenta_bancaria(db, transferencia.cuenta_destino_id)
-    if cuenta_origen and cuenta_destino:
-        cuenta_origen.saldo_transaccional -= transferencia.monto
-        cuenta_origen.saldo_total -= transferencia.monto
-
-        cuenta_destino.saldo_transaccional += transferencia.monto
-        cuenta_destino.saldo_total += transferencia.monto
+    for cuenta_id, delta, _ in movimientos:
+        libro_mayor.registrar_movimiento(
+            db, cuenta_id, transferencia.fecha, "transferencia", db_transferencia.id, transaccional=delta
+        )
 
+    cache_resultados.invalidar(db, DOMINIO_CUENTAS)
     db.commit()
     db.refresh(db_transferencia)
     return db_transferencia
 
 
+def get_saldo_en_fecha(db: Session, cuenta_id: int, fecha: date):
+    """Saldo de la cuenta al cierre de la fecha indicada, según el libro mayor"""
+    return libro_mayor.saldo_en_fecha(db, cuenta_id, fecha)
+
+
 def get_resumen_cuentas(db: Session):
-    """Obtiene resumen de todas las cuentas"""
-    cuentas = get_cuentas_bancarias(db, activa=True)
+    """Obtiene resumen de todas las cuentas (en caché hasta la próxima escritura)"""
+    return cache_resultados.obtener(db, DOMINIO_CUENTAS, "resumen", lambda: _calcular_resumen_cuentas(db))
+
+
+def _calcular_resumen_cuentas(db: Session):
+    # Se guardan schemas y no objetos ORM: el resultado sobrevive a la sesión
+    cuentas = [
+        schemas.CuentaBancaria.model_validate(c) for c in get_cuentas_bancarias(db, activa=True)
+    ]
 
     total_general = sum(c.saldo_total for c in cuentas)
     total_ahorro = sum(c.saldo_ahorro for c in cuentas)
@@ -1,20 +1,189 @@
-from sqlalchemy import create_engine
+import os
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./expense_tracker.db"
+def _env_bool(nombre: str, defecto: str = "0") -> bool:
+    return os.getenv(nombre, defecto).lower() in ("1", "true", "si", "yes")
+
+
+def _normalizar_url(url: str) -> str:
+    # Render/Heroku entregan postgres://, que SQLAlchemy ya no acepta. Sin driver
+    # explícito, SQLAlchemy 2.0 usaría psycopg2: se fija psycopg (versión 3)
+    for prefijo in ("postgres://", "postgresql://"):
+        if url.startswith(prefijo):
+            return "postgresql+psycopg://" + url[len(prefijo):]
+    return url
+
+
+def _sqlite_en_memoria(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+SQLALCHEMY_DATABASE_URL = _normalizar_url(os.getenv("DATABASE_URL", "sqlite:///./expense_tracker.db"))
+ES_SQLITE = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
+
+# DB_ASYNC=1 atiende los endpoints de lectura con un motor asíncrono
+# (aiosqlite o asyncpg según la URL). Las escrituras siguen siendo síncronas.
+USAR_ASYNC = _env_bool("DB_ASYNC")
+
+# PRAGMAs aplicados a cada conexión SQLite:
+# - WAL: los lectores no se bloquean mientras alguien escribe
+# - synchronous=NORMAL: seguro con WAL y evita un fsync por commit
+# - busy_timeout: los escritores concurrentes esperan en vez de fallar con "database is locked"
+# - foreign_keys: SQLite no valida las claves foráneas salvo que se active
+#   (SQLITE_FOREIGN_KEYS=1, como en PostgreSQL)
+PRAGMAS_SQLITE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negativo = KiB (64 MiB)
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON" if _env_bool("SQLITE_FOREIGN_KEYS") else "OFF",
+}
+
+
+def _opciones_engine() -> dict:
+    """Parámetros de create_engine según el motor (configurables por entorno)"""
+    if ES_SQLITE and _sqlite_en_memoria(make_url(SQLALCHEMY_DATABASE_URL)):
+        # Cada conexión a :memory: es una base distinta: una sola conexión compartida
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+    if ES_SQLITE:
+        # Las conexiones SQLite son baratas: un pool amplio evita que los hilos
+        # del threadpool queden esperando una conexión bajo carga
+        return {
+            "connect_args": {"check_same_thread": False},
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        }
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "1"),
+    }
+
+
+def _aplicar_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for nombre, valor in PRAGMAS_SQLITE.items():
+        cursor.execute(f"PRAGMA {nombre}={valor}")
+    cursor.close()
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_opciones_engine())
+if ES_SQLITE:
+    event.listen(engine, "connect", _aplicar_pragmas)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def url_async(url: str) -> str:
+    """Equivalente asíncrono de una URL síncrona de SQLAlchemy"""
+    url = make_url(url)
+    drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+    return url.set(drivername=drivers.get(url.get_backend_name(), url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+async_engine = None
+AsyncSessionLocal = None
+if USAR_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    opciones_async = _opciones_engine()
+    opciones_async.pop("connect_args", None)
+    async_engine = create_async_engine(url_async(SQLALCHEMY_DATABASE_URL), **opciones_async)
+    if ES_SQLITE:
+        event.listen(async_engine.sync_engine, "connect", _aplicar_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+def insert_dialecto(db):
+    """`insert` del dialecto de la sesión (o conexión), con soporte de ON CONFLICT"""
+    bind = db.get_bind() if isinstance(db, Session) else db
+    if bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+# Clave del advisory lock de PostgreSQL que serializa migraciones y datos iniciales
+CLAVE_BLOQUEO_ARRANQUE = 4_210_517
+
+
+@contextmanager
+def transaccion_exclusiva(bind=engine):
+    """Conexión en una transacción que toma el bloqueo de escritura al empezar.
+
+    Varios workers que arrancan a la vez pasan por aquí de a uno: el segundo
+    espera a que el primero confirme y después ve sus cambios.
+    - SQLite: BEGIN IMMEDIATE (espera hasta busy_timeout)
+    - PostgreSQL: pg_advisory_xact_lock, que se libera con la transacción
+    """
+    with bind.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite no abre la transacción por su cuenta antes de un SELECT o DDL:
+            # se abre aquí con el bloqueo reservado y SQLAlchemy la confirma al final
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": CLAVE_BLOQUEO_ARRANQUE})
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class ContadorConsultas:
+    """Acumula las sentencias SQL ejecutadas mientras está activo"""
+
+    def __init__(self):
+        self.sentencias = []
+
+    @property
+    def total(self):
+        return len(self.sentencias)
+
+
+@contextmanager
+def contar_consultas(bind=engine):
+    """Cuenta las sentencias SQL emitidas dentro del bloque.
+
+    Útil para detectar problemas N+1:
+        with contar_consultas() as contador:
+            client.get("/gastos")
+        assert contador.total <= 2
+    """
+    contador = ContadorConsultas()
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        contador.sentencias.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _registrar)
+    try:
+        yield contador
+    finally:
+        event.remove(bind, "before_cursor_execute", _registrar)
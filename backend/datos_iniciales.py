@@ -0,0 +1,60 @@
+"""Datos con los que arranca una base nueva"""
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend import models, sincronizacion
+from backend.cache import cache_resultados, DOMINIO_GASTOS, DOMINIO_REFERENCIAS
+from backend.database import engine as default_engine, transaccion_exclusiva
+
+CATEGORIAS_INICIALES = [
+    {"nombre": "Alimentación", "color": "#10B981", "presupuesto_mensual": 0.0, "icono": "🍔"},
+    {"nombre": "Servicios", "color": "#3B82F6", "presupuesto_mensual": 0.0, "icono": "💡"},
+    {"nombre": "Transporte", "color": "#F59E0B", "presupuesto_mensual": 0.0, "icono": "🚗"},
+    {"nombre": "Salud", "color": "#EF4444", "presupuesto_mensual": 0.0, "icono": "❤️"},
+    {"nombre": "Educación", "color": "#8B5CF6", "presupuesto_mensual": 0.0, "icono": "📚"},
+    {"nombre": "Entretenimiento", "color": "#EC4899", "presupuesto_mensual": 0.0, "icono": "🎬"},
+    {"nombre": "Hogar", "color": "#06B6D4", "presupuesto_mensual": 0.0, "icono": "🏠"},
+    {"nombre": "Impuestos", "color": "#64748B", "presupuesto_mensual": 0.0, "icono": "📄"},
+    {"nombre": "Otros", "color": "#9CA3AF", "presupuesto_mensual": 0.0, "icono": "💰"},
+]
+
+BANCOS_INICIALES = ["Bancolombia", "Nequi", "Banco Falabella", "Davivienda", "BBVA"]
+
+
+def _faltantes(db: Session) -> dict:
+    """Filas iniciales que aún no están en la base, por modelo (una consulta por tabla)"""
+    categorias = set(db.scalars(select(models.Categoria.nombre)))
+    bancos = set(db.scalars(select(models.Banco.nombre)))
+    return {
+        models.Categoria: [c for c in CATEGORIAS_INICIALES if c["nombre"] not in categorias],
+        models.Banco: [{"nombre": b} for b in BANCOS_INICIALES if b not in bancos],
+    }
+
+
+def sembrar_datos_iniciales(engine: Engine = default_engine) -> int:
+    """Crea las categorías y bancos predefinidos que falten. Devuelve cuántas filas insertó.
+
+    Con todo ya creado (el caso normal) son dos SELECT de lectura. Si falta algo
+    se vuelve a comprobar dentro de una transacción exclusiva y se inserta en
+    bloque: con varios workers arrancando a la vez solo uno inserta."""
+    with Session(engine) as db:
+        if not any(_faltantes(db).values()):
+            return 0
+
+    with transaccion_exclusiva(engine) as conn, Session(bind=conn) as db:
+        faltantes = _faltantes(db)
+        insertadas = 0
+        for modelo, filas in faltantes.items():
+            if filas:
+                # Insert en bloque: no pasa por los eventos de mapper que versionan las filas
+                version = {"version": sincronizacion.siguiente_version(db), "updated_at": datetime.utcnow()}
+                db.execute(insert(modelo), [{**fila, **version} for fila in filas])
+                insertadas += len(filas)
+        cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)
+        if faltantes[models.Categoria]:
+            cache_resultados.invalidar(db, DOMINIO_GASTOS)
+        db.commit()
+    return insertadas
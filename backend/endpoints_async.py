@@ -0,0 +1,80 @@
+"""Endpoints de lectura asíncronos.
+
+Solo se registran con DB_ASYNC=1. Se incluyen antes que las rutas síncronas
+equivalentes, que quedan sombreadas: mismas rutas, parámetros y respuestas.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from backend import schemas, crud_async
+from backend.database import get_async_db
+from backend.paginacion import siguiente_cursor
+from backend.referencias import cache_referencias
+from backend.respuestas import RespuestaJSON, respuesta_lista
+
+router = APIRouter()
+
+
+@router.get("/categorias", response_model=list[schemas.CategoriaConSubcategorias])
+async def listar_categorias(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    return RespuestaJSON((await cache_referencias.obtener_async(db)).categorias[skip:skip + limit])
+
+
+@router.get("/gastos", response_model=list[schemas.GastoDetallado])
+async def listar_gastos(
+    categoria_id: Optional[int] = None,
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    anio: Optional[int] = Query(None, ge=2000),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        gastos = await crud_async.get_gastos(
+            db, categoria_id=categoria_id, mes=mes, anio=anio, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(gastos, schemas.GastoDetallado, siguiente_cursor(gastos, limit))
+
+
+@router.get("/resumen")
+async def obtener_resumen(
+    mes: int = Query(..., ge=1, le=12),
+    anio: int = Query(..., ge=2000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.get_resumen(db, mes, anio)
+
+
+@router.get("/ingresos", response_model=list[schemas.Ingreso])
+async def listar_ingresos(
+    cuenta_bancaria_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        ingresos = await crud_async.get_ingresos(
+            db, cuenta_bancaria_id=cuenta_bancaria_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(ingresos, schemas.Ingreso, siguiente_cursor(ingresos, limit))
+
+
+@router.get("/transferencias", response_model=list[schemas.Transferencia])
+async def listar_transferencias(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        transferencias = await crud_async.get_transferencias(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(transferencias, schemas.Transferencia, siguiente_cursor(transferencias, limit))
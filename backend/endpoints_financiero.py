@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional
+from datetime import date
 from backend import schemas, crud_financiero
 from backend.database import get_db
+from backend.paginacion import siguiente_cursor
+from backend.referencias import cache_referencias
+from backend.respuestas import RespuestaJSON, respuesta_lista
 
 router = APIRouter()
 
@@ -10,7 +14,10 @@ router = APIRouter()
 # ========== ENDPOINTS BANCOS ==========
 @router.get("/bancos", response_model=list[schemas.Banco])
 def listar_bancos(activo: Optional[bool] = None, db: Session = Depends(get_db)):
-    return crud_financiero.get_bancos(db, activo=activo)
+    bancos = cache_referencias.obtener(db).bancos
+    if activo is not None:
+        bancos = [b for b in bancos if b["activo"] == (1 if activo else 0)]
+    return RespuestaJSON(bancos)
 
 
 @router.post("/bancos", response_model=schemas.Banco, status_code=201)
@@ -39,7 +46,12 @@ def listar_medios_pago(
     activo: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
-    return crud_financiero.get_medios_pago(db, banco_id=banco_id, activo=activo)
+    medios_pago = cache_referencias.obtener(db).medios_pago
+    if banco_id:
+        medios_pago = [m for m in medios_pago if m["banco_id"] == banco_id]
+    if activo is not None:
+        medios_pago = [m for m in medios_pago if m["activo"] == (1 if activo else 0)]
+    return RespuestaJSON(medios_pago)
 
 
 @router.post("/medios-pago", response_model=schemas.MedioPago, status_code=201)
@@ -76,6 +88,18 @@ def obtener_resumen_cuentas(db: Session = Depends(get_db)):
     return crud_financiero.get_resumen_cuentas(db)
 
 
+@router.get("/cuentas-bancarias/{cuenta_id}/saldo", response_model=schemas.SaldoCuenta)
+def obtener_saldo_cuenta(
+    cuenta_id: int,
+    fecha: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Saldo de la cuenta al cierre de `fecha` (hoy si no se indica)"""
+    if not crud_financiero.get_cuenta_bancaria(db, cuenta_id):
+        raise HTTPException(status_code=404, detail="Cuenta bancaria no encontrada")
+    return crud_financiero.get_saldo_en_fecha(db, cuenta_id, fecha or date.today())
+
+
 @router.post("/cuentas-bancarias", response_model=schemas.CuentaBancaria, status_code=201)
 def crear_cuenta_bancaria(cuenta: schemas.CuentaBancariaCreate, db: Session = Depends(get_db)):
     return crud_financiero.create_cuenta_bancaria(db, cuenta)
@@ -101,8 +125,20 @@ def eliminar_cuenta_bancaria(cuenta_id: int, db: Session = Depends(get_db)):
 
 # ========== ENDPOINTS INGRESOS ==========
 @router.get("/ingresos", response_model=list[schemas.Ingreso])
-def listar_ingresos(cuenta_bancaria_id: Optional[int] = None, db: Session = Depends(get_db)):
-    return crud_financiero.get_ingresos(db, cuenta_bancaria_id=cuenta_bancaria_id)
+def listar_ingresos(
+    cuenta_bancaria_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        ingresos = crud_financiero.get_ingresos(
+            db, cuenta_bancaria_id=cuenta_bancaria_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(ingresos, schemas.Ingreso, siguiente_cursor(ingresos, limit))
 
 
 @router.post("/ingresos", response_model=schemas.Ingreso, status_code=201)
@@ -123,8 +159,17 @@ def eliminar_ingreso(ingreso_id: int, db: Session = Depends(get_db)):
 
 # ========== ENDPOINTS TRANSFERENCIAS ==========
 @router.get("/transferencias", response_model=list[schemas.Transferencia])
-def listar_transferencias(db: Session = Depends(get_db)):
-    return crud_financiero.get_transferencias(db)
+def listar_transferencias(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        transferencias = crud_financiero.get_transferencias(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(transferencias, schemas.Transferencia, siguiente_cursor(transferencias, limit))
 
 
 @router.post("/transferencias", response_model=schemas.Transferencia, status_code=201)
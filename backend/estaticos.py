@@ -0,0 +1,137 @@
+"""Archivos estáticos con huella de contenido y página principal precalculada.
+
+Al arrancar se leen a memoria los archivos de `frontend/static` (son pocos y
+chicos), se calcula el hash de su contenido y los de texto se comprimen con
+gzip una sola vez.
+
+- `/static/js/app.<hash>.js`: URL con huella. Cambia cuando cambia el
+  archivo, así que se sirve con `Cache-Control: public, max-age=31536000, immutable`.
+- `/static/js/app.js`: la URL de siempre sigue funcionando con `no-cache`:
+  el navegador revalida con If-None-Match y recibe 304 si no cambió.
+- `index.html` se renderiza una sola vez con Jinja, usando las URLs con
+  huella (`{{ url_estatico('js/app.js') }}`), y se sirve desde memoria con
+  ETag y `no-cache`.
+
+Si el cliente acepta gzip se envía la variante precomprimida
+(`Content-Encoding: gzip`, `Vary: Accept-Encoding`). Cada variante tiene su
+propio ETag.
+"""
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# Tipos que vale la pena comprimir (las imágenes y fuentes ya vienen comprimidas)
+_COMPRIMIBLES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+def huella(contenido: bytes) -> str:
+    return hashlib.sha256(contenido).hexdigest()[:12]
+
+
+def _etag_coincide(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil (RFC 9110): W/"x" equivale a "x"
+    return any(e.strip().removeprefix("W/") == etag for e in if_none_match.split(","))
+
+
+class Recurso:
+    """Contenido en memoria con su variante gzip y sus ETags"""
+
+    def __init__(self, contenido: bytes, tipo: str):
+        self.contenido = contenido
+        self.tipo = tipo
+        self.huella = huella(contenido)
+        self.comprimido = None
+        if tipo.startswith(_COMPRIMIBLES):
+            comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+            if len(comprimido) < len(contenido) * 0.9:
+                self.comprimido = comprimido
+
+    def respuesta(self, headers, cache_control: str, head: bool = False) -> Response:
+        """Respuesta para los headers de la petición: 304, gzip o sin comprimir"""
+        usar_gzip = self.comprimido is not None and "gzip" in headers.get("accept-encoding", "")
+        etag = f'"{self.huella}-gz"' if usar_gzip else f'"{self.huella}"'
+        cabeceras = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if _etag_coincide(headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=cabeceras)
+
+        cuerpo = self.comprimido if usar_gzip else self.contenido
+        if usar_gzip:
+            cabeceras["Content-Encoding"] = "gzip"
+        if head:
+            cabeceras["Content-Length"] = str(len(cuerpo))
+            cuerpo = b""
+        return Response(cuerpo, media_type=self.tipo, headers=cabeceras)
+
+
+def _tipo(ruta: Path) -> str:
+    tipo = mimetypes.guess_type(ruta.name)[0] or "application/octet-stream"
+    return f"{tipo}; charset=utf-8" if tipo.startswith("text/") or tipo == "application/javascript" else tipo
+
+
+class ArchivosEstaticos:
+    """Aplicación ASGI para montar en `prefijo` (reemplaza a StaticFiles)"""
+
+    def __init__(self, directorio: Path, prefijo: str = "/static"):
+        self.prefijo = prefijo
+        self.recursos = {}
+        self._con_huella = {}
+        for archivo in sorted(Path(directorio).rglob("*")):
+            if not archivo.is_file():
+                continue
+            ruta = archivo.relative_to(directorio).as_posix()
+            recurso = Recurso(archivo.read_bytes(), _tipo(archivo))
+            self.recursos[ruta] = recurso
+            self._con_huella[self._ruta_con_huella(ruta, recurso.huella)] = recurso
+
+    @staticmethod
+    def _ruta_con_huella(ruta: str, valor: str) -> str:
+        base, punto, extension = ruta.rpartition(".")
+        return f"{base}.{valor}.{extension}" if punto else f"{ruta}.{valor}"
+
+    def url(self, ruta: str) -> str:
+        """URL con huella de `ruta` (relativa al directorio estático)"""
+        recurso = self.recursos.get(ruta)
+        if recurso is None:
+            raise ValueError(f"Archivo estático inexistente: {ruta}")
+        return f"{self.prefijo}/{self._ruta_con_huella(ruta, recurso.huella)}"
+
+    def _buscar(self, ruta: str):
+        recurso = self._con_huella.get(ruta)
+        if recurso is not None:
+            return recurso, CACHE_INMUTABLE
+        recurso = self.recursos.get(ruta)
+        return recurso, CACHE_REVALIDAR
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        metodo = scope["method"]
+        if metodo not in ("GET", "HEAD"):
+            respuesta = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            # Dentro de un Mount, root_path termina en el prefijo y path es la ruta completa
+            ruta = scope["path"][len(scope.get("root_path", "")):].lstrip("/")
+            recurso, cache_control = self._buscar(ruta)
+            if recurso is None:
+                respuesta = PlainTextResponse("Not Found", status_code=404)
+            else:
+                respuesta = recurso.respuesta(Headers(scope=scope), cache_control, head=metodo == "HEAD")
+        await respuesta(scope, receive, send)
+
+
+def renderizar_index(templates, estaticos: ArchivosEstaticos, plantilla: str = "index.html") -> Recurso:
+    """Renderiza la página principal una sola vez: no depende de la petición"""
+    html = templates.get_template(plantilla).render(url_estatico=estaticos.url)
+    return Recurso(html.encode("utf-8"), "text/html; charset=utf-8")
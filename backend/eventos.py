@@ -0,0 +1,272 @@
+"""Feed de cambios para GET /eventos (Server-Sent Events).
+
+Las funciones CRUD publican cada cambio con `publicar(db, ...)`, que inserta
+una fila en `eventos` dentro de la misma transacción: si el cambio se
+revierte, el evento también, y todos los workers ven los eventos en orden de
+`id` sin comunicarse entre sí.
+
+Cada worker tiene un `CanalEventos` que, mientras haya clientes conectados,
+lee los eventos nuevos cada `EVENTOS_INTERVALO_S` segundos (0,5 por defecto)
+y los reparte. Un commit hecho en el propio worker lo despierta de
+inmediato; los de otros workers llegan en el siguiente sondeo.
+
+Los eventos llevan estado absoluto, no diferencias: el gasto como queda
+(`datos`) y el total del mes y categoría después del cambio (`resumen`).
+Aplicarlos dos veces da el mismo resultado, así que un cliente puede pedir
+desde un id anterior al de sus datos sin descuadrar nada.
+
+Se conservan `EVENTOS_RETENCION_S` segundos (una hora por defecto) para que
+un cliente que se reconecta con `Last-Event-ID` reciba lo que se perdió; si
+pide desde antes de eso recibe un evento `reiniciar` y debe recargar todo.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import orjson
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend import models
+from backend.database import engine
+
+INTERVALO_S = float(os.getenv("EVENTOS_INTERVALO_S", "0.5"))
+RETENCION_S = float(os.getenv("EVENTOS_RETENCION_S", "3600"))
+# uvicorn espera a que terminen las respuestas abiertas antes de apagarse: cada
+# conexión se cierra a los `EVENTOS_DURACION_S` segundos y el navegador se
+# reconecta solo, con Last-Event-ID
+DURACION_S = float(os.getenv("EVENTOS_DURACION_S", "25"))
+LATIDO_S = 15.0            # comentario SSE para que los proxies no corten la conexión
+RECONEXION_MS = 3000       # `retry:` que se indica al navegador
+MAX_PENDIENTES = 1000      # eventos sin enviar por cliente antes de pedirle que recargue
+ESPERA_HUECO_S = 10.0      # cuánto se espera un id salteado (transacción aún abierta)
+INTERVALO_PODA_S = 60.0
+
+# Operaciones
+CREAR = "crear"
+ACTUALIZAR = "actualizar"
+ELIMINAR = "eliminar"
+IMPORTAR = "importar"
+
+
+def publicar(
+    db: Session,
+    entidad: str,
+    operacion: str,
+    entidad_id: Optional[int] = None,
+    datos: Optional[dict] = None,
+    resumen: Optional[list] = None,
+):
+    """Agrega un evento a la transacción actual (sin commit).
+
+    `resumen`: filas {anio, mes, categoria_id, total, cantidad} de
+    `resumen_mensual` como quedan tras el cambio; de ahí salen los `periodos`
+    (mes, anio) afectados."""
+    resumen = resumen or []
+    periodos = sorted({(fila["anio"], fila["mes"]) for fila in resumen})
+    evento = {
+        "entidad": entidad,
+        "operacion": operacion,
+        "entidad_id": entidad_id,
+        "periodos": [{"mes": mes, "anio": anio} for anio, mes in periodos],
+        "datos": datos,
+        "resumen": resumen,
+    }
+    db.execute(insert(models.Evento), {"datos": orjson.dumps(evento).decode(), "created_at": datetime.utcnow()})
+    if not db.info.get("eventos_pendientes"):
+        db.info["eventos_pendientes"] = True
+        event.listen(db, "after_commit", _al_confirmar, once=True)
+
+
+def _al_confirmar(db: Session):
+    db.info.pop("eventos_pendientes", None)
+    canal_eventos.despertar()
+
+
+def ultimo_id(conn) -> int:
+    return conn.execute(select(func.max(models.Evento.id))).scalar() or 0
+
+
+def formato_sse(id: Optional[int], tipo: str, datos: str) -> str:
+    linea_id = f"id: {id}\n" if id is not None else ""
+    return f"{linea_id}event: {tipo}\ndata: {datos}\n\n"
+
+
+class Suscripcion:
+    def __init__(self):
+        self.cola: asyncio.Queue = asyncio.Queue(MAX_PENDIENTES)
+        self.desbordada = False
+
+    def entregar(self, evento: tuple):
+        if self.desbordada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se le pide que recargue en lugar de acumular
+            self.desbordada = True
+            self.cola.get_nowait()
+            self.cola.put_nowait(None)
+
+
+class CanalEventos:
+    """Reparte a los clientes SSE de este worker los eventos de la tabla `eventos`"""
+
+    def __init__(self, intervalo: float = INTERVALO_S, retencion: float = RETENCION_S, duracion: float = DURACION_S):
+        self.intervalo = intervalo
+        self.retencion = retencion
+        self.duracion = duracion
+        self._suscripciones: set = set()
+        self._tarea: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._despertador: Optional[asyncio.Event] = None
+        self._arranque = asyncio.Lock()
+        self.ultimo = 0
+        # Ids salteados por transacciones que confirmaron después de otras más
+        # nuevas (PostgreSQL): id -> instante hasta el que se siguen buscando
+        self._huecos: dict = {}
+        self.sondeos = 0
+        self.entregados = 0
+
+    def despertar(self):
+        """Adelanta el próximo sondeo (se puede llamar desde cualquier hilo)"""
+        loop, despertador = self._loop, self._despertador
+        if loop is None or despertador is None:
+            return
+        try:
+            loop.call_soon_threadsafe(despertador.set)
+        except RuntimeError:
+            # El loop ya se cerró
+            pass
+
+    async def suscribir(self, desde: Optional[int]) -> tuple:
+        """Registra un cliente. Devuelve (suscripción, eventos pendientes desde `desde`,
+        True si hay eventos que ya no se conservan y el cliente debe recargar)"""
+        suscripcion = Suscripcion()
+        async with self._arranque:
+            self._suscripciones.add(suscripcion)
+            if self._tarea is None:
+                # `ultimo` se fija antes de leer los pendientes: el sondeo entrega lo
+                # posterior a él y la lectura de abajo llega hasta ahora, así que los
+                # rangos se solapan (flujo() descarta los repetidos) y no queda hueco
+                self._loop = asyncio.get_running_loop()
+                self._despertador = asyncio.Event()
+                await run_in_threadpool(self._iniciar)
+                self._tarea = asyncio.create_task(self._sondear())
+        if desde is None:
+            return suscripcion, [], False
+        pendientes, perdidos = await run_in_threadpool(self._leer_desde, desde)
+        return suscripcion, pendientes, perdidos
+
+    def cancelar(self, suscripcion: Suscripcion):
+        self._suscripciones.discard(suscripcion)
+
+    def _leer_desde(self, desde: int) -> tuple:
+        with engine.connect() as conn:
+            primero, ultimo = conn.execute(select(func.min(models.Evento.id), func.max(models.Evento.id))).one()
+            filas = conn.execute(
+                select(models.Evento.id, models.Evento.datos)
+                .where(models.Evento.id > desde).order_by(models.Evento.id)
+            ).all()
+        # Se podaron eventos posteriores a `desde`, o `desde` es de otra base
+        if primero is None:
+            perdidos = desde > 0
+        else:
+            perdidos = desde < primero - 1 or desde > ultimo
+        return [tuple(fila) for fila in filas], perdidos
+
+    def _leer_nuevos(self) -> list:
+        ahora = time.monotonic()
+        self._huecos = {id: limite for id, limite in self._huecos.items() if limite > ahora}
+        condicion = models.Evento.id > self.ultimo
+        if self._huecos:
+            condicion = or_(condicion, models.Evento.id.in_(list(self._huecos)))
+        with engine.connect() as conn:
+            filas = conn.execute(
+                select(models.Evento.id, models.Evento.datos).where(condicion).order_by(models.Evento.id)
+            ).all()
+        for id, _ in filas:
+            self._huecos.pop(id, None)
+            if id > self.ultimo + 1:
+                faltantes = range(max(self.ultimo + 1, id - MAX_PENDIENTES), id)
+                self._huecos.update({faltante: ahora + ESPERA_HUECO_S for faltante in faltantes})
+            self.ultimo = max(self.ultimo, id)
+        return [tuple(fila) for fila in filas]
+
+    def _iniciar(self):
+        with engine.connect() as conn:
+            self.ultimo = ultimo_id(conn)
+        self._huecos = {}
+
+    def podar(self):
+        """Borra los eventos más viejos que la retención, salvo el último (marca
+        hasta dónde llegan los ids aunque no haya cambios recientes)"""
+        limite = datetime.utcnow() - timedelta(seconds=self.retencion)
+        with engine.begin() as conn:
+            conn.execute(delete(models.Evento).where(
+                models.Evento.created_at < limite,
+                models.Evento.id < select(func.max(models.Evento.id)).scalar_subquery(),
+            ))
+
+    async def _sondear(self):
+        try:
+            ultima_poda = 0.0
+            while self._suscripciones:
+                try:
+                    await asyncio.wait_for(self._despertador.wait(), self.intervalo)
+                except asyncio.TimeoutError:
+                    pass
+                self._despertador.clear()
+                eventos = await run_in_threadpool(self._leer_nuevos)
+                self.sondeos += 1
+                for suscripcion in list(self._suscripciones):
+                    for evento in eventos:
+                        suscripcion.entregar(evento)
+                self.entregados += len(eventos) * len(self._suscripciones)
+                if time.monotonic() - ultima_poda > INTERVALO_PODA_S:
+                    await run_in_threadpool(self.podar)
+                    ultima_poda = time.monotonic()
+        finally:
+            self._tarea = None
+            self._despertador = None
+
+    async def flujo(self, desde: Optional[int]):
+        """Cuerpo de la respuesta SSE: pendientes desde `desde` y después los nuevos"""
+        suscripcion, pendientes, perdidos = await self.suscribir(desde)
+        fin = time.monotonic() + self.duracion
+        try:
+            yield f"retry: {RECONEXION_MS}\n\n"
+            if perdidos:
+                yield formato_sse(None, "reiniciar", "{}")
+            enviados = set()
+            for id, datos in pendientes:
+                enviados.add(id)
+                yield formato_sse(id, "cambio", datos)
+            while (restante := fin - time.monotonic()) > 0:
+                try:
+                    evento = await asyncio.wait_for(suscripcion.cola.get(), min(LATIDO_S, restante))
+                except asyncio.TimeoutError:
+                    yield ": latido\n\n"
+                    continue
+                if evento is None:
+                    yield formato_sse(None, "reiniciar", "{}")
+                    return
+                id, datos = evento
+                if id not in enviados:
+                    yield formato_sse(id, "cambio", datos)
+        finally:
+            self.cancelar(suscripcion)
+
+    def estadisticas(self) -> dict:
+        return {
+            "clientes": len(self._suscripciones),
+            "ultimo_id": self.ultimo,
+            "sondeos": self.sondeos,
+            "entregados": self.entregados,
+        }
+
+
+canal_eventos = CanalEventos()
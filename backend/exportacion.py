@@ -0,0 +1,91 @@
+"""Exportación de gastos en streaming (CSV o NDJSON).
+
+Las filas salen de un `select` de Core con `yield_per`, con los nombres de
+categoría y subcategoría resueltos en SQL. Se generan por bloques, de modo
+que la memoria usada no depende de cuántos gastos se exporten y el primer
+bloque se envía en cuanto la consulta devuelve filas.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from backend import models
+from backend.database import SessionLocal
+
+FILAS_POR_BLOQUE = 1000
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNAS = (
+    "id", "fecha", "monto", "descripcion", "categoria_id", "categoria",
+    "subcategoria_id", "subcategoria", "medio_pago_id", "banco_id", "created_at",
+)
+
+
+def consulta_exportacion(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    categoria_id: Optional[int] = None
+):
+    """SELECT de gastos con nombres de categoría/subcategoría, ordenado por (fecha, id)"""
+    gasto = models.Gasto
+    consulta = select(
+        gasto.id, gasto.fecha, gasto.monto, gasto.descripcion,
+        gasto.categoria_id, models.Categoria.nombre.label("categoria"),
+        gasto.subcategoria_id, models.Subcategoria.nombre.label("subcategoria"),
+        gasto.medio_pago_id, gasto.banco_id, gasto.created_at,
+    ).join(
+        models.Categoria, models.Categoria.id == gasto.categoria_id
+    ).outerjoin(
+        models.Subcategoria, models.Subcategoria.id == gasto.subcategoria_id
+    )
+    if desde:
+        consulta = consulta.where(gasto.fecha >= desde)
+    if hasta:
+        consulta = consulta.where(gasto.fecha <= hasta)
+    if categoria_id:
+        consulta = consulta.where(gasto.categoria_id == categoria_id)
+    return consulta.order_by(gasto.fecha, gasto.id)
+
+
+def _bloques_csv(particiones) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS)
+    for filas in particiones:
+        escritor.writerows(filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _bloques_ndjson(particiones) -> Iterator[str]:
+    for filas in particiones:
+        yield "".join(
+            json.dumps(dict(zip(COLUMNAS, fila)), default=str, ensure_ascii=False) + "\n"
+            for fila in filas
+        )
+
+
+def exportar_gastos(formato: str, **filtros) -> Iterator[bytes]:
+    """Genera el archivo por bloques. Abre su propia sesión porque el
+    streaming continúa después de que termina el endpoint."""
+    db = SessionLocal()
+    try:
+        resultado = db.execute(
+            consulta_exportacion(**filtros).execution_options(yield_per=FILAS_POR_BLOQUE)
+        )
+        particiones = resultado.partitions()
+        bloques = _bloques_csv(particiones) if formato == "csv" else _bloques_ndjson(particiones)
+        for bloque in bloques:
+            yield bloque.encode("utf-8")
+    finally:
+        db.close()
@@ -0,0 +1,193 @@
+"""Importación masiva de gastos desde CSV o NDJSON.
+
+Las filas se leen en streaming, se validan con `schemas.GastoCreate` y
+contra conjuntos de ids precargados (sin una consulta por fila), y se
+insertan en lotes dentro de una única transacción, con sentencias INSERT de
+`FILAS_POR_SENTENCIA` filas cada una. El índice de búsqueda, la tabla
+agregada y el evento se actualizan una sola vez al final.
+Las filas inválidas no detienen la importación: se reportan con su número
+de línea.
+"""
+import csv
+import json
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from itertools import chain
+from typing import IO, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import busqueda, crud, eventos, models, schemas, sincronizacion
+from backend.cache import cache_resultados, DOMINIO_GASTOS
+
+TAMANO_LOTE = 5000
+FILAS_POR_SENTENCIA = 1000
+COLUMNAS = (
+    "fecha", "monto", "descripcion", "categoria_id", "subcategoria_id",
+    "medio_pago_id", "banco_id", "created_at", "version", "updated_at",
+)
+MAX_ERRORES_REPORTADOS = 1000
+FORMATOS = ("csv", "ndjson")
+
+
+def leer_csv(archivo: IO[str]) -> Iterator[tuple[int, dict]]:
+    """Genera (número de línea, fila). La primera línea es el encabezado."""
+    lector = csv.reader(archivo)
+    encabezado = [campo.strip() for campo in next(lector, [])]
+    for valores in lector:
+        if not valores:
+            continue
+        # Celdas vacías equivalen a null (los opcionales quedan en None)
+        yield lector.line_num, {
+            campo: (valor if valor != "" else None)
+            for campo, valor in zip(encabezado, valores)
+        }
+
+
+def leer_ndjson(archivo: IO[str]) -> Iterator[tuple[int, dict]]:
+    """Genera (número de línea, objeto) por cada línea JSON no vacía"""
+    for numero, linea in enumerate(archivo, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            fila = json.loads(linea)
+        except json.JSONDecodeError as e:
+            fila = ValueError(f"JSON inválido: {e.msg}")
+        yield numero, fila
+
+
+def _ids(db: Session, columna) -> set:
+    return set(db.execute(select(columna)).scalars())
+
+
+def _procesador(columna, dialecto):
+    """Conversión de Python al valor del driver que haría SQLAlchemy para la columna
+    (p. ej. date -> texto ISO en SQLite), o None si el driver recibe el valor tal cual"""
+    return columna.type.dialect_impl(dialecto).bind_processor(dialecto)
+
+
+def _filas_por_sentencia(conexion) -> int:
+    if conexion.dialect.name == "sqlite":
+        # SQLite limita los parámetros por sentencia (999 antes de 3.32, 32766 desde entonces)
+        limite = conexion.connection.driver_connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        return max(1, min(FILAS_POR_SENTENCIA, limite // len(COLUMNAS)))
+    return FILAS_POR_SENTENCIA
+
+
+def importar_gastos(db: Session, filas: Iterator[tuple[int, dict]]) -> dict:
+    """Valida e inserta las filas en una sola transacción"""
+    categorias = _ids(db, models.Categoria.id)
+    subcategorias = _ids(db, models.Subcategoria.id)
+    medios_pago = _ids(db, models.MedioPago.id)
+    bancos = _ids(db, models.Banco.id)
+
+    # Sentencias del driver con VALUES de varias filas y parámetros posicionales:
+    # SQLAlchemy no procesa cada parámetro de cada fila. Las conversiones que sí
+    # hacen falta (fechas) se aplican al armar la fila.
+    conexion = db.connection()
+    tabla = models.Gasto.__table__
+    marca = "?" if conexion.dialect.paramstyle == "qmark" else "%s"
+    por_sentencia = _filas_por_sentencia(conexion)
+    valores_fila = "(" + ", ".join([marca] * len(COLUMNAS)) + ")"
+
+    def sentencia(cantidad: int) -> str:
+        return f"INSERT INTO {tabla.name} ({', '.join(COLUMNAS)}) VALUES " + ", ".join([valores_fila] * cantidad)
+
+    sentencia_completa = sentencia(por_sentencia)
+    # Una importación repite pocas fechas: cada una se convierte una sola vez
+    fecha_db = lru_cache(maxsize=None)(_procesador(tabla.c.fecha, conexion.dialect) or (lambda fecha: fecha))
+    created_at = datetime.utcnow()
+    created_at_db = (_procesador(tabla.c.created_at, conexion.dialect) or (lambda momento: momento))(created_at)
+    version = None  # se toma con la primera fila válida
+
+    insertados = 0
+    con_error = 0
+    errores = []
+    lote = []
+    # Totales por (anio, mes, categoria_id) para la tabla agregada
+    resumen = {}
+    # Índice de búsqueda: se llena al final con una sola sentencia
+    suspendido = False
+    ultimo_id = None
+
+    def registrar_error(linea: int, mensaje: str):
+        nonlocal con_error
+        con_error += 1
+        if len(errores) < MAX_ERRORES_REPORTADOS:
+            errores.append({"linea": linea, "error": mensaje})
+
+    def insertar(lote: list):
+        nonlocal insertados, ultimo_id, suspendido
+        if not suspendido:
+            # La versión ya se tomó: la transacción tiene el bloqueo de escritura
+            ultimo_id = busqueda.suspender_indexado(conexion)
+            suspendido = True
+        for inicio in range(0, len(lote), por_sentencia):
+            filas_sentencia = lote[inicio:inicio + por_sentencia]
+            sql = sentencia_completa if len(filas_sentencia) == por_sentencia else sentencia(len(filas_sentencia))
+            conexion.exec_driver_sql(sql, tuple(chain.from_iterable(filas_sentencia)))
+        insertados += len(lote)
+
+    try:
+        for linea, fila in filas:
+            if isinstance(fila, Exception):
+                registrar_error(linea, str(fila))
+                continue
+            if not isinstance(fila, dict):
+                registrar_error(linea, "Se esperaba un objeto")
+                continue
+            try:
+                gasto = schemas.GastoCreate.model_validate(fila)
+            except ValidationError as e:
+                detalle = e.errors()[0]
+                campo = ".".join(str(p) for p in detalle["loc"])
+                registrar_error(linea, f"{campo}: {detalle['msg']}")
+                continue
+
+            if gasto.categoria_id not in categorias:
+                registrar_error(linea, "Categoría no encontrada")
+                continue
+            if gasto.subcategoria_id is not None and gasto.subcategoria_id not in subcategorias:
+                registrar_error(linea, "Subcategoría no encontrada")
+                continue
+            if gasto.medio_pago_id is not None and gasto.medio_pago_id not in medios_pago:
+                registrar_error(linea, "Medio de pago no encontrado")
+                continue
+            if gasto.banco_id is not None and gasto.banco_id not in bancos:
+                registrar_error(linea, "Banco no encontrado")
+                continue
+
+            if version is None:
+                version = sincronizacion.siguiente_version(db)
+            # En el orden de COLUMNAS
+            lote.append((
+                fecha_db(gasto.fecha), gasto.monto, gasto.descripcion, gasto.categoria_id, gasto.subcategoria_id,
+                gasto.medio_pago_id, gasto.banco_id, created_at_db, version, created_at_db,
+            ))
+
+            clave = (gasto.fecha.year, gasto.fecha.month, gasto.categoria_id)
+            total, cantidad = resumen.get(clave, (0.0, 0))
+            resumen[clave] = (total + gasto.monto, cantidad + 1)
+            if len(lote) >= TAMANO_LOTE:
+                insertar(lote)
+                lote = []
+
+        if lote:
+            insertar(lote)
+        if ultimo_id is not None:
+            busqueda.indexar_desde(conexion, ultimo_id)
+        filas_resumen = crud.ajustar_resumen_mensual(db, resumen)
+        if insertados:
+            # Un solo evento para toda la importación: los clientes recargan los meses afectados
+            eventos.publicar(db, "gasto", eventos.IMPORTAR, resumen=filas_resumen)
+            cache_resultados.invalidar(db, DOMINIO_GASTOS)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {"insertados": insertados, "con_error": con_error, "errores": errores}
@@ -0,0 +1,207 @@
+"""Libro mayor de cuentas bancarias y consultas de saldo histórico.
+
+Los saldos actuales siguen en `CuentaBancaria`; aquí se registra cada
+movimiento con su fecha para poder responder "¿cuál era el saldo el día X?".
+Cada `MOVIMIENTOS_POR_SNAPSHOT` movimientos de una cuenta se guarda un
+snapshot del saldo acumulado, de modo que una consulta lee el snapshot más
+cercano (búsqueda en índice) y suma solo los movimientos posteriores.
+Cada escritura cuenta los movimientos de la cuenta posteriores al último
+snapshot, con LIMIT `MOVIMIENTOS_POR_SNAPSHOT` sobre el índice (cuenta_id, id):
+la revisión lee a lo sumo esa cantidad de entradas.
+
+Ninguna función hace commit: se ejecutan en la transacción del cambio que
+origina el movimiento.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import insert_dialecto
+
+MOVIMIENTOS_POR_SNAPSHOT = 100
+
+# Sentencias Core sobre las tablas: se ejecutan en cada escritura de saldo y
+# el camino ORM (identidad, eventos) solo agrega costo
+Movimiento = models.MovimientoCuenta.__table__
+Snapshot = models.SaldoSnapshot.__table__
+
+
+def _sumas(condicion):
+    return select(
+        func.coalesce(func.sum(Movimiento.c.delta_total), 0.0),
+        func.coalesce(func.sum(Movimiento.c.delta_transaccional), 0.0),
+        func.coalesce(func.sum(Movimiento.c.delta_ahorro), 0.0),
+    ).where(condicion)
+
+
+def registrar_movimiento(
+    db: Session,
+    cuenta_id: int,
+    fecha: date,
+    origen: str,
+    origen_id: Optional[int] = None,
+    transaccional: float = 0.0,
+    ahorro: float = 0.0,
+    total: Optional[float] = None
+):
+    """Agrega un movimiento. Si no se indica, el delta de saldo_total es transaccional + ahorro"""
+    if total is None:
+        total = transaccional + ahorro
+    movimiento_id = db.execute(
+        insert(Movimiento).values(
+            cuenta_id=cuenta_id, fecha=fecha, origen=origen, origen_id=origen_id,
+            delta_total=total, delta_transaccional=transaccional, delta_ahorro=ahorro,
+        ).returning(Movimiento.c.id)
+    ).scalar_one()
+
+    # Un movimiento con fecha pasada afecta a los snapshots de esa fecha en adelante
+    db.execute(
+        update(Snapshot)
+        .where(Snapshot.c.cuenta_id == cuenta_id, Snapshot.c.fecha >= fecha)
+        .values(
+            saldo_total=Snapshot.c.saldo_total + total,
+            saldo_transaccional=Snapshot.c.saldo_transaccional + transaccional,
+            saldo_ahorro=Snapshot.c.saldo_ahorro + ahorro,
+        )
+    )
+
+    _tomar_snapshot_si_corresponde(db, cuenta_id, movimiento_id)
+    return movimiento_id
+
+
+def _ultimo_snapshot(cuenta_id: int, hasta: Optional[date] = None):
+    condicion = Snapshot.c.cuenta_id == cuenta_id
+    if hasta:
+        condicion = condicion & (Snapshot.c.fecha <= hasta)
+    return select(Snapshot).where(condicion).order_by(Snapshot.c.fecha.desc()).limit(1)
+
+
+def _tomar_snapshot_si_corresponde(db: Session, cuenta_id: int, movimiento_id: int):
+    # Movimientos registrados después del snapshot más reciente, por índice (cuenta_id, id)
+    desde_id = func.coalesce(
+        select(func.max(Snapshot.c.ultimo_movimiento_id)).where(Snapshot.c.cuenta_id == cuenta_id).scalar_subquery(), 0
+    )
+    condicion_pendientes = (Movimiento.c.cuenta_id == cuenta_id) & (Movimiento.c.id > desde_id)
+    pendientes = select(Movimiento.c.id).where(condicion_pendientes).limit(MOVIMIENTOS_POR_SNAPSHOT).subquery()
+    if db.execute(select(func.count()).select_from(pendientes)).scalar_one() < MOVIMIENTOS_POR_SNAPSHOT:
+        return
+    fecha = db.execute(select(func.max(Movimiento.c.fecha)).where(condicion_pendientes)).scalar_one()
+
+    # El snapshot nuevo va en la fecha más reciente de los pendientes, sobre el anterior a ella
+    anterior = db.execute(_ultimo_snapshot(cuenta_id, hasta=fecha)).first()
+    if anterior and anterior.fecha == fecha:
+        # Ya existe y registrar_movimiento lo mantiene al día: solo se adelanta su marca
+        db.execute(update(Snapshot).where(Snapshot.c.id == anterior.id).values(ultimo_movimiento_id=movimiento_id))
+        return
+
+    base = (anterior.saldo_total, anterior.saldo_transaccional, anterior.saldo_ahorro) if anterior else (0.0, 0.0, 0.0)
+    condicion = (Movimiento.c.cuenta_id == cuenta_id) & (Movimiento.c.fecha <= fecha)
+    if anterior:
+        condicion = condicion & (Movimiento.c.fecha > anterior.fecha)
+    sumas = db.execute(_sumas(condicion)).one()
+
+    # Dos escritores concurrentes pueden intentar el mismo snapshot: gana el primero
+    db.execute(
+        insert_dialecto(db)(Snapshot).values(
+            cuenta_id=cuenta_id, fecha=fecha, ultimo_movimiento_id=movimiento_id,
+            saldo_total=base[0] + sumas[0],
+            saldo_transaccional=base[1] + sumas[1],
+            saldo_ahorro=base[2] + sumas[2],
+        ).on_conflict_do_nothing(index_elements=[Snapshot.c.cuenta_id, Snapshot.c.fecha])
+    )
+
+
+def saldo_en_fecha(db: Session, cuenta_id: int, fecha: date) -> dict:
+    """Saldo de la cuenta al cierre de `fecha`: snapshot más cercano + movimientos posteriores"""
+    snapshot = db.execute(_ultimo_snapshot(cuenta_id, hasta=fecha)).first()
+    condicion = (Movimiento.c.cuenta_id == cuenta_id) & (Movimiento.c.fecha <= fecha)
+    base = (0.0, 0.0, 0.0)
+    if snapshot:
+        condicion = condicion & (Movimiento.c.fecha > snapshot.fecha)
+        base = (snapshot.saldo_total, snapshot.saldo_transaccional, snapshot.saldo_ahorro)
+    total, transaccional, ahorro = db.execute(_sumas(condicion)).one()
+    return {
+        "cuenta_id": cuenta_id,
+        "fecha": fecha,
+        "saldo_total": base[0] + total,
+        "saldo_transaccional": base[1] + transaccional,
+        "saldo_ahorro": base[2] + ahorro,
+    }
+
+
+def eliminar_cuenta(db: Session, cuenta_id: int):
+    db.execute(delete(Snapshot).where(Snapshot.c.cuenta_id == cuenta_id))
+    db.execute(delete(Movimiento).where(Movimiento.c.cuenta_id == cuenta_id))
+
+
+def reconstruir_libro(db: Session):
+    """Regenera el libro desde ingresos y transferencias existentes.
+
+    La diferencia entre el saldo actual de cada cuenta y sus movimientos se
+    registra como "apertura" en la fecha del primer movimiento (o hoy)."""
+    db.execute(delete(Snapshot))
+    db.execute(delete(Movimiento))
+
+    filas = []
+    for ingreso in db.execute(select(models.Ingreso).order_by(models.Ingreso.fecha, models.Ingreso.id)).scalars():
+        ahorro = ingreso.tipo == "ahorro"
+        filas.append(dict(
+            cuenta_id=ingreso.cuenta_bancaria_id, fecha=ingreso.fecha, origen="ingreso", origen_id=ingreso.id,
+            delta_total=ingreso.monto,
+            delta_transaccional=0.0 if ahorro else ingreso.monto,
+            delta_ahorro=ingreso.monto if ahorro else 0.0,
+        ))
+    for t in db.execute(select(models.Transferencia).order_by(models.Transferencia.fecha, models.Transferencia.id)).scalars():
+        for cuenta_id, delta in ((t.cuenta_origen_id, -t.monto), (t.cuenta_destino_id, t.monto)):
+            filas.append(dict(
+                cuenta_id=cuenta_id, fecha=t.fecha, origen="transferencia", origen_id=t.id,
+                delta_total=delta, delta_transaccional=delta, delta_ahorro=0.0,
+            ))
+    if filas:
+        db.execute(insert(Movimiento), filas)
+
+    for cuenta in db.execute(select(models.CuentaBancaria)).scalars():
+        de_la_cuenta = Movimiento.c.cuenta_id == cuenta.id
+        total, transaccional, ahorro = db.execute(_sumas(de_la_cuenta)).one()
+        primera = db.execute(select(func.min(Movimiento.c.fecha)).where(de_la_cuenta)).scalar() or date.today()
+        db.execute(insert(Movimiento).values(
+            cuenta_id=cuenta.id, fecha=primera, origen="apertura",
+            delta_total=(cuenta.saldo_total or 0.0) - total,
+            delta_transaccional=(cuenta.saldo_transaccional or 0.0) - transaccional,
+            delta_ahorro=(cuenta.saldo_ahorro or 0.0) - ahorro,
+        ))
+        _snapshots_de_historia(db, cuenta.id)
+
+
+def _snapshots_de_historia(db: Session, cuenta_id: int):
+    """Recorre los movimientos por fecha y guarda un snapshot cada ~MOVIMIENTOS_POR_SNAPSHOT.
+
+    Un snapshot cierra un día completo, así que solo se corta en cambios de fecha."""
+    ultimo_id = db.execute(select(func.max(Movimiento.c.id)).where(Movimiento.c.cuenta_id == cuenta_id)).scalar()
+    filas = db.execute(
+        select(Movimiento.c.fecha, Movimiento.c.delta_total, Movimiento.c.delta_transaccional, Movimiento.c.delta_ahorro)
+        .where(Movimiento.c.cuenta_id == cuenta_id)
+        .order_by(Movimiento.c.fecha)
+    )
+    snapshots = []
+    saldo = [0.0, 0.0, 0.0]
+    fecha_actual, desde_snapshot = None, 0
+    for fecha, *deltas in filas:
+        if fecha != fecha_actual and desde_snapshot >= MOVIMIENTOS_POR_SNAPSHOT:
+            snapshots.append((fecha_actual, *saldo))
+            desde_snapshot = 0
+        saldo = [s + d for s, d in zip(saldo, deltas)]
+        fecha_actual = fecha
+        desde_snapshot += 1
+    if fecha_actual is not None:
+        snapshots.append((fecha_actual, *saldo))
+
+    if snapshots:
+        db.execute(insert(Snapshot), [
+            dict(cuenta_id=cuenta_id, fecha=f, ultimo_movimiento_id=ultimo_id,
+                 saldo_total=t, saldo_transaccional=tr, saldo_ahorro=a)
+            for f, t, tr, a in snapshots
+        ])
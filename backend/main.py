@@ -1,27 +1,51 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi import FastAPI, Body, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date
 from pathlib import Path
+import csv
+import io
+import os
+import tempfile
 
-from backend import models, schemas, crud
-from backend.database import engine, get_db
-from backend.endpoints_financiero import router as financiero_router
+from starlette.concurrency import run_in_threadpool
 
-# Crear tablas
-models.Base.metadata.create_all(bind=engine)
+from backend import (
+    schemas, crud, crud_financiero, analitica, eventos, exportacion, importacion, sincronizacion, tendencias
+)
+from backend.cache import cache_resultados, DOMINIO_GASTOS
+from backend.consultas_lentas import consultas_lentas
+from backend.database import async_engine, engine, get_db, USAR_ASYNC
+from backend.datos_iniciales import sembrar_datos_iniciales
+from backend.endpoints_financiero import router as financiero_router
+from backend.estaticos import ArchivosEstaticos, CACHE_REVALIDAR, renderizar_index
+from backend.eventos import canal_eventos
+from backend.metricas import MiddlewareMetricas, TIPO_CONTENIDO, registro_metricas
+from backend.migrations import aplicar_migraciones
+from backend.paginacion import CABECERA_CURSOR, siguiente_cursor
+from backend.referencias import cache_referencias
+from backend.respuestas import RespuestaJSON, respuesta_lista, serializar_lista
+
+# Las migraciones corren al arrancar (startup), no al importar el módulo. Con
+# DB_MIGRAR_AL_ARRANCAR=0 se omiten: el esquema se aplica antes en un paso aparte
+MIGRAR_AL_ARRANCAR = os.getenv("DB_MIGRAR_AL_ARRANCAR", "1") != "0"
 
 app = FastAPI(
     title="Expense Tracker API",
     description="API para control de gastos domésticos",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=RespuestaJSON
 )
 
 # Incluir routers
+if USAR_ASYNC:
+    # Debe ir primero: sus rutas reemplazan a las lecturas síncronas equivalentes
+    from backend.endpoints_async import router as async_router
+    app.include_router(async_router, tags=["Lecturas (async)"])
 app.include_router(financiero_router, tags=["Financiero"])
 
 # Configurar CORS
@@ -31,52 +55,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CABECERA_CURSOR],
+)
+
+# Compresión de respuestas grandes (listados, exportaciones); se omite en cuerpos
+# chicos, donde no ahorra bytes y sí CPU
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_BYTES", "1000")),
+    compresslevel=int(os.getenv("GZIP_NIVEL", "5")),
 )
 
+# Métricas por ruta y de SQL (GET /metrics). Se agrega al final para quedar
+# como el middleware más externo y medir también a los demás
+registro_metricas.instrumentar_engine(engine)
+if async_engine is not None:
+    registro_metricas.instrumentar_engine(async_engine.sync_engine)
+app.add_middleware(MiddlewareMetricas)
+
+# Consultas SQL lentas: log rotativo (se configura al arrancar) + GET /debug/slow-queries
+consultas_lentas.instrumentar_engine(engine)
+if async_engine is not None:
+    consultas_lentas.instrumentar_engine(async_engine.sync_engine)
+
 # Configurar archivos estáticos y templates
 BASE_DIR = Path(__file__).resolve().parent.parent
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "frontend" / "static")), name="static")
+# Archivos con huella de contenido y cache inmutable; la página principal se
+# renderiza una sola vez con esas URLs y se sirve desde memoria
+estaticos = ArchivosEstaticos(BASE_DIR / "frontend" / "static", prefijo="/static")
+app.mount("/static", estaticos, name="static")
 templates = Jinja2Templates(directory=str(BASE_DIR / "frontend" / "templates"))
+pagina_principal = renderizar_index(templates, estaticos)
 
 
-# Inicializar categorías y bancos predefinidos
+# Abrir el log de consultas lentas, crear tablas e índices faltantes e inicializar categorías y bancos predefinidos
 @app.on_event("startup")
 def startup_event():
-    from backend import crud_financiero
-
-    db = next(get_db())
-
-    # Inicializar categorías
-    categorias_iniciales = [
-        {"nombre": "Alimentación", "color": "#10B981", "presupuesto_mensual": 0.0, "icono": "🍔"},
-        {"nombre": "Servicios", "color": "#3B82F6", "presupuesto_mensual": 0.0, "icono": "💡"},
-        {"nombre": "Transporte", "color": "#F59E0B", "presupuesto_mensual": 0.0, "icono": "🚗"},
-        {"nombre": "Salud", "color": "#EF4444", "presupuesto_mensual": 0.0, "icono": "❤️"},
-        {"nombre": "Educación", "color": "#8B5CF6", "presupuesto_mensual": 0.0, "icono": "📚"},
-        {"nombre": "Entretenimiento", "color": "#EC4899", "presupuesto_mensual": 0.0, "icono": "🎬"},
-        {"nombre": "Hogar", "color": "#06B6D4", "presupuesto_mensual": 0.0, "icono": "🏠"},
-        {"nombre": "Impuestos", "color": "#64748B", "presupuesto_mensual": 0.0, "icono": "📄"},
-        {"nombre": "Otros", "color": "#9CA3AF", "presupuesto_mensual": 0.0, "icono": "💰"},
-    ]
-
-    for cat_data in categorias_iniciales:
-        if not crud.get_categoria_by_nombre(db, cat_data["nombre"]):
-            crud.create_categoria(db, schemas.CategoriaCreate(**cat_data))
-
-    # Inicializar bancos
-    bancos_iniciales = ["Bancolombia", "Nequi", "Banco Falabella", "Davivienda", "BBVA"]
-
-    for banco_nombre in bancos_iniciales:
-        bancos_existentes = crud_financiero.get_bancos(db)
-        if not any(b.nombre == banco_nombre for b in bancos_existentes):
-            crud_financiero.create_banco(db, schemas.BancoCreate(nombre=banco_nombre))
+    consultas_lentas.configurar_log()
+    if MIGRAR_AL_ARRANCAR:
+        aplicar_migraciones(engine)
+    sembrar_datos_iniciales(engine)
 
 
 # Endpoints raíz
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Servir la aplicación web"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return pagina_principal.respuesta(request.headers, CACHE_REVALIDAR)
 
 
 @app.get("/api")
@@ -89,7 +114,12 @@ def api_root():
             "categorias": "/categorias",
             "subcategorias": "/subcategorias",
             "gastos": "/gastos",
-            "resumen": "/resumen"
+            "resumen": "/resumen",
+            "tendencias": "/tendencias",
+            "dashboard": "/dashboard",
+            "analytics": "/analytics/aggregate",
+            "eventos": "/eventos",
+            "sync": "/sync"
         }
     }
 
@@ -97,7 +127,7 @@ def api_root():
 # ========== ENDPOINTS CATEGORÍAS ==========
 @app.get("/categorias", response_model=list[schemas.CategoriaConSubcategorias])
 def listar_categorias(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_categorias(db, skip=skip, limit=limit)
+    return RespuestaJSON(cache_referencias.obtener(db).categorias[skip:skip + limit])
 
 
 @app.get("/categorias/{categoria_id}", response_model=schemas.CategoriaConSubcategorias)
@@ -116,6 +146,22 @@ def crear_categoria(categoria: schemas.CategoriaCreate, db: Session = Depends(ge
     return crud.create_categoria(db, categoria)
 
 
+@app.put("/categorias/presupuestos", response_model=list[schemas.CategoriaConSubcategorias])
+def actualizar_presupuestos(
+    presupuestos: dict[int, float] = Body(..., examples=[{"1": 500000, "2": 120000}]),
+    db: Session = Depends(get_db)
+):
+    """Actualiza el presupuesto mensual de varias categorías en una sola transacción.
+    Recibe {categoria_id: presupuesto_mensual} y devuelve la lista de categorías."""
+    faltantes = crud.get_categorias_faltantes(db, presupuestos.keys())
+    if faltantes:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Categorías no encontradas: {', '.join(str(id) for id in sorted(faltantes))}"
+        )
+    return crud.update_presupuestos(db, presupuestos)
+
+
 @app.put("/categorias/{categoria_id}", response_model=schemas.Categoria)
 def actualizar_categoria(
     categoria_id: int,
@@ -142,7 +188,10 @@ def listar_subcategorias(
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    return crud.get_subcategorias(db, categoria_id=categoria_id, skip=skip, limit=limit)
+    subcategorias = cache_referencias.obtener(db).subcategorias
+    if categoria_id:
+        subcategorias = [s for s in subcategorias if s["categoria_id"] == categoria_id]
+    return RespuestaJSON(subcategorias[skip:skip + limit])
 
 
 @app.get("/subcategorias/{subcategoria_id}", response_model=schemas.Subcategoria)
@@ -156,7 +205,7 @@ def obtener_subcategoria(subcategoria_id: int, db: Session = Depends(get_db)):
 @app.post("/subcategorias", response_model=schemas.Subcategoria, status_code=201)
 def crear_subcategoria(subcategoria: schemas.SubcategoriaCreate, db: Session = Depends(get_db)):
     # Verificar que la categoría existe
-    if not crud.get_categoria(db, subcategoria.categoria_id):
+    if not cache_referencias.existe(db, "categorias", subcategoria.categoria_id):
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     return crud.create_subcategoria(db, subcategoria)
 
@@ -186,10 +235,91 @@ def listar_gastos(
     mes: Optional[int] = Query(None, ge=1, le=12),
     anio: Optional[int] = Query(None, ge=2000),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista gastos del más reciente al más antiguo.
+    Si hay más resultados, la cabecera X-Next-Cursor trae el cursor de la página siguiente."""
+    try:
+        gastos = crud.get_gastos(
+            db, categoria_id=categoria_id, mes=mes, anio=anio, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(gastos, schemas.GastoDetallado, siguiente_cursor(gastos, limit))
+
+
+@app.post("/gastos/import", response_model=schemas.ResultadoImportacion)
+async def importar_gastos(
+    request: Request,
+    formato: Optional[str] = Query(None, description="csv o ndjson; por defecto según Content-Type"),
     db: Session = Depends(get_db)
 ):
-    return crud.get_gastos(db, categoria_id=categoria_id, mes=mes, anio=anio, skip=skip, limit=limit)
+    """Importa gastos masivamente desde el cuerpo de la petición (CSV con encabezado o NDJSON).
+
+    Las filas válidas se insertan en una sola transacción; las inválidas se reportan por línea."""
+    if formato is None:
+        content_type = request.headers.get("content-type", "")
+        formato = "ndjson" if "ndjson" in content_type or "json" in content_type else "csv"
+    if formato not in importacion.FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato no soportado. Use csv o ndjson")
+
+    # El cuerpo se copia por bloques a un archivo temporal: en memoria si es pequeño,
+    # en disco si es grande, sin cargar nunca la carga completa en RAM
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as archivo:
+        async for bloque in request.stream():
+            archivo.write(bloque)
+        archivo.seek(0)
+
+        texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+        try:
+            lector = importacion.leer_csv if formato == "csv" else importacion.leer_ndjson
+            return await run_in_threadpool(importacion.importar_gastos, db, lector(texto))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Archivo inválido: {e}")
+        finally:
+            texto.detach()
+
+
+@app.get("/gastos/export")
+def exportar_gastos(
+    formato: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv o ndjson"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    categoria_id: Optional[int] = None
+):
+    """Descarga los gastos (con nombres de categoría y subcategoría) en streaming"""
+    return StreamingResponse(
+        exportacion.exportar_gastos(formato, desde=desde, hasta=hasta, categoria_id=categoria_id),
+        media_type=exportacion.FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="gastos.{formato}"'}
+    )
+
+
+@app.get("/gastos/buscar", response_model=list[schemas.GastoDetallado])
+def buscar_gastos(
+    q: str = Query(..., min_length=1, max_length=200, description="Palabras a buscar en la descripción"),
+    categoria_id: Optional[int] = None,
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    anio: Optional[int] = Query(None, ge=2000),
+    orden: str = "relevancia",
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Busca gastos por descripción, sin distinguir mayúsculas ni tildes.
+    Cada palabra vale como prefijo y deben aparecer todas.
+    `orden`: relevancia (por defecto) o fecha. Pagina con X-Next-Cursor como /gastos."""
+    if orden not in ("relevancia", "fecha"):
+        raise HTTPException(status_code=400, detail="Orden no soportado. Use relevancia o fecha")
+    try:
+        gastos, cursor_siguiente = crud.buscar_gastos(
+            db, q, categoria_id=categoria_id, mes=mes, anio=anio, orden=orden, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lista(gastos, schemas.GastoDetallado, cursor_siguiente)
 
 
 @app.get("/gastos/{gasto_id}", response_model=schemas.GastoDetallado)
@@ -202,12 +332,12 @@ def obtener_gasto(gasto_id: int, db: Session = Depends(get_db)):
 
 @app.post("/gastos", response_model=schemas.Gasto, status_code=201)
 def crear_gasto(gasto: schemas.GastoCreate, db: Session = Depends(get_db)):
-    # Verificar que la categoría existe
-    if not crud.get_categoria(db, gasto.categoria_id):
+    # Verificar que la categoría existe (en memoria: el alta queda en un solo INSERT)
+    if not cache_referencias.existe(db, "categorias", gasto.categoria_id):
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
 
     # Verificar subcategoría si se proporciona
-    if gasto.subcategoria_id and not crud.get_subcategoria(db, gasto.subcategoria_id):
+    if gasto.subcategoria_id and not cache_referencias.existe(db, "subcategorias", gasto.subcategoria_id):
         raise HTTPException(status_code=404, detail="Subcategoría no encontrada")
 
     return crud.create_gasto(db, gasto)
@@ -239,35 +369,189 @@ def obtener_resumen(
     db: Session = Depends(get_db)
 ):
     """Obtiene resumen de gastos vs presupuesto por categoría"""
-    resumen = crud.get_gastos_por_categoria_mes(db, mes, anio)
-
-    resultado = []
-    total_presupuesto = 0.0
-    total_gastado = 0.0
-
-    for nombre, presupuesto, color, gastado in resumen:
-        gastado = gastado or 0.0
-        total_presupuesto += presupuesto
-        total_gastado += gastado
-
-        resultado.append({
-            "categoria": nombre,
-            "presupuesto_mensual": presupuesto,
-            "total_gastado": gastado,
-            "diferencia": presupuesto - gastado,
-            "porcentaje_usado": (gastado / presupuesto * 100) if presupuesto > 0 else 0,
-            "color": color
-        })
+    return cache_resultados.obtener(
+        db, DOMINIO_GASTOS, ("resumen", mes, anio), lambda: _calcular_resumen(db, mes, anio)
+    )
 
-    return {
+
+def _calcular_resumen(db: Session, mes: int, anio: int):
+    return crud.armar_resumen(mes, anio, crud.get_gastos_por_categoria_mes(db, mes, anio))
+
+
+@app.get("/tendencias")
+def obtener_tendencias(
+    desde: str = Query(..., description="Primer mes, YYYY-MM"),
+    hasta: str = Query(..., description="Último mes, YYYY-MM"),
+    categoria_id: Optional[int] = None,
+    ventana: int = Query(3, ge=1, le=tendencias.VENTANA_MAXIMA, description="Meses de la media móvil"),
+    db: Session = Depends(get_db)
+):
+    """Series mensuales por categoría: total, media móvil, variación mensual y anual
+    y presupuesto vs gastado"""
+    inicio, fin = tendencias.parsear_mes(desde), tendencias.parsear_mes(hasta)
+    if inicio is None or fin is None:
+        raise HTTPException(status_code=400, detail="Formato de mes inválido. Use YYYY-MM")
+    if inicio > fin:
+        raise HTTPException(status_code=400, detail="'desde' no puede ser posterior a 'hasta'")
+    if fin - inicio + 1 > tendencias.MAX_MESES:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {tendencias.MAX_MESES} meses")
+
+    resultado = cache_resultados.obtener(
+        db, DOMINIO_GASTOS, ("tendencias", inicio, fin, categoria_id, ventana),
+        lambda: crud.get_tendencias(db, inicio, fin, categoria_id, ventana)
+    )
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    return resultado
+
+
+# ========== ENDPOINT DASHBOARD ==========
+@app.get("/dashboard", response_model=schemas.Dashboard)
+def obtener_dashboard(
+    mes: int = Query(..., ge=1, le=12),
+    anio: int = Query(..., ge=2000),
+    db: Session = Depends(get_db)
+):
+    """Todo lo que muestra la página principal en una sola petición: catálogos,
+    cuentas, últimos ingresos, gastos del mes (100) y resumen del mes.
+    Usa una sola sesión; categorías, bancos y medios de pago salen de `backend.referencias`.
+    `ultimo_evento` se lee antes que los datos: los eventos posteriores pueden
+    repetir algo ya incluido, pero no se pierde ninguno (aplicarlos es idempotente)."""
+    ultimo_evento = eventos.ultimo_id(db)
+    referencias = cache_referencias.obtener(db)
+    return RespuestaJSON({
         "mes": mes,
         "anio": anio,
-        "categorias": resultado,
-        "totales": {
-            "presupuesto_total": total_presupuesto,
-            "gastado_total": total_gastado,
-            "diferencia_total": total_presupuesto - total_gastado
-        }
+        "categorias": referencias.categorias,
+        "bancos": referencias.bancos,
+        "medios_pago": referencias.medios_pago,
+        "cuentas_bancarias": serializar_lista(crud_financiero.get_cuentas_bancarias(db), schemas.CuentaBancaria),
+        "ingresos": serializar_lista(crud_financiero.get_ingresos(db), schemas.Ingreso),
+        "gastos": serializar_lista(crud.get_gastos(db, mes=mes, anio=anio), schemas.GastoDetallado),
+        "resumen": cache_resultados.obtener(
+            db, DOMINIO_GASTOS, ("resumen", mes, anio), lambda: _calcular_resumen(db, mes, anio)
+        ),
+        "ultimo_evento": ultimo_evento,
+    })
+
+
+# ========== ENDPOINT EVENTOS ==========
+@app.get("/eventos")
+async def flujo_eventos(
+    request: Request,
+    desde: Optional[int] = Query(None, ge=0, description="Id del último evento conocido (`ultimo_evento` de /dashboard)")
+):
+    """Cambios de gastos y categorías como Server-Sent Events (`event: cambio`).
+
+    Cada evento trae entidad, id, operación (crear, actualizar, eliminar,
+    importar), los (mes, anio) afectados, el registro como queda y las filas
+    del resumen mensual después del cambio. Al reconectarse, el navegador
+    envía `Last-Event-ID` y recibe lo que se perdió; si ya no se conserva,
+    llega `event: reiniciar` y hay que recargar."""
+    ultimo = request.headers.get("last-event-id")
+    if ultimo:
+        try:
+            desde = int(ultimo)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID inválido")
+    return StreamingResponse(
+        canal_eventos.flujo(desde),
+        media_type="text/event-stream",
+        # Sin caché ni buffering en proxies: cada evento debe llegar al enviarse
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ========== ENDPOINT SINCRONIZACIÓN ==========
+@app.get("/sync", response_model=schemas.Sincronizacion)
+def sincronizar(
+    since: Optional[int] = Query(None, ge=0, description="`version` de la última sincronización (sin since: todo)"),
+    limit: int = Query(1000, ge=1, le=sincronizacion.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Cambios desde la versión `since` para clientes con copia local: filas
+    creadas o modificadas por tabla, cada una con `version` y `updated_at`, e
+    ids borrados por tabla. Si hay más de `limit`, la cabecera X-Next-Cursor
+    trae el cursor de la página siguiente (con el mismo `since`). Al terminar,
+    guardar `version` y pasarla como `since` la próxima vez."""
+    try:
+        resultado, cursor_siguiente = sincronizacion.cambios(db, since, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RespuestaJSON(resultado, headers={CABECERA_CURSOR: cursor_siguiente} if cursor_siguiente else None)
+
+
+# ========== ENDPOINT ANALÍTICA ==========
+@app.get("/analytics/aggregate")
+def agregar_gastos(
+    agrupar: str = Query("mes", description=f"Columnas separadas por coma: {', '.join(analitica.AGRUPACIONES)}"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    categoria_id: Optional[int] = None,
+    subcategoria_id: Optional[int] = None,
+    medio_pago_id: Optional[int] = None,
+    banco_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Total y cantidad de gastos agrupados por cualquier combinación de categoría,
+    subcategoría, medio de pago, banco, año y mes, sobre la instantánea columnar
+    de `gastos` (ver backend/analitica.py). Un grupo con id null son los gastos sin ese dato."""
+    columnas_agrupar = [c.strip() for c in agrupar.split(",") if c.strip()]
+    no_soportadas = [c for c in columnas_agrupar if c not in analitica.AGRUPACIONES]
+    if no_soportadas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Agrupación no soportada: {', '.join(no_soportadas)}. Use {', '.join(analitica.AGRUPACIONES)}"
+        )
+    if len(set(columnas_agrupar)) != len(columnas_agrupar) or len(columnas_agrupar) > analitica.MAX_AGRUPACIONES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Indique hasta {analitica.MAX_AGRUPACIONES} columnas de agrupación distintas"
+        )
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' no puede ser posterior a 'hasta'")
+
+    filtros = {
+        columna: valor for columna, valor in (
+            ("categoria_id", categoria_id), ("subcategoria_id", subcategoria_id),
+            ("medio_pago_id", medio_pago_id), ("banco_id", banco_id),
+        ) if valor is not None
+    }
+    columnas = analitica.instantanea_gastos.actualizar(db)
+    return analitica.agregar(
+        columnas, columnas_agrupar,
+        desde=analitica.dias(desde) if desde else None,
+        hasta=analitica.dias(hasta) if hasta else None,
+        filtros=filtros,
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metricas():
+    """Métricas por ruta y de SQL en formato de texto de Prometheus"""
+    return PlainTextResponse(registro_metricas.exponer(), media_type=TIPO_CONTENIDO)
+
+
+@app.get("/debug/slow-queries")
+def listar_consultas_lentas(limit: int = Query(50, ge=1, le=1000)):
+    """Consultas SQL que superaron SLOW_QUERY_MS, con su plan de ejecución (más recientes primero)"""
+    return {**consultas_lentas.estadisticas(), "consultas": consultas_lentas.recientes(limit)}
+
+
+@app.delete("/debug/slow-queries", status_code=204)
+def limpiar_consultas_lentas():
+    consultas_lentas.limpiar()
+
+
+@app.get("/cache/estadisticas")
+def estadisticas_cache():
+    """Aciertos y fallos de la caché de resúmenes, recargas de la de referencias
+    y clientes de /eventos, en este proceso"""
+    return {
+        **cache_resultados.estadisticas(),
+        "referencias": cache_referencias.estadisticas(),
+        "eventos": canal_eventos.estadisticas(),
     }
 
 
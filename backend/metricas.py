@@ -0,0 +1,231 @@
+"""Métricas de la API en formato de texto de Prometheus (`GET /metrics`).
+
+Por plantilla de ruta (`/gastos/{gasto_id}`, no la URL concreta) se
+registran: peticiones por código de estado, histograma de latencia,
+peticiones en curso, y cantidad y tiempo de sentencias SQL por petición.
+
+El SQL se mide con eventos del engine (`before/after_cursor_execute`). Cada
+petición tiene su acumulador en una ContextVar, que se propaga a los hilos
+donde corren los endpoints síncronos y a los greenlets del engine async.
+
+Las métricas viven en memoria de cada proceso: con varios workers, cada uno
+expone las suyas (Prometheus las suma por instancia).
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SQL_SENTENCIAS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+BUCKETS_SQL_TIEMPO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# [sentencias, segundos] de la petición en curso; None fuera de una petición
+_sql_peticion: ContextVar[Optional[list]] = ContextVar("sql_peticion", default=None)
+_scope_peticion: ContextVar[Optional[dict]] = ContextVar("scope_peticion", default=None)
+
+
+class Histograma:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.suma += valor
+        self.total += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+                break
+
+    def lineas(self, nombre: str, etiquetas: str) -> list:
+        acumulado = 0
+        salida = []
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            salida.append(f'{nombre}_bucket{{{etiquetas},le="{limite:g}"}} {acumulado}')
+        salida.append(f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {self.total}')
+        salida.append(f"{nombre}_sum{{{etiquetas}}} {self.suma:.6f}")
+        salida.append(f"{nombre}_count{{{etiquetas}}} {self.total}")
+        return salida
+
+
+class _MetricasRuta:
+    def __init__(self):
+        self.por_estado = {}
+        self.latencia = Histograma(BUCKETS_LATENCIA)
+        self.sql_sentencias = Histograma(BUCKETS_SQL_SENTENCIAS)
+        self.sql_tiempo = Histograma(BUCKETS_SQL_TIEMPO)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def plantilla_ruta(scope: dict) -> str:
+    """Plantilla de la ruta que atendió (o atiende) la petición"""
+    ruta = scope.get("route")
+    if ruta is not None:
+        return ruta.path
+    if "app_root_path" in scope:
+        # Mount (archivos estáticos): una sola serie para todo el directorio
+        return scope.get("root_path", "") + "/{ruta}"
+    return "sin_ruta"
+
+
+def ruta_actual() -> Optional[str]:
+    """"GET /gastos/{gasto_id}" de la petición en curso, o None fuera de una petición"""
+    scope = _scope_peticion.get()
+    return f"{scope['method']} {plantilla_ruta(scope)}" if scope else None
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas = {}
+        # Peticiones en curso: su plantilla se resuelve al exponer, porque el
+        # router la escribe en el scope después de que empieza la petición
+        self._en_curso = {}
+        self._sql_sentencias = 0
+        self._sql_segundos = 0.0
+        self._engines = []
+
+    # --- SQL ---
+    def instrumentar_engine(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self._antes_sql)
+        event.listen(engine, "after_cursor_execute", self._despues_sql)
+        self._engines.append(engine)
+
+    @staticmethod
+    def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+        # En el contexto de la ejecución: si la sentencia falla no hay
+        # after_cursor_execute y el inicio se descarta con el contexto
+        context._metricas_inicio = time.perf_counter()
+
+    def _despues_sql(self, conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_metricas_inicio", None)
+        if inicio is None:
+            return
+        duracion = time.perf_counter() - inicio
+        with self._lock:
+            self._sql_sentencias += 1
+            self._sql_segundos += duracion
+        acumulado = _sql_peticion.get()
+        if acumulado is not None:
+            acumulado[0] += 1
+            acumulado[1] += duracion
+
+    # --- HTTP ---
+    def iniciar(self, scope: dict):
+        with self._lock:
+            self._en_curso[id(scope)] = scope
+
+    def terminar(self, scope: dict, estado: int, duracion: float, acumulado: list):
+        clave = (scope["method"], plantilla_ruta(scope))
+        with self._lock:
+            self._en_curso.pop(id(scope), None)
+            metricas = self._rutas.get(clave)
+            if metricas is None:
+                metricas = self._rutas[clave] = _MetricasRuta()
+            metricas.por_estado[estado] = metricas.por_estado.get(estado, 0) + 1
+            metricas.latencia.observar(duracion)
+            metricas.sql_sentencias.observar(acumulado[0])
+            metricas.sql_tiempo.observar(acumulado[1])
+
+    def exponer(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        with self._lock:
+            en_curso = {}
+            for scope in self._en_curso.values():
+                clave = (scope["method"], plantilla_ruta(scope))
+                en_curso[clave] = en_curso.get(clave, 0) + 1
+            rutas = sorted(self._rutas.items())
+
+            lineas = [
+                "# HELP http_requests_total Peticiones atendidas por ruta y código de estado",
+                "# TYPE http_requests_total counter",
+            ]
+            for (metodo, ruta), m in rutas:
+                for estado, conteo in sorted(m.por_estado.items()):
+                    lineas.append(
+                        f'http_requests_total{{method="{metodo}",route="{_escapar(ruta)}",status="{estado}"}} {conteo}'
+                    )
+
+            lineas += [
+                "# HELP http_requests_in_progress Peticiones en curso por ruta",
+                "# TYPE http_requests_in_progress gauge",
+            ]
+            for (metodo, ruta), conteo in sorted(en_curso.items()):
+                lineas.append(f'http_requests_in_progress{{method="{metodo}",route="{_escapar(ruta)}"}} {conteo}')
+
+            for nombre, ayuda, atributo in (
+                ("http_request_duration_seconds", "Latencia de la petición hasta el último byte", "latencia"),
+                ("http_request_sql_queries", "Sentencias SQL ejecutadas por petición", "sql_sentencias"),
+                ("http_request_sql_duration_seconds", "Tiempo en SQL por petición", "sql_tiempo"),
+            ):
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} histogram"]
+                for (metodo, ruta), m in rutas:
+                    lineas += getattr(m, atributo).lineas(nombre, f'method="{metodo}",route="{_escapar(ruta)}"')
+
+            lineas += [
+                "# HELP sqlalchemy_queries_total Sentencias SQL ejecutadas (dentro y fuera de peticiones)",
+                "# TYPE sqlalchemy_queries_total counter",
+                f"sqlalchemy_queries_total {self._sql_sentencias}",
+                "# HELP sqlalchemy_query_duration_seconds_total Tiempo acumulado en sentencias SQL",
+                "# TYPE sqlalchemy_query_duration_seconds_total counter",
+                f"sqlalchemy_query_duration_seconds_total {self._sql_segundos:.6f}",
+            ]
+
+        lineas += [
+            "# HELP sqlalchemy_pool_checked_out Conexiones del pool en uso",
+            "# TYPE sqlalchemy_pool_checked_out gauge",
+        ]
+        for engine in self._engines:
+            checkedout = getattr(engine.pool, "checkedout", None)
+            if checkedout:
+                lineas.append(f'sqlalchemy_pool_checked_out{{engine="{_escapar(engine.url.drivername)}"}} {checkedout()}')
+        return "\n".join(lineas) + "\n"
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: mide cada petición HTTP hasta que se envía el último byte
+    (incluye respuestas en streaming como /gastos/export)"""
+
+    def __init__(self, app, registro: "RegistroMetricas" = None):
+        self.app = app
+        self.registro = registro or registro_metricas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        acumulado = [0, 0.0]
+        token = _sql_peticion.set(acumulado)
+        token_scope = _scope_peticion.set(scope)
+        self.registro.iniciar(scope)
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self.registro.terminar(scope, estado, time.perf_counter() - inicio, acumulado)
+            _sql_peticion.reset(token)
+            _scope_peticion.reset(token_scope)
+
+
+registro_metricas = RegistroMetricas()
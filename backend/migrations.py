@@ -0,0 +1,174 @@
+"""Migraciones ligeras para bases de datos existentes.
+
+`create_all` solo crea las tablas que faltan: no agrega columnas ni índices
+nuevos a tablas que ya existen en un `expense_tracker.db` previo ni llena tablas
+derivadas. Este módulo completa esos cambios de forma idempotente.
+
+La app los aplica al arrancar (no al importarse). En despliegues con varias
+instancias se pueden aplicar antes, en un paso aparte, y arrancar con
+DB_MIGRAR_AL_ARRANCAR=0.
+
+Uso manual:
+    python -m backend.migrations
+    python -m backend.migrations --reconstruir-resumen
+    python -m backend.migrations --reconstruir-libro
+    python -m backend.migrations --reconstruir-busqueda
+    python -m backend.migrations --reconstruir-analitica
+"""
+import sys
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.orm import Session
+
+from backend import analitica, busqueda, crud, libro_mayor, models
+from backend.database import engine as default_engine, transaccion_exclusiva
+
+
+def agregar_columnas_faltantes(conn) -> list:
+    """Agrega a las tablas existentes las columnas declaradas en los modelos que
+    no tengan (deben admitir nulos o tener `server_default`). Devuelve las
+    columnas agregadas como "tabla.columna"."""
+    inspector = inspect(conn)
+    agregadas = []
+    for table in models.Base.metadata.sorted_tables:
+        existentes = {columna["name"] for columna in inspector.get_columns(table.name)}
+        for columna in table.columns:
+            if columna.name not in existentes:
+                definicion = CreateColumn(columna).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {definicion}")
+                agregadas.append(f"{table.name}.{columna.name}")
+    return agregadas
+
+
+def crear_indices_faltantes(bind):
+    """Crea los índices declarados en los modelos que aún no existan"""
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def _objetos_existentes(conn) -> Optional[set]:
+    """Nombres de tablas, índices y triggers, y columnas como "tabla.columna",
+    de la base en una sola consulta (None si el motor no es SQLite ni PostgreSQL)"""
+    if conn.dialect.name == "sqlite":
+        consulta = (
+            "SELECT name FROM sqlite_master "
+            "UNION ALL SELECT m.name || '.' || c.name FROM sqlite_master AS m "
+            "JOIN pragma_table_info(m.name) AS c WHERE m.type = 'table'"
+        )
+    elif conn.dialect.name == "postgresql":
+        consulta = (
+            "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() "
+            "UNION ALL SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() "
+            "UNION ALL SELECT table_name || '.' || column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"
+        )
+    else:
+        return None
+    return set(conn.exec_driver_sql(consulta).scalars())
+
+
+def esquema_al_dia(engine: Engine = default_engine) -> bool:
+    """True si ya existen todas las tablas, columnas e índices de los modelos (y el índice de búsqueda en SQLite)"""
+    with engine.connect() as conn:
+        existentes = _objetos_existentes(conn)
+    if existentes is None:
+        return False
+    esperados = set()
+    for tabla in models.Base.metadata.sorted_tables:
+        esperados.add(tabla.name)
+        esperados.update(f"{tabla.name}.{columna.name}" for columna in tabla.columns)
+        esperados.update(index.name for index in tabla.indexes)
+    if engine.dialect.name == "sqlite":
+        esperados.update(busqueda.OBJETOS)
+    return esperados <= existentes
+
+
+def reconstruir_resumen_mensual(engine: Engine = default_engine):
+    """Recalcula la tabla `resumen_mensual` desde `gastos`"""
+    with Session(engine) as db:
+        crud.reconstruir_resumen_mensual(db)
+
+
+def reconstruir_libro_mayor(engine: Engine = default_engine):
+    """Regenera `movimientos_cuenta` y `saldos_snapshot` desde ingresos y transferencias"""
+    with Session(engine) as db:
+        libro_mayor.reconstruir_libro(db)
+        db.commit()
+
+
+def reconstruir_busqueda(engine: Engine = default_engine):
+    """Vuelve a indexar `gastos.descripcion` en la tabla FTS5 (solo SQLite)"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        busqueda.crear_indice(conn)
+        busqueda.reconstruir_indice(conn)
+
+
+def reconstruir_analitica(engine: Engine = default_engine):
+    """Regenera desde cero la instantánea columnar de `gastos` (`backend.analitica`)"""
+    with Session(engine) as db:
+        analitica.instantanea_gastos.actualizar(db, forzar=True)
+
+
+def aplicar_migraciones(engine: Engine = default_engine) -> bool:
+    """Crea tablas e índices faltantes y llena las tablas derivadas nuevas.
+
+    Con el esquema al día solo cuesta una consulta. Si falta algo, los cambios
+    corren en una transacción exclusiva: varios workers pueden arrancar a la
+    vez sin chocar. Devuelve True si hubo algo que crear."""
+    if esquema_al_dia(engine):
+        return False
+
+    with transaccion_exclusiva(engine) as conn:
+        tablas_previas = set(inspect(conn).get_table_names())
+
+        models.Base.metadata.create_all(bind=conn)
+        agregadas = agregar_columnas_faltantes(conn)
+        crear_indices_faltantes(conn)
+
+        # Columnas de sincronización nuevas: las filas previas quedan con versión 0
+        # (las trae cualquier sincronización completa) y su fecha de alta
+        for nombre in agregadas:
+            tabla, columna = nombre.split(".")
+            if columna == "updated_at" and "created_at" in models.Base.metadata.tables[tabla].columns:
+                conn.exec_driver_sql(f"UPDATE {tabla} SET updated_at = created_at")
+
+        # Las sesiones se unen a la transacción de `conn`: su commit no la cierra
+        # Tabla agregada nueva sobre una base con gastos previos: llenarla
+        if "gastos" in tablas_previas and models.ResumenMensual.__tablename__ not in tablas_previas:
+            with Session(bind=conn) as db:
+                crud.reconstruir_resumen_mensual(db)
+
+        # Libro mayor nuevo sobre cuentas existentes: registrar su historia
+        if "cuentas_bancarias" in tablas_previas and models.MovimientoCuenta.__tablename__ not in tablas_previas:
+            with Session(bind=conn) as db:
+                libro_mayor.reconstruir_libro(db)
+                db.commit()
+
+        # Índice de búsqueda FTS5 y sus triggers; si es nuevo, indexar los gastos previos
+        if conn.dialect.name == "sqlite":
+            if busqueda.crear_indice(conn) and "gastos" in tablas_previas:
+                busqueda.reconstruir_indice(conn)
+    return True
+
+
+if __name__ == "__main__":
+    aplicar_migraciones()
+    if "--reconstruir-resumen" in sys.argv:
+        reconstruir_resumen_mensual()
+        print("✅ Resumen mensual reconstruido")
+    if "--reconstruir-libro" in sys.argv:
+        reconstruir_libro_mayor()
+        print("✅ Libro mayor reconstruido")
+    if "--reconstruir-busqueda" in sys.argv:
+        reconstruir_busqueda()
+        print("✅ Índice de búsqueda reconstruido")
+    if "--reconstruir-analitica" in sys.argv:
+        reconstruir_analitica()
+        print(f"✅ Instantánea de analítica reconstruida en {analitica.instantanea_gastos.directorio}")
+    print("✅ Migraciones aplicadas")
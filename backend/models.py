@@ -1,10 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.database import Base
 
 
-class Categoria(Base):
+class Versionado:
+    """Columnas de sincronización incremental (GET /sync, ver backend.sincronizacion).
+
+    `version` es la versión de cambios de la última transacción que creó o
+    modificó la fila; las bajas dejan una fila en `eliminados`. Las filas
+    anteriores a estas columnas quedan con versión 0 y `updated_at` nulo
+    (o igual a `created_at`, si la tabla lo tiene)."""
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+    updated_at = Column(DateTime, nullable=True)
+
+
+class Categoria(Versionado, Base):
     __tablename__ = "categorias"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -17,7 +28,7 @@ class Categoria(Base):
     gastos = relationship("Gasto", back_populates="categoria")
 
 
-class Subcategoria(Base):
+class Subcategoria(Versionado, Base):
     __tablename__ = "subcategorias"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -28,7 +39,7 @@ class Subcategoria(Base):
     gastos = relationship("Gasto", back_populates="subcategoria")
 
 
-class Banco(Base):
+class Banco(Versionado, Base):
     __tablename__ = "bancos"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -39,7 +50,7 @@ class Banco(Base):
     gastos = relationship("Gasto", back_populates="banco")
 
 
-class MedioPago(Base):
+class MedioPago(Versionado, Base):
     __tablename__ = "medios_pago"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -52,7 +63,7 @@ class MedioPago(Base):
     gastos = relationship("Gasto", back_populates="medio_pago")
 
 
-class CuentaBancaria(Base):
+class CuentaBancaria(Versionado, Base):
     __tablename__ = "cuentas_bancarias"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -69,7 +80,7 @@ class CuentaBancaria(Base):
     transferencias_destino = relationship("Transferencia", foreign_keys="Transferencia.cuenta_destino_id", back_populates="cuenta_destino")
 
 
-class Ingreso(Base):
+class Ingreso(Versionado, Base):
     __tablename__ = "ingresos"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -80,10 +91,14 @@ class Ingreso(Base):
     tipo = Column(String, default="transaccional")  # "transaccional" o "ahorro"
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_ingresos_fecha_id", "fecha", "id"),
+    )
+
     cuenta = relationship("CuentaBancaria", back_populates="ingresos")
 
 
-class Transferencia(Base):
+class Transferencia(Versionado, Base):
     __tablename__ = "transferencias"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -94,11 +109,15 @@ class Transferencia(Base):
     descripcion = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_transferencias_fecha_id", "fecha", "id"),
+    )
+
     cuenta_origen = relationship("CuentaBancaria", foreign_keys=[cuenta_origen_id], back_populates="transferencias_origen")
     cuenta_destino = relationship("CuentaBancaria", foreign_keys=[cuenta_destino_id], back_populates="transferencias_destino")
 
 
-class Gasto(Base):
+class Gasto(Versionado, Base):
     __tablename__ = "gastos"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -107,11 +126,114 @@ class Gasto(Base):
     descripcion = Column(String, nullable=False)
     categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=False)
     subcategoria_id = Column(Integer, ForeignKey("subcategorias.id"), nullable=True)
-    medio_pago_id = Column(Integer, ForeignKey("medios_pago.id"), nullable=True)
-    banco_id = Column(Integer, ForeignKey("bancos.id"), nullable=True)
+    medio_pago_id = Column(Integer, ForeignKey("medios_pago.id"), nullable=True, index=True)
+    banco_id = Column(Integer, ForeignKey("bancos.id"), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Índices compuestos para filtrar por rango de fechas (vista mensual),
+    # por categoría dentro de un rango y para paginar por cursor (fecha, id)
+    __table_args__ = (
+        Index("ix_gastos_fecha_id", "fecha", "id"),
+        Index("ix_gastos_fecha_categoria", "fecha", "categoria_id"),
+        Index("ix_gastos_categoria_fecha", "categoria_id", "fecha"),
+    )
+
     categoria = relationship("Categoria", back_populates="gastos")
     subcategoria = relationship("Subcategoria", back_populates="gastos")
     medio_pago = relationship("MedioPago", back_populates="gastos")
     banco = relationship("Banco", back_populates="gastos")
+
+
+class ResumenMensual(Base):
+    """Total y cantidad de gastos por (año, mes, categoría).
+
+    Se mantiene en la misma transacción que cada alta, cambio o baja de un
+    gasto, para que /resumen no tenga que agregar la tabla `gastos`."""
+    __tablename__ = "resumen_mensual"
+
+    anio = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    categoria_id = Column(Integer, ForeignKey("categorias.id"), primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    cantidad = Column(Integer, nullable=False, default=0)
+
+
+class VersionCache(Base):
+    """Versión por dominio de datos, compartida entre workers.
+
+    Cada escritura incrementa la versión de su dominio en la misma
+    transacción; las entradas de caché de versiones anteriores dejan de
+    usarse en todos los procesos."""
+    __tablename__ = "versiones_cache"
+
+    dominio = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class Evento(Base):
+    """Cambios publicados en GET /eventos (ver backend.eventos).
+
+    Se insertan en la misma transacción que el cambio, así que todos los
+    workers los ven en orden de `id`. Solo se conservan por un tiempo, para
+    que un cliente que se reconecta reciba lo que se perdió."""
+    __tablename__ = "eventos"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    datos = Column(String, nullable=False)  # JSON del evento, sin el id
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class Eliminado(Base):
+    """Lápidas: filas borradas de las tablas versionadas, para que GET /sync
+    informe las bajas a los clientes que ya tenían la fila"""
+    __tablename__ = "eliminados"
+
+    id = Column(Integer, primary_key=True)
+    entidad = Column(String, nullable=False)  # nombre de la tabla
+    entidad_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class MovimientoCuenta(Base):
+    """Libro mayor: movimientos de saldo de las cuentas (solo se agregan filas).
+
+    Cada ingreso, transferencia o ajuste manual deja aquí su efecto sobre
+    los saldos. Borrar un ingreso agrega un movimiento de reverso."""
+    __tablename__ = "movimientos_cuenta"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cuenta_id = Column(Integer, ForeignKey("cuentas_bancarias.id"), nullable=False)
+    fecha = Column(Date, nullable=False)
+    origen = Column(String, nullable=False)  # "apertura", "ingreso", "transferencia", "ajuste"
+    origen_id = Column(Integer, nullable=True)
+    delta_total = Column(Float, nullable=False, default=0.0)
+    delta_transaccional = Column(Float, nullable=False, default=0.0)
+    delta_ahorro = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_movimientos_cuenta_cuenta_fecha", "cuenta_id", "fecha"),
+        Index("ix_movimientos_cuenta_cuenta_id_id", "cuenta_id", "id"),
+    )
+
+
+class SaldoSnapshot(Base):
+    """Saldo acumulado de una cuenta al cierre de una fecha.
+
+    Incluye todos los movimientos con fecha <= `fecha`; un movimiento con
+    fecha pasada también actualiza los snapshots posteriores."""
+    __tablename__ = "saldos_snapshot"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cuenta_id = Column(Integer, ForeignKey("cuentas_bancarias.id"), nullable=False)
+    fecha = Column(Date, nullable=False)
+    ultimo_movimiento_id = Column(Integer, nullable=False)
+    saldo_total = Column(Float, nullable=False, default=0.0)
+    saldo_transaccional = Column(Float, nullable=False, default=0.0)
+    saldo_ahorro = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("cuenta_id", "fecha", name="uq_saldos_snapshot_cuenta_fecha"),
+    )
@@ -0,0 +1,87 @@
+"""Paginación por cursor (keyset) sobre (fecha, id).
+
+El cursor es opaco para el cliente: codifica la fecha y el id de la última
+fila entregada. La página siguiente se obtiene con una búsqueda en el índice
+`(fecha, id)` en lugar de recorrer y descartar `skip` filas.
+"""
+import base64
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import tuple_
+
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+def _a_base64(valor: str) -> str:
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip("=")
+
+
+def _de_base64(cursor: str) -> str:
+    relleno = "=" * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(cursor + relleno).decode()
+
+
+def codificar_cursor(fecha: date, id: int) -> str:
+    return _a_base64(f"{fecha.isoformat()}|{id}")
+
+
+def decodificar_cursor(cursor: str):
+    """Devuelve (fecha, id). Lanza ValueError si el cursor no es válido."""
+    try:
+        fecha, id = _de_base64(cursor).split("|")
+        return date.fromisoformat(fecha), int(id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Cursor inválido") from exc
+
+
+def codificar_cursor_relevancia(rango: float, id: int) -> str:
+    """Cursor de resultados ordenados por relevancia: (rango, id) ascendente.
+    `repr` conserva el float exacto para que la comparación no salte filas."""
+    return _a_base64(f"r|{rango!r}|{id}")
+
+
+def decodificar_cursor_relevancia(cursor: str):
+    """Devuelve (rango, id). Lanza ValueError si el cursor no es válido."""
+    try:
+        prefijo, rango, id = _de_base64(cursor).split("|")
+        if prefijo != "r":
+            raise ValueError(prefijo)
+        return float(rango), int(id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Cursor inválido") from exc
+
+
+def codificar_cursor_sincronizacion(desde: int, hasta: int, posicion: int, version: int, id: int) -> str:
+    """Cursor de GET /sync: rango de versiones (desde, hasta] (desde -1 en una
+    sincronización completa), índice de la entidad en curso y (version, id)
+    de la última fila entregada de ella"""
+    return _a_base64(f"s|{desde}|{hasta}|{posicion}|{version}|{id}")
+
+
+def decodificar_cursor_sincronizacion(cursor: str):
+    """Devuelve (desde, hasta, posicion, version, id). Lanza ValueError si el cursor no es válido."""
+    try:
+        prefijo, *valores = _de_base64(cursor).split("|")
+        if prefijo != "s" or len(valores) != 5:
+            raise ValueError(prefijo)
+        desde, hasta, posicion, version, id = (int(v) for v in valores)
+        return desde, hasta, posicion, version, id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Cursor inválido") from exc
+
+
+def aplicar_cursor(query, columna_fecha, columna_id, cursor: Optional[str]):
+    """Ordena por (fecha, id) descendente y, si hay cursor, continúa después de él"""
+    if cursor:
+        fecha, id = decodificar_cursor(cursor)
+        query = query.filter(tuple_(columna_fecha, columna_id) < tuple_(fecha, id))
+    return query.order_by(columna_fecha.desc(), columna_id.desc())
+
+
+def siguiente_cursor(filas: list, limit: int) -> Optional[str]:
+    """Cursor de la página siguiente, o None si esta es la última"""
+    if not filas or len(filas) < limit:
+        return None
+    ultima = filas[-1]
+    return codificar_cursor(ultima.fecha, ultima.id)
@@ -0,0 +1,117 @@
+"""Caché en proceso de los datos de referencia: categorías (con sus
+subcategorías), bancos y medios de pago.
+
+Son tablas chicas que casi no cambian, pero la página principal las pide en
+cada carga y `POST /gastos` validaba la categoría y la subcategoría con una
+consulta cada una. Aquí se guardan ya serializadas, junto con la versión del
+dominio `referencias` de `versiones_cache` con la que se leyeron.
+
+- Listados (`/categorias`, `/subcategorias`, `/bancos`, `/medios-pago`,
+  `/dashboard`): una consulta por clave primaria a la versión; si cambió se
+  recargan las tablas (cuatro consultas) y si no, se responde desde memoria.
+- Validación al crear gastos y subcategorías: sin consultas mientras la
+  versión se haya comprobado hace menos de `REFERENCIAS_TTL_S` segundos
+  (5 por defecto). Un id que no está en memoria fuerza la comprobación antes
+  de responder 404, por si otro worker lo acaba de crear. Un borrado hecho en
+  otro worker puede tardar hasta ese TTL en rechazarse aquí.
+
+Las funciones CRUD que modifican estas tablas incrementan la versión con
+`cache_resultados.invalidar(db, DOMINIO_REFERENCIAS)`; en el propio proceso
+eso además descarta la foto en memoria.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from backend import models, schemas
+from backend.cache import cache_resultados, DOMINIO_REFERENCIAS
+from backend.respuestas import serializar_lista
+
+TTL_VALIDACION = float(os.getenv("REFERENCIAS_TTL_S", "5"))
+
+_consulta_version = select(models.VersionCache.version).where(models.VersionCache.dominio == DOMINIO_REFERENCIAS)
+
+
+class Referencias:
+    """Foto de las tablas de referencia, serializada como en sus endpoints"""
+
+    def __init__(self, version: int, categorias: list, bancos: list, medios_pago: list):
+        self.version = version
+        self.categorias = serializar_lista(categorias, schemas.CategoriaConSubcategorias)
+        self.subcategorias = sorted(
+            (s for c in self.categorias for s in c["subcategorias"]), key=lambda s: s["id"]
+        )
+        self.bancos = serializar_lista(bancos, schemas.Banco)
+        self.medios_pago = serializar_lista(medios_pago, schemas.MedioPago)
+        self.ids = {
+            "categorias": {c["id"] for c in self.categorias},
+            "subcategorias": {s["id"] for s in self.subcategorias},
+            "bancos": {b["id"] for b in self.bancos},
+            "medios_pago": {m["id"] for m in self.medios_pago},
+        }
+
+
+class CacheReferencias:
+    def __init__(self, ttl_validacion: float = TTL_VALIDACION):
+        self.ttl_validacion = ttl_validacion
+        self._lock = threading.Lock()
+        self._actual: Optional[Referencias] = None
+        self._verificado = 0.0
+        self.cargas = 0
+
+    def _cargar(self, db: Session, version: int) -> Referencias:
+        with self._lock:
+            # Otro hilo pudo haberla cargado mientras se esperaba el lock
+            if self._actual is not None and self._actual.version == version:
+                return self._actual
+            categorias = db.execute(
+                select(models.Categoria).options(selectinload(models.Categoria.subcategorias))
+                .order_by(models.Categoria.id)
+            ).scalars().all()
+            bancos = db.execute(select(models.Banco).order_by(models.Banco.id)).scalars().all()
+            medios_pago = db.execute(select(models.MedioPago).order_by(models.MedioPago.id)).scalars().all()
+            self._actual = Referencias(version, categorias, bancos, medios_pago)
+            self.cargas += 1
+            return self._actual
+
+    def obtener(self, db: Session) -> Referencias:
+        """Referencias al día: una consulta a la versión y, si cambió, la recarga"""
+        version = db.execute(_consulta_version).scalar() or 0
+        actual = self._actual
+        if actual is None or actual.version != version:
+            actual = self._cargar(db, version)
+        self._verificado = time.monotonic()
+        return actual
+
+    async def obtener_async(self, db: AsyncSession) -> Referencias:
+        return await db.run_sync(self.obtener)
+
+    def existe(self, db: Session, tipo: str, id: int) -> bool:
+        """True si hay un registro `id` en `tipo` (categorias, subcategorias, bancos, medios_pago)"""
+        actual = self._actual
+        if actual is None or time.monotonic() - self._verificado > self.ttl_validacion:
+            return id in self.obtener(db).ids[tipo]
+        if id in actual.ids[tipo]:
+            return True
+        # Puede haberse creado en otro worker después de la última comprobación
+        return id in self.obtener(db).ids[tipo]
+
+    def descartar(self):
+        self._actual = None
+
+    def estadisticas(self) -> dict:
+        actual = self._actual
+        return {
+            "cargas": self.cargas,
+            "version": actual.version if actual else None,
+            "ttl_validacion_s": self.ttl_validacion,
+        }
+
+
+cache_referencias = CacheReferencias()
+cache_resultados.al_invalidar(DOMINIO_REFERENCIAS, cache_referencias.descartar)
@@ -0,0 +1,83 @@
+"""Respuestas JSON rápidas para los listados grandes.
+
+Con `response_model`, FastAPI valida cada objeto del ORM contra el schema
+antes de serializarlo: en un listado de 1.000 gastos eso cuesta más que la
+consulta. Los listados (`/gastos`, `/ingresos`, `/transferencias`) y
+`/dashboard` leen
+directamente los atributos que declara el schema y serializan con orjson.
+El JSON resultante es el mismo; `response_model` se mantiene en la ruta
+para la documentación de OpenAPI.
+
+Al devolver una respuesta ya armada, FastAPI no copia las cabeceras del
+parámetro `response`: el cursor se pasa aquí.
+"""
+from functools import lru_cache
+from typing import Optional, Union, get_args, get_origin
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from backend.paginacion import CABECERA_CURSOR
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse serializada con orjson (fechas, datetimes y arreglos de numpy incluidos)"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _modelo_anidado(anotacion) -> tuple:
+    """(schema, es_lista) de un campo `Categoria`, `Optional[Subcategoria]` o
+    `list[Subcategoria]`; (None, False) si no es un modelo"""
+    if get_origin(anotacion) is Union:
+        candidatos = [a for a in get_args(anotacion) if a is not type(None)]
+        anotacion = candidatos[0] if len(candidatos) == 1 else None
+    es_lista = get_origin(anotacion) is list
+    if es_lista:
+        anotacion = get_args(anotacion)[0]
+    if isinstance(anotacion, type) and issubclass(anotacion, BaseModel):
+        return anotacion, es_lista
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def _serializador(schema: type):
+    """Función objeto -> dict con los campos del schema, en el orden en que los emite pydantic"""
+    campos = []
+    for nombre, campo in schema.model_fields.items():
+        anidado, es_lista = _modelo_anidado(campo.annotation)
+        if anidado is None:
+            campos.append((nombre, None))
+        elif es_lista:
+            serializar_anidado = _serializador(anidado)
+            campos.append((nombre, lambda valores, s=serializar_anidado: [s(v) for v in valores]))
+        else:
+            campos.append((nombre, _serializador(anidado)))
+
+    def serializar(objeto) -> dict:
+        # Los atributos ya cargados del ORM están en __dict__: leerlos ahí evita el
+        # descriptor de SQLAlchemy; los que falten (expirados, diferidos) pasan por getattr
+        cargados = vars(objeto)
+        fila = {}
+        for nombre, anidado in campos:
+            valor = cargados[nombre] if nombre in cargados else getattr(objeto, nombre)
+            fila[nombre] = anidado(valor) if anidado is not None and valor is not None else valor
+        return fila
+
+    return serializar
+
+
+def serializar_lista(objetos: list, schema: type) -> list:
+    """Objetos del ORM como lista de dicts con los campos de `schema`"""
+    serializar = _serializador(schema)
+    return [serializar(objeto) for objeto in objetos]
+
+
+def respuesta_lista(objetos: list, schema: type, cursor_siguiente: Optional[str] = None) -> RespuestaJSON:
+    """Listado de objetos del ORM como `list[schema]`, con la cabecera X-Next-Cursor si hay más páginas"""
+    return RespuestaJSON(
+        serializar_lista(objetos, schema),
+        headers={CABECERA_CURSOR: cursor_siguiente} if cursor_siguiente else None,
+    )
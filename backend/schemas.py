@@ -84,6 +84,17 @@ class Gasto(GastoBase):
         from_attributes = True
 
 
+class ErrorImportacion(BaseModel):
+    linea: int
+    error: str
+
+
+class ResultadoImportacion(BaseModel):
+    insertados: int
+    con_error: int
+    errores: list[ErrorImportacion] = []
+
+
 # Schemas extendidos con relaciones
 class CategoriaConSubcategorias(Categoria):
     subcategorias: list[Subcategoria] = []
@@ -178,6 +189,14 @@ class CuentaBancaria(CuentaBancariaBase):
         from_attributes = True
 
 
+class SaldoCuenta(BaseModel):
+    cuenta_id: int
+    fecha: date
+    saldo_total: float
+    saldo_transaccional: float
+    saldo_ahorro: float
+
+
 # Schemas para Ingreso
 class IngresoBase(BaseModel):
     nombre: str
@@ -226,3 +245,24 @@ class Transferencia(TransferenciaBase):
 
     class Config:
         from_attributes = True
+
+
+# Schema de /dashboard: todo lo que necesita la página principal
+class Dashboard(BaseModel):
+    mes: int
+    anio: int
+    categorias: list[CategoriaConSubcategorias]
+    bancos: list[Banco]
+    medios_pago: list[MedioPago]
+    cuentas_bancarias: list[CuentaBancaria]
+    ingresos: list[Ingreso]
+    gastos: list[GastoDetallado]
+    resumen: dict
+    ultimo_evento: int  # pasar como ?desde= a GET /eventos
+
+
+# Schema de /sync: filas cambiadas (con `version` y `updated_at`) y ids borrados, por tabla
+class Sincronizacion(BaseModel):
+    version: int  # pasar como ?since= en la próxima sincronización
+    cambios: dict[str, list[dict]]
+    eliminados: dict[str, list[int]]
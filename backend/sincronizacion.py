@@ -0,0 +1,182 @@
+"""Sincronización incremental (GET /sync) para clientes con copia local.
+
+Las filas de las tablas de `ENTIDADES` llevan `version` y `updated_at`
+(`models.Versionado`). La versión sale de un contador global, el dominio
+`sincronizacion` de `versiones_cache`, que cada transacción con cambios
+incrementa una sola vez: todas las filas que toca llevan la misma versión.
+El contador se actualiza dentro de la transacción, así que las escrituras
+toman versiones en el orden en que confirman (en PostgreSQL la fila queda
+bloqueada hasta el commit; en SQLite las escrituras ya van de a una). Por
+eso, cuando un cliente lee la versión N, todo cambio con versión <= N ya es
+visible y ninguno posterior puede aparecer con una versión menor.
+
+Las bajas dejan una lápida en `eliminados` con la versión de la transacción.
+
+Las altas, cambios y bajas hechas con el ORM se versionan con eventos de
+mapper (incluidas las cascadas). Las sentencias Core sobre estas tablas
+(importación, presupuestos, saldos, bajas de ingresos, datos iniciales)
+usan `siguiente_version` y `registrar_eliminados`.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, insert, select, tuple_
+from sqlalchemy.orm import Session, object_session
+
+from backend import models, schemas
+from backend.database import insert_dialecto
+from backend.paginacion import codificar_cursor_sincronizacion, decodificar_cursor_sincronizacion
+from backend.respuestas import serializar_lista
+
+DOMINIO_SINCRONIZACION = "sincronizacion"
+_CLAVE_SESION = "version_sincronizacion"
+
+# nombre (tabla) -> (modelo, schema); /sync las recorre en este orden
+ENTIDADES = {
+    "categorias": (models.Categoria, schemas.Categoria),
+    "subcategorias": (models.Subcategoria, schemas.Subcategoria),
+    "bancos": (models.Banco, schemas.Banco),
+    "medios_pago": (models.MedioPago, schemas.MedioPago),
+    "cuentas_bancarias": (models.CuentaBancaria, schemas.CuentaBancaria),
+    "ingresos": (models.Ingreso, schemas.Ingreso),
+    "transferencias": (models.Transferencia, schemas.Transferencia),
+    "gastos": (models.Gasto, schemas.Gasto),
+}
+
+MAX_LIMIT = 10000
+
+
+def _incrementar(conn) -> int:
+    tabla = models.VersionCache.__table__
+    sentencia = insert_dialecto(conn)(tabla).values(dominio=DOMINIO_SINCRONIZACION, version=1)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.dominio],
+        set_={"version": tabla.c.version + 1}
+    ).returning(tabla.c.version)
+    return conn.execute(sentencia).scalar_one()
+
+
+def siguiente_version(db: Session) -> int:
+    """Versión de cambios de la transacción actual. La primera llamada incrementa
+    el contador (sin commit); las siguientes de la misma transacción la reutilizan."""
+    version = db.info.get(_CLAVE_SESION)
+    if version is None:
+        version = db.info[_CLAVE_SESION] = _incrementar(db.connection())
+    return version
+
+
+def version_actual(db: Session) -> int:
+    """Última versión confirmada"""
+    return db.execute(
+        select(models.VersionCache.version).where(models.VersionCache.dominio == DOMINIO_SINCRONIZACION)
+    ).scalar() or 0
+
+
+def registrar_eliminados(db: Session, modelo, ids: list):
+    """Lápidas para filas borradas con sentencias Core (sin pasar por el ORM)"""
+    if ids:
+        version = siguiente_version(db)
+        ahora = datetime.utcnow()
+        db.execute(insert(models.Eliminado), [
+            {"entidad": modelo.__tablename__, "entidad_id": id, "version": version, "deleted_at": ahora}
+            for id in ids
+        ])
+
+
+def _version_en_flush(objeto, conn) -> int:
+    db = object_session(objeto)
+    if db is None:
+        return _incrementar(conn)
+    version = db.info.get(_CLAVE_SESION)
+    if version is None:
+        version = db.info[_CLAVE_SESION] = _incrementar(conn)
+    return version
+
+
+@event.listens_for(models.Versionado, "before_insert", propagate=True)
+def _versionar_alta(mapper, conn, objeto):
+    objeto.version = _version_en_flush(objeto, conn)
+    objeto.updated_at = datetime.utcnow()
+
+
+@event.listens_for(models.Versionado, "before_update", propagate=True)
+def _versionar_cambio(mapper, conn, objeto):
+    # before_update también se llama para objetos sin cambios en sus columnas
+    db = object_session(objeto)
+    if db is not None and not db.is_modified(objeto, include_collections=False):
+        return
+    objeto.version = _version_en_flush(objeto, conn)
+    objeto.updated_at = datetime.utcnow()
+
+
+@event.listens_for(models.Versionado, "after_delete", propagate=True)
+def _registrar_baja(mapper, conn, objeto):
+    conn.execute(insert(models.Eliminado.__table__), {
+        "entidad": mapper.local_table.name,
+        "entidad_id": objeto.id,
+        "version": _version_en_flush(objeto, conn),
+        "deleted_at": datetime.utcnow(),
+    })
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _olvidar_version(db: Session, transaccion):
+    if transaccion.parent is None:
+        db.info.pop(_CLAVE_SESION, None)
+
+
+def _serializar(filas: list, schema) -> list:
+    return [
+        {**fila, "version": objeto.version, "updated_at": objeto.updated_at}
+        for fila, objeto in zip(serializar_lista(filas, schema), filas)
+    ]
+
+
+def cambios(db: Session, since: Optional[int], limit: int, cursor: Optional[str] = None) -> tuple:
+    """Filas con versión en (since, hasta] y lápidas del mismo rango, como
+    ({version, cambios, eliminados}, cursor de la página siguiente o None).
+
+    `hasta` es la versión confirmada al pedir la primera página; el cursor la
+    conserva para que todas las páginas vean el mismo rango. Lo que cambie
+    mientras tanto queda para la siguiente sincronización, desde `hasta`.
+    Sin `since` devuelve todas las filas y ninguna lápida.
+    Lanza ValueError si el cursor no es válido o no corresponde a `since`."""
+    completa = since is None
+    if cursor:
+        desde, hasta, posicion, ultima_version, ultimo_id = decodificar_cursor_sincronizacion(cursor)
+        if desde != (-1 if completa else since):
+            raise ValueError("Cursor inválido")
+    else:
+        hasta, posicion, ultima_version, ultimo_id = version_actual(db), 0, 0, 0
+
+    fuentes = list(ENTIDADES) + ([] if completa else [models.Eliminado.__tablename__])
+    resultado = {"version": hasta, "cambios": {}, "eliminados": {}}
+    restante = limit
+    for indice in range(posicion, len(fuentes)):
+        nombre = fuentes[indice]
+        modelo = ENTIDADES[nombre][0] if nombre in ENTIDADES else models.Eliminado
+        consulta = select(modelo).where(modelo.version <= hasta)
+        if not completa:
+            # Delta: recorre el índice de `version` desde `since`, sin leer la tabla entera
+            consulta = consulta.where(
+                modelo.version > since, tuple_(modelo.version, modelo.id) > (ultima_version, ultimo_id)
+            ).order_by(modelo.version, modelo.id)
+        else:
+            consulta = consulta.where(modelo.id > ultimo_id).order_by(modelo.id)
+        filas = db.execute(consulta.limit(restante)).scalars().all()
+        if nombre in ENTIDADES:
+            if filas:
+                resultado["cambios"][nombre] = _serializar(filas, ENTIDADES[nombre][1])
+        else:
+            for lapida in filas:
+                resultado["eliminados"].setdefault(lapida.entidad, []).append(lapida.entidad_id)
+        db.expunge_all()
+
+        restante -= len(filas)
+        if restante == 0:
+            ultima = filas[-1]
+            return resultado, codificar_cursor_sincronizacion(
+                -1 if completa else since, hasta, indice, ultima.version, ultima.id
+            )
+        ultima_version, ultimo_id = 0, 0
+    return resultado, None
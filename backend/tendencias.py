@@ -0,0 +1,132 @@
+"""Tendencias de gasto por categoría a lo largo de varios meses (`GET /tendencias`).
+
+Las series salen de una sola consulta sobre la tabla agregada
+`resumen_mensual` (un registro por año, mes y categoría). Con ellas se arma
+una matriz categorías × meses y las derivadas se calculan por columnas con
+numpy, sin recorrer los meses en Python:
+
+- media móvil de `ventana` meses (suma acumulada desplazada)
+- variación contra el mes anterior y contra el mismo mes del año anterior
+- presupuesto contra lo gastado, a partir de `Categoria.presupuesto_mensual`
+
+Se leen además los 12 meses anteriores a `desde`, para que la variación
+anual y la media móvil de los primeros meses tengan historia.
+
+La respuesta es columnar: cada serie es una lista alineada con `meses`.
+"""
+import re
+from typing import Optional
+
+import numpy as np
+
+MESES_HISTORIA = 12
+MAX_MESES = 120
+VENTANA_MAXIMA = MESES_HISTORIA
+
+_FORMATO_MES = re.compile(r"^(\d{4})-(\d{2})$")
+
+
+def parsear_mes(valor: str) -> Optional[int]:
+    """'2025-03' -> índice absoluto del mes (anio * 12 + mes - 1); None si no es válido"""
+    coincidencia = _FORMATO_MES.match(valor or "")
+    if not coincidencia:
+        return None
+    anio, mes = int(coincidencia.group(1)), int(coincidencia.group(2))
+    if not 1 <= mes <= 12 or anio < 2000:
+        return None
+    return anio * 12 + mes - 1
+
+
+def formatear_mes(indice: int) -> str:
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+
+def _lista(valores: np.ndarray) -> list:
+    """Redondea a 2 decimales; NaN (sin dato, p. ej. división por cero) -> None"""
+    redondeados = np.round(valores, 2)
+    return [None if np.isnan(v) else float(v) for v in redondeados]
+
+
+def _dividir(numerador: np.ndarray, denominador: np.ndarray) -> np.ndarray:
+    resultado = np.full(numerador.shape, np.nan)
+    np.divide(numerador, denominador, out=resultado, where=denominador != 0)
+    return resultado
+
+
+def _series(totales: np.ndarray, cantidades: np.ndarray, presupuestos: np.ndarray, ventana: int) -> dict:
+    """Derivadas de una matriz (filas × meses) que incluye MESES_HISTORIA meses previos.
+    Devuelve matrices recortadas al rango pedido."""
+    h = MESES_HISTORIA
+    acumulado = np.concatenate([np.zeros((totales.shape[0], 1)), np.cumsum(totales, axis=1)], axis=1)
+    media_movil = (acumulado[:, ventana:] - acumulado[:, :-ventana]) / ventana
+
+    actual = totales[:, h:]
+    anterior = totales[:, h - 1:-1]
+    anio_anterior = totales[:, :-h]
+    presupuesto = np.broadcast_to(presupuestos[:, None], actual.shape)
+
+    return {
+        "total": actual,
+        "cantidad": cantidades[:, h:],
+        "media_movil": media_movil[:, h - ventana + 1:],
+        "variacion_mensual": actual - anterior,
+        "variacion_mensual_pct": _dividir(actual - anterior, anterior) * 100,
+        "variacion_anual": actual - anio_anterior,
+        "variacion_anual_pct": _dividir(actual - anio_anterior, anio_anterior) * 100,
+        "diferencia_presupuesto": presupuesto - actual,
+        "porcentaje_presupuesto": _dividir(actual, presupuesto) * 100,
+    }
+
+
+def calcular_tendencias(categorias: list, filas: list, desde: int, hasta: int, ventana: int = 3) -> dict:
+    """Arma la respuesta de /tendencias.
+
+    `categorias`: (id, nombre, color, icono, presupuesto_mensual) en orden de salida.
+    `filas`: (anio, mes, categoria_id, total, cantidad) desde `desde - MESES_HISTORIA` hasta `hasta`."""
+    inicio = desde - MESES_HISTORIA
+    n_meses = hasta - inicio + 1
+    posicion = {c[0]: i for i, c in enumerate(categorias)}
+
+    totales = np.zeros((len(categorias), n_meses))
+    cantidades = np.zeros((len(categorias), n_meses), dtype=np.int64)
+    if filas:
+        anios, meses, ids, montos, conteos = zip(*filas)
+        columnas = np.array(anios) * 12 + np.array(meses) - 1 - inicio
+        renglones = np.array([posicion.get(i, -1) for i in ids])
+        validas = renglones >= 0
+        totales[renglones[validas], columnas[validas]] = np.array(montos, dtype=float)[validas]
+        cantidades[renglones[validas], columnas[validas]] = np.array(conteos)[validas]
+
+    presupuestos = np.array([c[4] or 0.0 for c in categorias], dtype=float)
+
+    # Serie total: una fila más con la suma de todas las categorías
+    series = _series(
+        np.vstack([totales, totales.sum(axis=0)]),
+        np.vstack([cantidades, cantidades.sum(axis=0)]),
+        np.append(presupuestos, presupuestos.sum()),
+        ventana,
+    )
+
+    def fila(i: int) -> dict:
+        salida = {nombre: _lista(matriz[i]) for nombre, matriz in series.items() if nombre != "cantidad"}
+        salida["cantidad"] = series["cantidad"][i].tolist()
+        return salida
+
+    return {
+        "desde": formatear_mes(desde),
+        "hasta": formatear_mes(hasta),
+        "ventana": ventana,
+        "meses": [formatear_mes(m) for m in range(desde, hasta + 1)],
+        "categorias": [
+            {
+                "categoria_id": id_,
+                "categoria": nombre,
+                "color": color,
+                "icono": icono,
+                "presupuesto_mensual": presupuesto,
+                **fila(i),
+            }
+            for i, (id_, nombre, color, icono, presupuesto) in enumerate(categorias)
+        ],
+        "totales": {"presupuesto_mensual": float(presupuestos.sum()), **fila(len(categorias))},
+    }
@@ -0,0 +1,209 @@
+"""Agregaciones ad hoc: instantánea columnar (numpy) contra SQL.
+
+Para cada consulta de `CONSULTAS` mide la mediana de `--repeticiones`
+corridas de tres formas y verifica que den los mismos grupos y totales:
+- `orm`: cargar los gastos filtrados con el ORM y sumar en Python (lo que
+  había que hacer antes para una pregunta nueva)
+- `sql`: un GROUP BY equivalente en la base
+- `numpy`: `backend.analitica.agregar` sobre las columnas mapeadas
+
+Mide además construir la instantánea desde cero y el costo de comprobar que
+está al día (una consulta) cuando no cambió nada.
+
+Uso:
+    python -m benchmarks.analitica --db /tmp/bench.db --repeticiones 20 --salida analitica.json
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import extract, func, select
+
+from benchmarks import reporte
+
+# nombre -> (agrupar, desde, hasta, filtros)
+CONSULTAS = {
+    "medio_pago × banco × mes (todo)": (["medio_pago_id", "banco_id", "mes"], None, None, {}),
+    "categoria × anio (todo)": (["categoria_id", "anio"], None, None, {}),
+    "mes, un banco": (["mes"], None, None, {"banco_id": 1}),
+    "subcategoria, último año": (["subcategoria_id"], "ultimo_anio", None, {}),
+    "total sin agrupar": ([], None, None, {}),
+}
+
+
+def _mediana_ms(funcion, repeticiones: int) -> tuple:
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return round(statistics.median(tiempos) * 1000, 3), resultado
+
+
+def _expresiones():
+    from backend import models
+
+    g = models.Gasto
+    return {
+        "categoria_id": g.categoria_id,
+        "subcategoria_id": g.subcategoria_id,
+        "medio_pago_id": g.medio_pago_id,
+        "banco_id": g.banco_id,
+        "anio": extract("year", g.fecha),
+        "mes": extract("year", g.fecha) * 12 + extract("month", g.fecha) - 1,
+    }
+
+
+def _filtrar(query, desde, hasta, filtros):
+    from backend import models
+
+    if desde:
+        query = query.where(models.Gasto.fecha >= desde)
+    if hasta:
+        query = query.where(models.Gasto.fecha <= hasta)
+    for columna, valor in filtros.items():
+        query = query.where(getattr(models.Gasto, columna) == valor)
+    return query
+
+
+def _clave_mes(indice) -> str:
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+
+def por_sql(db, agrupar, desde, hasta, filtros) -> dict:
+    from backend import models
+
+    expresiones = [_expresiones()[a].label(a) for a in agrupar]
+    query = select(*expresiones, func.sum(models.Gasto.monto), func.count())
+    query = _filtrar(query, desde, hasta, filtros)
+    if expresiones:
+        query = query.group_by(*expresiones)
+    grupos = {}
+    for fila in db.execute(query):
+        clave = tuple(_clave_mes(int(v)) if a == "mes" else (None if v is None else int(v))
+                      for a, v in zip(agrupar, fila))
+        grupos[clave] = (fila[-2] or 0.0, fila[-1])
+    return grupos
+
+
+def por_orm(db, agrupar, desde, hasta, filtros) -> dict:
+    from backend import models
+
+    gastos = db.execute(_filtrar(select(models.Gasto), desde, hasta, filtros)).scalars()
+    totales = defaultdict(float)
+    cantidades = defaultdict(int)
+    for gasto in gastos:
+        clave = []
+        for a in agrupar:
+            if a == "mes":
+                clave.append(f"{gasto.fecha.year:04d}-{gasto.fecha.month:02d}")
+            elif a == "anio":
+                clave.append(gasto.fecha.year)
+            else:
+                clave.append(getattr(gasto, a))
+        totales[tuple(clave)] += gasto.monto
+        cantidades[tuple(clave)] += 1
+    db.expunge_all()
+    return {clave: (totales[clave], cantidades[clave]) for clave in totales}
+
+
+def por_numpy(columnas, agrupar, desde, hasta, filtros) -> dict:
+    from backend import analitica
+
+    resultado = analitica.agregar(
+        columnas, agrupar,
+        desde=analitica.dias(desde) if desde else None,
+        hasta=analitica.dias(hasta) if hasta else None,
+        filtros=filtros,
+    )
+    if not agrupar:
+        return {(): (resultado["total"], resultado["cantidad"])} if resultado["cantidad"] else {}
+    return {tuple(g[a] for a in agrupar): (g["total"], g["cantidad"]) for g in resultado["grupos"]}
+
+
+def _iguales(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(
+        abs(a[k][0] - b[k][0]) <= 0.01 + 1e-9 * abs(b[k][0]) and a[k][1] == b[k][1] for k in a
+    )
+
+
+def medir(db, instantanea, repeticiones: int) -> dict:
+    resultados = {}
+
+    inicio = time.perf_counter()
+    columnas = instantanea.actualizar(db, forzar=True)
+    resultados["construir instantánea"] = {"filas": len(columnas["id"]),
+                                           "ms": round((time.perf_counter() - inicio) * 1000, 1)}
+    ms, _ = _mediana_ms(lambda: instantanea.actualizar(db), repeticiones)
+    resultados["comprobar instantánea al día"] = {"ms": ms}
+
+    ultima = date.fromordinal(date(1970, 1, 1).toordinal() + int(columnas["fecha"].max())) if len(columnas["id"]) else date.today()
+    for nombre, (agrupar, desde, hasta, filtros) in CONSULTAS.items():
+        if desde == "ultimo_anio":
+            desde = ultima.replace(year=ultima.year - 1)
+        orm_ms, orm = _mediana_ms(lambda: por_orm(db, agrupar, desde, hasta, filtros), max(1, repeticiones // 5))
+        sql_ms, sql = _mediana_ms(lambda: por_sql(db, agrupar, desde, hasta, filtros), repeticiones)
+        np_ms, vectorizado = _mediana_ms(lambda: por_numpy(columnas, agrupar, desde, hasta, filtros), repeticiones)
+        resultados[nombre] = {
+            "grupos": len(sql),
+            "orm_ms": orm_ms,
+            "sql_ms": sql_ms,
+            "numpy_ms": np_ms,
+            "coinciden": _iguales(vectorizado, sql) and _iguales(orm, sql),
+        }
+    return resultados
+
+
+def imprimir(resultados: dict):
+    construir = resultados["construir instantánea"]
+    print(f"Instantánea: {construir['filas']} filas construidas en {construir['ms']:.0f} ms; "
+          f"comprobar que está al día: {resultados['comprobar instantánea al día']['ms']:.2f} ms\n")
+    print(f"{'consulta':<34} {'grupos':>7} {'ORM ms':>10} {'SQL ms':>10} {'numpy ms':>10} {'vs SQL':>8}  iguales")
+    for nombre, r in resultados.items():
+        if "sql_ms" not in r:
+            continue
+        factor = r["sql_ms"] / r["numpy_ms"] if r["numpy_ms"] else 0
+        print(f"{nombre:<34} {r['grupos']:>7} {r['orm_ms']:10.1f} {r['sql_ms']:10.1f} {r['numpy_ms']:10.2f} "
+              f"{factor:7.1f}x  {'✅' if r['coinciden'] else '❌'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Base generada con benchmarks.generador")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}; genérala con: python -m benchmarks.generador --db {args.db}")
+        sys.exit(1)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+
+    # Importar después de fijar DATABASE_URL
+    from backend.analitica import InstantaneaGastos
+    from backend.database import SessionLocal
+
+    with tempfile.TemporaryDirectory() as directorio, SessionLocal() as db:
+        instantanea = InstantaneaGastos(Path(directorio))
+        resultados = medir(db, instantanea, args.repeticiones)
+        # Soltar los mapas antes de borrar el directorio
+        instantanea._columnas = None
+    imprimir(resultados)
+
+    if args.salida:
+        meta = reporte.metadatos(repeticiones=args.repeticiones, base=os.environ["DATABASE_URL"].rsplit("@", 1)[-1])
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+    if not all(r.get("coinciden", True) for r in resultados.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Tiempo de arranque del servidor: desde lanzar uvicorn hasta el primer 200.
+
+Mide dos casos, cada uno `--repeticiones` veces (se reporta la mediana):
+- `base_nueva`: base vacía; el arranque crea el esquema y los datos iniciales
+- `base_existente`: la misma base ya creada; solo comprueba que está al día
+
+Con `--workers N` además lanza N servidores a la vez sobre una base vacía y
+verifica que terminen con exactamente las categorías y bancos iniciales
+(sin duplicados ni errores de arranque).
+
+Uso:
+    python -m benchmarks.arranque --repeticiones 5 --workers 4 --max-ms 5000 --salida arranque.json
+
+Sale con código 1 si la mediana de algún caso supera `--max-ms` o si el
+arranque concurrente falla.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from benchmarks import reporte
+
+RAIZ = Path(__file__).resolve().parent.parent
+ESPERA_MAXIMA = 60.0
+
+
+def _lanzar(ruta_db: str, puerto: int) -> subprocess.Popen:
+    entorno = {**os.environ, "DATABASE_URL": f"sqlite:///{ruta_db}", "PYTHONPATH": str(RAIZ)}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=RAIZ, env=entorno,
+    )
+
+
+def _esperar(proceso: subprocess.Popen, puerto: int, inicio: float) -> float:
+    """Segundos desde `inicio` hasta que /api responde 200"""
+    while time.perf_counter() - inicio < ESPERA_MAXIMA:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor del puerto {puerto} terminó con código {proceso.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/api", timeout=0.5) as respuesta:
+                if respuesta.status == 200:
+                    return time.perf_counter() - inicio
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"El servidor del puerto {puerto} no respondió en {ESPERA_MAXIMA:.0f} s")
+
+
+def _detener(proceso: subprocess.Popen):
+    proceso.terminate()
+    proceso.wait()
+
+
+def arrancar(ruta_db: str, puerto: int) -> float:
+    """Levanta un servidor, mide hasta el primer 200 y lo detiene"""
+    inicio = time.perf_counter()
+    proceso = _lanzar(ruta_db, puerto)
+    try:
+        return _esperar(proceso, puerto, inicio)
+    finally:
+        _detener(proceso)
+
+
+def _borrar(ruta_db: str):
+    for sufijo in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(ruta_db + sufijo):
+            os.remove(ruta_db + sufijo)
+
+
+def medir(directorio: str, puerto: int, repeticiones: int) -> dict:
+    ruta_db = os.path.join(directorio, "arranque.db")
+    nueva, existente = [], []
+    for _ in range(repeticiones):
+        _borrar(ruta_db)
+        nueva.append(arrancar(ruta_db, puerto))
+        existente.append(arrancar(ruta_db, puerto))
+    return {
+        "base_nueva": _resumir(nueva),
+        "base_existente": _resumir(existente),
+    }
+
+
+def _resumir(tiempos: list) -> dict:
+    return {
+        "repeticiones": len(tiempos),
+        "mediana_ms": round(statistics.median(tiempos) * 1000, 1),
+        "min_ms": round(min(tiempos) * 1000, 1),
+        "max_ms": round(max(tiempos) * 1000, 1),
+    }
+
+
+def arranque_concurrente(directorio: str, puerto: int, workers: int) -> dict:
+    """N servidores a la vez sobre una base vacía: todos deben responder y sembrar una sola vez"""
+    ruta_db = os.path.join(directorio, "concurrente.db")
+    _borrar(ruta_db)
+    inicio = time.perf_counter()
+    procesos = [(_lanzar(ruta_db, puerto + i), puerto + i) for i in range(workers)]
+    errores = []
+    tiempos = []
+    try:
+        for proceso, puerto_worker in procesos:
+            try:
+                tiempos.append(_esperar(proceso, puerto_worker, inicio))
+            except RuntimeError as e:
+                errores.append(str(e))
+    finally:
+        for proceso, _ in procesos:
+            _detener(proceso)
+
+    from backend.datos_iniciales import BANCOS_INICIALES, CATEGORIAS_INICIALES
+
+    with sqlite3.connect(ruta_db) as conn:
+        categorias = conn.execute("SELECT COUNT(*) FROM categorias").fetchone()[0]
+        bancos = conn.execute("SELECT COUNT(*) FROM bancos").fetchone()[0]
+    if categorias != len(CATEGORIAS_INICIALES):
+        errores.append(f"{categorias} categorías (se esperaban {len(CATEGORIAS_INICIALES)})")
+    if bancos != len(BANCOS_INICIALES):
+        errores.append(f"{bancos} bancos (se esperaban {len(BANCOS_INICIALES)})")
+    return {
+        "workers": workers,
+        "max_ms": round(max(tiempos) * 1000, 1) if tiempos else None,
+        "categorias": categorias,
+        "bancos": bancos,
+        "errores": errores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=0, help="Servidores simultáneos sobre una base vacía (0 = no probar)")
+    parser.add_argument("--puerto", type=int, default=8790)
+    parser.add_argument("--max-ms", type=float, help="Mediana máxima tolerada por caso")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    fallas = []
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = medir(directorio, args.puerto, args.repeticiones)
+        for caso, r in resultados.items():
+            print(f"{caso:<16} mediana {r['mediana_ms']:8.1f} ms  min {r['min_ms']:8.1f} ms  max {r['max_ms']:8.1f} ms")
+            if args.max_ms is not None and r["mediana_ms"] > args.max_ms:
+                fallas.append(f"{caso}: {r['mediana_ms']:.0f} ms > {args.max_ms:.0f} ms")
+
+        if args.workers:
+            concurrente = arranque_concurrente(directorio, args.puerto, args.workers)
+            resultados["concurrente"] = concurrente
+            print(f"{args.workers} workers a la vez: último listo en {concurrente['max_ms']} ms, "
+                  f"{concurrente['categorias']} categorías, {concurrente['bancos']} bancos")
+            fallas.extend(f"concurrente: {e}" for e in concurrente["errores"])
+
+    if args.salida:
+        meta = reporte.metadatos(repeticiones=args.repeticiones, workers=args.workers)
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+    if fallas:
+        for falla in fallas:
+            print(f"❌ {falla}")
+        sys.exit(1)
+    print("✅ Arranque dentro de lo esperado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Driver de carga HTTP sobre todos los endpoints de la API.
+
+Ejecuta cada escenario de `ESCENARIOS` un número fijo de veces y guarda un
+reporte JSON con p50/p95/p99 y throughput por endpoint, comparable entre
+commits con `python -m benchmarks.reporte`.
+
+Dos modos:
+- `testclient` (defecto): la app corre en el mismo proceso con el
+  TestClient de FastAPI. Sin red; mide la app y la base de datos.
+- `uvicorn`: levanta un servidor local y usa httpx con `--concurrencia`
+  hilos. Incluye el costo del servidor y del protocolo HTTP.
+
+Primero corren las lecturas y después las escrituras. Las escrituras dejan
+la base como estaba: lo que se crea se borra, las actualizaciones reescriben
+los mismos valores y las transferencias van y vuelven. La excepción es
+/gastos/import, que agrega 20 gastos por petición.
+
+Uso:
+    python -m benchmarks.generador --db /tmp/bench.db --gastos 100000 --hasta 2025-12-31
+    python -m benchmarks.carga --db /tmp/bench.db --repeticiones 200 --salida base.json
+    # ... cambios ...
+    python -m benchmarks.carga --db /tmp/bench.db --repeticiones 200 --salida nuevo.json
+    python -m benchmarks.reporte base.json nuevo.json
+
+Las escrituras modifican la base: para comparar corridas, genera la base de
+nuevo (o copia el archivo) antes de cada una.
+"""
+import argparse
+import itertools
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from benchmarks import reporte
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+class Contexto:
+    """Ids de la base generada y de lo que crean los escenarios de escritura"""
+
+    def __init__(self, cliente):
+        self.contador = itertools.count(1)
+        self.creados = {}
+        self._lock = threading.Lock()
+
+        self.categorias = cliente.get("/categorias").json()
+        self.categoria = self.categorias[0]
+        self.subcategoria = cliente.get("/subcategorias").json()[0]
+        self.banco = cliente.get("/bancos").json()[0]
+        self.medio_pago = cliente.get("/medios-pago").json()[0]
+        cuentas = cliente.get("/cuentas-bancarias").json()
+        self.cuentas = [c["id"] for c in cuentas]
+
+        gastos = cliente.get("/gastos", params={"limit": 100})
+        self.gasto = gastos.json()[0]
+        self.cursor = gastos.headers.get("X-Next-Cursor")
+        self.desde = date.fromisoformat(self.gasto["fecha"]).replace(day=1)
+        self.mes, self.anio = self.desde.month, self.desde.year
+        self.hasta = date(self.anio + self.mes // 12, self.mes % 12 + 1, 1)
+        self.version_sync = cliente.get("/sync", params={"limit": 1}).json()["version"]
+        self.app_js = re.search(r'src="(/static/js/app\.[0-9a-f]+\.js)"', cliente.get("/").text).group(1)
+
+    def siguiente(self) -> int:
+        return next(self.contador)
+
+    def guardar(self, tipo: str, respuesta):
+        if respuesta.status_code in (200, 201):
+            with self._lock:
+                self.creados.setdefault(tipo, []).append(respuesta.json()["id"])
+        return respuesta
+
+    def tomar(self, tipo: str):
+        with self._lock:
+            pendientes = self.creados.get(tipo)
+            return pendientes.pop() if pendientes else 0
+
+    def alguno(self, tipo: str):
+        with self._lock:
+            creados = self.creados.get(tipo)
+            return creados[-1] if creados else 0
+
+
+def _csv_import(ctx: Contexto) -> str:
+    lineas = ["fecha,monto,descripcion,categoria_id"]
+    lineas += [f"{ctx.desde.isoformat()},{1000 + i},Importado benchmark,{ctx.categoria['id']}" for i in range(20)]
+    return "\n".join(lineas)
+
+
+def _transferencia(c, ctx: Contexto):
+    # Alterna el sentido para que los saldos vuelvan a quedar igual
+    n = ctx.siguiente()
+    origen, destino = (ctx.cuentas[0], ctx.cuentas[1]) if n % 2 else (ctx.cuentas[1], ctx.cuentas[0])
+    return c.post("/transferencias", json={
+        "cuenta_origen_id": origen, "cuenta_destino_id": destino, "monto": 1.0, "fecha": date.today().isoformat(),
+    })
+
+
+# (nombre, es_escritura, función(cliente, contexto) -> respuesta). Las escrituras
+# que borran van después de las que crean para consumir sus ids.
+ESCENARIOS = [
+    ("GET /", False, lambda c, x: c.get("/")),
+    ("GET /api", False, lambda c, x: c.get("/api")),
+    ("GET /static/js/app.<hash>.js", False, lambda c, x: c.get(x.app_js)),
+    ("GET /categorias", False, lambda c, x: c.get("/categorias")),
+    ("GET /categorias/{id}", False, lambda c, x: c.get(f"/categorias/{x.categoria['id']}")),
+    ("GET /subcategorias", False, lambda c, x: c.get("/subcategorias")),
+    ("GET /subcategorias/{id}", False, lambda c, x: c.get(f"/subcategorias/{x.subcategoria['id']}")),
+    ("GET /gastos", False, lambda c, x: c.get("/gastos", params={"limit": 100})),
+    ("GET /gastos (mes)", False, lambda c, x: c.get("/gastos", params={"mes": x.mes, "anio": x.anio, "limit": 100})),
+    ("GET /gastos (cursor)", False, lambda c, x: c.get("/gastos", params={"limit": 100, "cursor": x.cursor})),
+    ("GET /gastos/{id}", False, lambda c, x: c.get(f"/gastos/{x.gasto['id']}")),
+    ("GET /gastos/buscar", False, lambda c, x: c.get("/gastos/buscar", params={"q": "alimentacion", "limit": 50})),
+    ("GET /gastos/buscar (prefijo, fecha)", False, lambda c, x: c.get(
+        "/gastos/buscar", params={"q": "tra", "orden": "fecha", "mes": x.mes, "anio": x.anio, "limit": 50})),
+    ("GET /gastos/export (mes)", False, lambda c, x: c.get(
+        "/gastos/export", params={"desde": x.desde.isoformat(), "hasta": x.hasta.isoformat()})),
+    ("GET /resumen", False, lambda c, x: c.get("/resumen", params={"mes": x.mes, "anio": x.anio})),
+    ("GET /tendencias (12 meses)", False, lambda c, x: c.get("/tendencias", params={
+        "desde": f"{x.anio - 1}-{x.mes:02d}", "hasta": f"{x.anio}-{x.mes:02d}"})),
+    ("GET /analytics/aggregate (medio_pago × banco × mes)", False, lambda c, x: c.get(
+        "/analytics/aggregate", params={"agrupar": "medio_pago_id,banco_id,mes"})),
+    ("GET /dashboard", False, lambda c, x: c.get("/dashboard", params={"mes": x.mes, "anio": x.anio})),
+    ("GET /sync (delta)", False, lambda c, x: c.get("/sync", params={"since": x.version_sync})),
+    ("GET /cache/estadisticas", False, lambda c, x: c.get("/cache/estadisticas")),
+    ("GET /metrics", False, lambda c, x: c.get("/metrics")),
+    ("GET /debug/slow-queries", False, lambda c, x: c.get("/debug/slow-queries")),
+    ("GET /bancos", False, lambda c, x: c.get("/bancos")),
+    ("GET /medios-pago", False, lambda c, x: c.get("/medios-pago")),
+    ("GET /cuentas-bancarias", False, lambda c, x: c.get("/cuentas-bancarias")),
+    ("GET /cuentas-bancarias/resumen", False, lambda c, x: c.get("/cuentas-bancarias/resumen")),
+    ("GET /cuentas-bancarias/{id}/saldo", False, lambda c, x: c.get(
+        f"/cuentas-bancarias/{x.cuentas[0]}/saldo", params={"fecha": x.desde.isoformat()})),
+    ("GET /ingresos", False, lambda c, x: c.get("/ingresos", params={"limit": 100})),
+    ("GET /transferencias", False, lambda c, x: c.get("/transferencias", params={"limit": 100})),
+
+    ("POST /gastos", True, lambda c, x: x.guardar("gasto", c.post("/gastos", json={
+        "fecha": x.desde.isoformat(), "monto": 12345.0, "descripcion": "Benchmark",
+        "categoria_id": x.categoria["id"]}))),
+    ("PUT /gastos/{id}", True, lambda c, x: c.put(f"/gastos/{x.alguno('gasto')}", json={"monto": 12345.0})),
+    ("DELETE /gastos/{id}", True, lambda c, x: c.delete(f"/gastos/{x.tomar('gasto')}")),
+    ("POST /gastos/import", True, lambda c, x: c.post(
+        "/gastos/import", content=_csv_import(x), headers={"content-type": "text/csv"})),
+    ("POST /categorias", True, lambda c, x: x.guardar("categoria", c.post(
+        "/categorias", json={"nombre": f"Benchmark {x.siguiente()}-{time.time_ns()}"}))),
+    ("PUT /categorias/{id}", True, lambda c, x: c.put(
+        f"/categorias/{x.alguno('categoria')}", json={"presupuesto_mensual": 100.0})),
+    ("PUT /categorias/presupuestos", True, lambda c, x: c.put("/categorias/presupuestos", json={
+        str(cat["id"]): cat["presupuesto_mensual"] for cat in x.categorias})),
+    ("POST /subcategorias", True, lambda c, x: x.guardar("subcategoria", c.post(
+        "/subcategorias", json={"nombre": "Benchmark", "categoria_id": x.categoria["id"]}))),
+    ("PUT /subcategorias/{id}", True, lambda c, x: c.put(
+        f"/subcategorias/{x.alguno('subcategoria')}", json={"nombre": "Benchmark"})),
+    ("DELETE /subcategorias/{id}", True, lambda c, x: c.delete(f"/subcategorias/{x.tomar('subcategoria')}")),
+    ("DELETE /categorias/{id}", True, lambda c, x: c.delete(f"/categorias/{x.tomar('categoria')}")),
+    ("POST /bancos", True, lambda c, x: x.guardar("banco", c.post(
+        "/bancos", json={"nombre": f"Banco benchmark {x.siguiente()}-{time.time_ns()}"}))),
+    ("PUT /bancos/{id}", True, lambda c, x: c.put(f"/bancos/{x.alguno('banco')}", json={"activo": 1})),
+    ("POST /medios-pago", True, lambda c, x: x.guardar("medio_pago", c.post("/medios-pago", json={
+        "tipo": "Débito", "nombre": "Benchmark", "banco_id": x.banco["id"]}))),
+    ("PUT /medios-pago/{id}", True, lambda c, x: c.put(f"/medios-pago/{x.alguno('medio_pago')}", json={"activo": 1})),
+    ("DELETE /medios-pago/{id}", True, lambda c, x: c.delete(f"/medios-pago/{x.tomar('medio_pago')}")),
+    ("POST /cuentas-bancarias", True, lambda c, x: x.guardar("cuenta", c.post("/cuentas-bancarias", json={
+        "nombre": "Benchmark", "banco_id": x.banco["id"]}))),
+    ("PUT /cuentas-bancarias/{id}", True, lambda c, x: c.put(
+        f"/cuentas-bancarias/{x.alguno('cuenta')}", json={"nombre": "Benchmark"})),
+    ("DELETE /cuentas-bancarias/{id}", True, lambda c, x: c.delete(f"/cuentas-bancarias/{x.tomar('cuenta')}")),
+    ("DELETE /bancos/{id}", True, lambda c, x: c.delete(f"/bancos/{x.tomar('banco')}")),
+    ("POST /ingresos", True, lambda c, x: x.guardar("ingreso", c.post("/ingresos", json={
+        "nombre": "Benchmark", "monto": 1.0, "fecha": date.today().isoformat(), "cuenta_bancaria_id": x.cuentas[0]}))),
+    ("DELETE /ingresos/{id}", True, lambda c, x: c.delete(f"/ingresos/{x.tomar('ingreso')}")),
+    ("POST /transferencias", True, _transferencia),
+    ("DELETE /debug/slow-queries", True, lambda c, x: c.delete("/debug/slow-queries")),
+]
+
+
+def _ejecutar(cliente, ctx: Contexto, funcion, repeticiones: int, concurrencia: int) -> dict:
+    latencias = []
+    errores = 0
+    lock = threading.Lock()
+
+    def una(_):
+        nonlocal errores
+        inicio = time.perf_counter()
+        try:
+            respuesta = funcion(cliente, ctx)
+            ok = respuesta.status_code < 400
+        except Exception:
+            ok = False
+        duracion = time.perf_counter() - inicio
+        with lock:
+            latencias.append(duracion)
+            errores += not ok
+
+    inicio = time.perf_counter()
+    if concurrencia == 1:
+        for i in range(repeticiones):
+            una(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+            list(ejecutor.map(una, range(repeticiones)))
+    return reporte.resumir_latencias(latencias, time.perf_counter() - inicio, errores)
+
+
+def rutas_sin_escenario(app) -> list:
+    """Endpoints del esquema OpenAPI que ningún escenario ejercita"""
+    cubiertas = {nombre.split(" (")[0] for nombre, _, _ in ESCENARIOS}
+    faltantes = []
+    for ruta, operaciones in app.openapi()["paths"].items():
+        # "/categorias/{categoria_id}" -> "/categorias/{id}", como en ESCENARIOS
+        ruta = re.sub(r"{[a-z_]*id}", "{id}", ruta)
+        faltantes += [f"{m.upper()} {ruta}" for m in operaciones if f"{m.upper()} {ruta}" not in cubiertas]
+    return faltantes
+
+
+def correr(cliente, repeticiones: int, concurrencia: int = 1, filtro: str = None,
+           solo_lecturas: bool = False, progreso=print) -> dict:
+    ctx = Contexto(cliente)
+    resultados = {}
+    for nombre, es_escritura, funcion in ESCENARIOS:
+        if (filtro and filtro not in nombre) or (solo_lecturas and es_escritura):
+            continue
+        funcion(cliente, ctx)  # calentamiento: caché de sentencias, conexiones, etc.
+        resultados[nombre] = _ejecutar(cliente, ctx, funcion, repeticiones, concurrencia)
+        r = resultados[nombre]
+        progreso(f"  {nombre:<40} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                 f"p99 {r['p99_ms']:8.2f} ms  {r['req_s']:8.1f} req/s  {r['errores']} errores")
+    return resultados
+
+
+def _levantar_uvicorn(puerto: int, entorno: dict, workers: int = 1) -> subprocess.Popen:
+    import httpx
+
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(puerto), "--log-level", "warning",
+         "--workers", str(workers)],
+        cwd=RAIZ, env={**os.environ, **entorno, "PYTHONPATH": str(RAIZ)},
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{puerto}/api", timeout=0.5)
+            return proceso
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError("El servidor no inició")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Base generada con benchmarks.generador")
+    parser.add_argument("--modo", choices=["testclient", "uvicorn"], default="testclient")
+    parser.add_argument("--repeticiones", type=int, default=100, help="Peticiones por escenario")
+    parser.add_argument("--concurrencia", type=int, default=1, help="Hilos por escenario")
+    parser.add_argument("--puerto", type=int, default=8766)
+    parser.add_argument("--filtro", help="Solo escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--solo-lecturas", action="store_true")
+    parser.add_argument("--salida", default="benchmark.json", help="Archivo del reporte JSON")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}; genérala con: python -m benchmarks.generador --db {args.db}")
+        sys.exit(1)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+
+    if args.modo == "testclient":
+        # Importar después de fijar DATABASE_URL
+        from fastapi.testclient import TestClient
+        from backend.main import app
+
+        faltantes = rutas_sin_escenario(app)
+        if faltantes:
+            print(f"⚠️  Endpoints sin escenario: {', '.join(faltantes)}")
+        with TestClient(app) as cliente:
+            resultados = correr(cliente, args.repeticiones, args.concurrencia, args.filtro, args.solo_lecturas)
+    else:
+        import httpx
+
+        servidor = _levantar_uvicorn(args.puerto, {"DATABASE_URL": os.environ["DATABASE_URL"]})
+        try:
+            limites = httpx.Limits(max_connections=args.concurrencia)
+            with httpx.Client(base_url=f"http://127.0.0.1:{args.puerto}", limits=limites, timeout=60) as cliente:
+                resultados = correr(cliente, args.repeticiones, args.concurrencia, args.filtro, args.solo_lecturas)
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    meta = reporte.metadatos(
+        modo=args.modo, repeticiones=args.repeticiones, concurrencia=args.concurrencia,
+        base=os.environ["DATABASE_URL"].rsplit("@", 1)[-1],
+    )
+    reporte.guardar(args.salida, meta, resultados)
+    print(f"✅ Reporte guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
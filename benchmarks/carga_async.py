@@ -0,0 +1,115 @@
+"""Compara el throughput de las lecturas en modo síncrono y asíncrono.
+
+Levanta uvicorn dos veces sobre la misma base temporal (DB_ASYNC=0 y
+DB_ASYNC=1) y lanza peticiones concurrentes a los endpoints de lectura.
+
+Uso:
+    python -m benchmarks.carga_async --gastos 20000 --concurrencia 32 --segundos 10
+
+Requiere httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks import reporte
+
+RAIZ = Path(__file__).resolve().parent.parent
+RUTAS = [
+    "/gastos?mes=3&anio=2025&limit=100",
+    "/categorias",
+    "/resumen?mes=3&anio=2025",
+    "/ingresos",
+    "/transferencias",
+]
+
+
+def _csv_gastos(cantidad: int) -> str:
+    lineas = ["fecha,monto,descripcion,categoria_id"]
+    for i in range(cantidad):
+        lineas.append(f"2025-{1 + i % 12:02d}-{1 + i % 28:02d},{1 + i % 500},gasto {i},{1 + i % 9}")
+    return "\n".join(lineas)
+
+
+def _levantar_servidor(directorio: str, puerto: int, modo_async: bool) -> subprocess.Popen:
+    entorno = {**os.environ, "DB_ASYNC": "1" if modo_async else "0", "PYTHONPATH": str(RAIZ)}
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=directorio, env=entorno,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{puerto}/api", timeout=0.5)
+            return proceso
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError("El servidor no inició")
+
+
+async def _carga(base: str, concurrencia: int, segundos: float) -> dict:
+    latencias = []
+    errores = 0
+    fin = time.perf_counter() + segundos
+
+    async def trabajador(cliente: httpx.AsyncClient, indice: int):
+        nonlocal errores
+        while time.perf_counter() < fin:
+            ruta = RUTAS[indice % len(RUTAS)]
+            indice += 1
+            inicio = time.perf_counter()
+            respuesta = await cliente.get(base + ruta)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code != 200:
+                errores += 1
+
+    limites = httpx.Limits(max_connections=concurrencia)
+    async with httpx.AsyncClient(limits=limites, timeout=30) as cliente:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador(cliente, i) for i in range(concurrencia)))
+        duracion = time.perf_counter() - inicio
+
+    return reporte.resumir_latencias(latencias, duracion, errores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gastos", type=int, default=20000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = {}
+        for modo_async in (False, True):
+            servidor = _levantar_servidor(directorio, args.puerto, modo_async)
+            try:
+                base = f"http://127.0.0.1:{args.puerto}"
+                if not modo_async:
+                    httpx.post(
+                        f"{base}/gastos/import", content=_csv_gastos(args.gastos),
+                        headers={"content-type": "text/csv"}, timeout=600,
+                    ).raise_for_status()
+                nombre = "async" if modo_async else "sync"
+                resultados[nombre] = asyncio.run(_carga(base, args.concurrencia, args.segundos))
+            finally:
+                servidor.terminate()
+                servidor.wait()
+
+    for nombre, r in resultados.items():
+        print(
+            f"{nombre:>5}: {r['req_s']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+            f"p95 {r['p95_ms']:7.1f} ms  p99 {r['p99_ms']:7.1f} ms  ({r['peticiones']} peticiones, {r['errores']} errores)"
+        )
+
+
+if __name__ == "__main__":
+    main()
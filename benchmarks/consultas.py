@@ -0,0 +1,108 @@
+"""Consultas por petición: los listados no deben crecer con la cantidad de filas (N+1).
+
+Sobre una base temporal cuenta las sentencias SQL de cada endpoint de
+`ENDPOINTS` con pocas filas (un gasto, las categorías iniciales) y otra vez
+después de crear `--filas` categorías, cada una con una subcategoría y un
+gasto. Antes de cada petición se vacían las cachés en proceso (referencias y
+resultados), para que se cuenten las consultas que cargan los datos.
+
+Uso:
+    python -m benchmarks.consultas --filas 50 --salida consultas.json
+
+Sale con código 1 si algún endpoint hace más consultas con más filas.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+from benchmarks import reporte
+
+HOY = date.today()
+
+# nombre -> (ruta, parámetros)
+ENDPOINTS = {
+    "GET /gastos": ("/gastos", {"limit": 100}),
+    "GET /gastos (mes)": ("/gastos", {"mes": HOY.month, "anio": HOY.year, "limit": 100}),
+    "GET /gastos/buscar": ("/gastos/buscar", {"q": "consulta", "limit": 100}),
+    "GET /categorias": ("/categorias", {}),
+    "GET /subcategorias": ("/subcategorias", {}),
+    "GET /dashboard": ("/dashboard", {"mes": HOY.month, "anio": HOY.year}),
+}
+
+
+def crear_filas(cliente, cantidad: int, inicio: int):
+    """`cantidad` categorías, cada una con una subcategoría y un gasto que las usa"""
+    for n in range(inicio, inicio + cantidad):
+        categoria = cliente.post("/categorias", json={"nombre": f"Consultas {n}"}).json()
+        subcategoria = cliente.post("/subcategorias", json={"nombre": f"Sub {n}", "categoria_id": categoria["id"]}).json()
+        cliente.post("/gastos", json={
+            "fecha": HOY.isoformat(), "monto": 1000.0 + n, "descripcion": f"Gasto consulta {n}",
+            "categoria_id": categoria["id"], "subcategoria_id": subcategoria["id"],
+        }).raise_for_status()
+
+
+def contar(cliente) -> dict:
+    from backend.cache import cache_resultados
+    from backend.database import contar_consultas
+    from backend.referencias import cache_referencias
+
+    cuentas = {}
+    for nombre, (ruta, parametros) in ENDPOINTS.items():
+        cache_referencias.descartar()
+        cache_resultados.limpiar()
+        with contar_consultas() as contador:
+            respuesta = cliente.get(ruta, params=parametros)
+        respuesta.raise_for_status()
+        datos = respuesta.json()
+        # /dashboard: contar los gastos del mes
+        filas = len(datos["gastos"]) if isinstance(datos, dict) else len(datos)
+        cuentas[nombre] = {"filas": filas, "consultas": contador.total}
+    return cuentas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=50, help="Categorías, subcategorías y gastos de la escala grande")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'consultas.db')}"
+
+        # Importar después de fijar DATABASE_URL
+        from fastapi.testclient import TestClient
+        from backend.main import app
+
+        with TestClient(app) as cliente:
+            crear_filas(cliente, 1, 0)
+            pocas = contar(cliente)
+            crear_filas(cliente, args.filas, 1)
+            muchas = contar(cliente)
+
+    resultados = {}
+    fallas = []
+    print(f"{'endpoint':<22} {'filas':>12} {'consultas':>12}")
+    for nombre in ENDPOINTS:
+        antes, despues = pocas[nombre], muchas[nombre]
+        resultados[nombre] = {"pocas": antes, "muchas": despues}
+        print(f"{nombre:<22} {antes['filas']:>5} → {despues['filas']:<5} {antes['consultas']:>5} → {despues['consultas']:<5}")
+        if despues["consultas"] != antes["consultas"]:
+            fallas.append(f"{nombre}: {antes['consultas']} consultas con {antes['filas']} filas, "
+                          f"{despues['consultas']} con {despues['filas']}")
+
+    if args.salida:
+        meta = reporte.metadatos(filas=args.filas)
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+    if fallas:
+        for falla in fallas:
+            print(f"❌ {falla}")
+        sys.exit(1)
+    print("✅ Cantidad de consultas constante")
+
+
+if __name__ == "__main__":
+    main()
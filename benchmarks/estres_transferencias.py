@@ -0,0 +1,103 @@
+"""Prueba de estrés de transferencias concurrentes.
+
+Lanza miles de transferencias aleatorias desde varios hilos, cada una con
+su propia sesión, y verifica al final que:
+- la suma de saldos se conserva (las transferencias solo mueven dinero),
+- ninguna cuenta quedó con saldo transaccional negativo,
+- cada cuenta cuadra con su saldo inicial más las transferencias registradas.
+
+Uso:
+    python -m benchmarks.estres_transferencias --transferencias 5000 --hilos 16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transferencias", type=int, default=5000)
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--cuentas", type=int, default=6)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{directorio}/estres.db")
+
+    # Importar después de fijar DATABASE_URL
+    from sqlalchemy import func, select
+    from backend import crud_financiero, models, schemas
+    from backend.database import SessionLocal, engine
+    from backend.migrations import aplicar_migraciones
+
+    aplicar_migraciones(engine)
+    rng = random.Random(args.semilla)
+
+    with SessionLocal() as db:
+        banco = crud_financiero.create_banco(db, schemas.BancoCreate(nombre=f"Banco estrés {time.time()}"))
+        cuentas = [
+            crud_financiero.create_cuenta_bancaria(db, schemas.CuentaBancariaCreate(
+                nombre=f"Cuenta {i}", banco_id=banco.id,
+                saldo_total=1000.0, saldo_transaccional=1000.0,
+            )).id
+            for i in range(args.cuentas)
+        ]
+        total_inicial = db.execute(select(func.sum(models.CuentaBancaria.saldo_total))).scalar()
+
+    pedidos = [
+        (*rng.sample(cuentas, 2), float(rng.randint(1, 300)))
+        for _ in range(args.transferencias)
+    ]
+
+    def transferir(pedido):
+        origen, destino, monto = pedido
+        with SessionLocal() as db:
+            return crud_financiero.create_transferencia(db, schemas.TransferenciaCreate(
+                cuenta_origen_id=origen, cuenta_destino_id=destino, monto=monto, fecha=date.today()
+            )) is not None
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.hilos) as ejecutor:
+        resultados = list(ejecutor.map(transferir, pedidos))
+    duracion = time.perf_counter() - inicio
+
+    with SessionLocal() as db:
+        filas = db.execute(select(models.CuentaBancaria).where(models.CuentaBancaria.id.in_(cuentas))).scalars().all()
+        total_final = sum(c.saldo_total for c in filas)
+        negativas = [c.id for c in filas if c.saldo_transaccional < 0]
+
+        descuadres = []
+        for c in filas:
+            salidas = db.execute(select(func.coalesce(func.sum(models.Transferencia.monto), 0))
+                                 .where(models.Transferencia.cuenta_origen_id == c.id)).scalar()
+            entradas = db.execute(select(func.coalesce(func.sum(models.Transferencia.monto), 0))
+                                  .where(models.Transferencia.cuenta_destino_id == c.id)).scalar()
+            if abs(1000.0 - salidas + entradas - c.saldo_transaccional) > 1e-6:
+                descuadres.append(c.id)
+
+    exitosas = sum(resultados)
+    print(f"{exitosas}/{len(pedidos)} transferencias aplicadas en {duracion:.2f} s "
+          f"({len(pedidos) / duracion:.0f}/s, {args.hilos} hilos)")
+    print(f"Total inicial {total_inicial:.2f}, total final {total_final:.2f}")
+
+    errores = []
+    if abs(total_final - total_inicial) > 1e-6:
+        errores.append("la suma de saldos no se conservó")
+    if negativas:
+        errores.append(f"cuentas con saldo negativo: {negativas}")
+    if descuadres:
+        errores.append(f"cuentas que no cuadran con sus transferencias: {descuadres}")
+    if errores:
+        print("❌ " + "; ".join(errores))
+        sys.exit(1)
+    print("✅ Saldos conservados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Cambios en vivo: GET /eventos contra volver a pedir /gastos y /resumen.
+
+Levanta uvicorn con `--workers` procesos, abre `--clientes` conexiones a
+/eventos (como pestañas abiertas) y hace `--cambios` altas y bajas de gastos
+desde otro cliente. Mide:
+- la latencia desde que se envía cada cambio hasta que lo recibieron todos
+  los clientes. Con varios workers incluye el sondeo de la tabla `eventos`
+  (hasta EVENTOS_INTERVALO_S); entre cambios se espera un tiempo al azar de
+  hasta ese intervalo para no quedar sincronizado con el sondeo
+- los bytes y peticiones que cada cliente habría descargado si, como antes,
+  recargara /gastos y /resumen del mes tras cada cambio, contra los bytes de
+  los eventos
+
+Uso:
+    python -m benchmarks.eventos --db /tmp/bench.db --clientes 4 --workers 2 --cambios 50 --salida eventos.json
+
+Requiere httpx (pip install httpx). La base queda como estaba: cada gasto
+creado se borra.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks import reporte
+from benchmarks.carga import _levantar_uvicorn
+
+ESPERA_MAXIMA = 10.0
+INTERVALO_SONDEO_S = float(os.getenv("EVENTOS_INTERVALO_S", "0.5"))
+
+
+class Oyente(threading.Thread):
+    """Cliente de /eventos que anota cuándo recibe cada evento y cuántos bytes ocupa"""
+
+    def __init__(self, base: str, desde: int):
+        super().__init__(daemon=True)
+        self.base = base
+        self.desde = desde
+        self.recibidos = {}
+        self.bytes = 0
+        self.conectado = threading.Event()
+        self.condicion = threading.Condition()
+
+    def run(self):
+        ultimo = self.desde
+        try:
+            while True:
+                # El servidor cierra cada conexión a los EVENTOS_DURACION_S: reconectar como el navegador
+                with httpx.stream("GET", f"{self.base}/eventos", headers={"Last-Event-ID": str(ultimo)},
+                                  timeout=None) as respuesta:
+                    self.conectado.set()
+                    for linea in respuesta.iter_lines():
+                        self.bytes += len(linea) + 1
+                        if linea.startswith("id: "):
+                            ultimo = int(linea[4:])
+                            with self.condicion:
+                                self.recibidos[ultimo] = time.perf_counter()
+                                self.condicion.notify_all()
+        except httpx.HTTPError:
+            # Servidor detenido al terminar la medición
+            pass
+
+    def esperar(self, id_evento: int) -> float:
+        with self.condicion:
+            self.condicion.wait_for(lambda: id_evento in self.recibidos, ESPERA_MAXIMA)
+            return self.recibidos.get(id_evento)
+
+
+def _ultimo_evento(base: str, mes: int, anio: int) -> int:
+    return httpx.get(f"{base}/dashboard", params={"mes": mes, "anio": anio}).json()["ultimo_evento"]
+
+
+def medir(base: str, clientes: int, cambios: int, mes: int, anio: int) -> dict:
+    desde = _ultimo_evento(base, mes, anio)
+    oyentes = [Oyente(base, desde) for _ in range(clientes)]
+    for oyente in oyentes:
+        oyente.start()
+        oyente.conectado.wait(ESPERA_MAXIMA)
+
+    fecha = f"{anio:04d}-{mes:02d}-15"
+    latencias = []
+    perdidos = 0
+    esperado = desde
+    with httpx.Client(base_url=base) as escritor:
+        for i in range(cambios):
+            for operacion in ("crear", "eliminar"):
+                time.sleep(random.uniform(0, INTERVALO_SONDEO_S))
+                enviado = time.perf_counter()
+                if operacion == "crear":
+                    gasto = escritor.post("/gastos", json={
+                        "fecha": fecha, "monto": 1000 + i, "descripcion": "benchmark eventos", "categoria_id": 1
+                    }).raise_for_status().json()
+                else:
+                    escritor.delete(f"/gastos/{gasto['id']}").raise_for_status()
+                # Sin otras escrituras en la base, cada cambio es el siguiente id de evento
+                esperado += 1
+                recibidos = [oyente.esperar(esperado) for oyente in oyentes]
+                if None in recibidos:
+                    perdidos += 1
+                else:
+                    latencias.append(max(recibidos) - enviado)
+
+    # Lo que antes descargaba cada cliente tras cada cambio
+    with httpx.Client(base_url=base, headers={"Accept-Encoding": "gzip"}) as lector:
+        periodo = {"mes": mes, "anio": anio}
+        recarga = sum(
+            int(lector.get(ruta, params=params).headers.get("content-length", 0))
+            for ruta, params in (("/gastos", {**periodo, "limit": 100}), ("/resumen", periodo))
+        )
+    total_cambios = cambios * 2
+    return {
+        # Sin req/s: las pausas al azar dominan la duración
+        "entrega": {**reporte.resumir_latencias(latencias, 0, errores=perdidos), "clientes": clientes},
+        "recargando": {
+            "peticiones_por_cliente": total_cambios * 2,
+            "bytes_por_cliente": recarga * total_cambios,
+        },
+        "con_eventos": {
+            "peticiones_por_cliente": 0,
+            "bytes_por_cliente": round(sum(o.bytes for o in oyentes) / clientes),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Base generada con benchmarks.generador")
+    parser.add_argument("--clientes", type=int, default=4, help="Conexiones abiertas a /eventos")
+    parser.add_argument("--workers", type=int, default=2, help="Procesos de uvicorn")
+    parser.add_argument("--cambios", type=int, default=50, help="Gastos a crear y borrar")
+    parser.add_argument("--puerto", type=int, default=8767)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}; genérala con: python -m benchmarks.generador --db {args.db}")
+        sys.exit(1)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+
+    servidor = _levantar_uvicorn(args.puerto, {"DATABASE_URL": os.environ["DATABASE_URL"]}, workers=args.workers)
+    base = f"http://127.0.0.1:{args.puerto}"
+    try:
+        # El mes del gasto más reciente, como la página principal
+        ultimo = httpx.get(f"{base}/gastos", params={"limit": 1}).json()
+        anio, mes = (int(p) for p in ultimo[0]["fecha"].split("-")[:2]) if ultimo else (2025, 1)
+        resultados = medir(base, args.clientes, args.cambios, mes, anio)
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    entrega, antes, despues = resultados["entrega"], resultados["recargando"], resultados["con_eventos"]
+    print(f"Entrega a {args.clientes} clientes con {args.workers} workers: p50 {entrega['p50_ms']:.1f} ms  "
+          f"p95 {entrega['p95_ms']:.1f} ms  max {entrega['max_ms']:.1f} ms  ({entrega['errores']} sin llegar)")
+    print(f"Por cliente, {args.cambios * 2} cambios: recargando {antes['peticiones_por_cliente']} peticiones / "
+          f"{antes['bytes_por_cliente'] / 1024:.0f} KiB; con eventos 0 peticiones / "
+          f"{despues['bytes_por_cliente'] / 1024:.0f} KiB")
+
+    if args.salida:
+        meta = reporte.metadatos(clientes=args.clientes, workers=args.workers, cambios=args.cambios,
+                                 base=os.environ["DATABASE_URL"].rsplit("@", 1)[-1])
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+    if entrega["errores"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Generador de datos sintéticos reproducibles.
+
+Llena categorías, subcategorías, bancos, medios de pago, cuentas, ingresos,
+transferencias y gastos a la escala pedida (10 mil a 10 millones de gastos).
+Con la misma semilla y los mismos parámetros se obtiene exactamente la
+misma base. Cada tabla usa su propio generador aleatorio, así que cambiar la
+cantidad de ingresos no altera los gastos.
+
+Las filas se insertan por lotes con sentencias Core y, al final, se
+reconstruyen las tablas derivadas (resumen mensual y libro mayor). Los
+saldos de las cuentas quedan consistentes con ingresos y transferencias.
+
+Uso:
+    python -m benchmarks.generador --db /tmp/bench.db --gastos 100000
+    python -m benchmarks.generador --db /tmp/bench.db --gastos 10000000 --meses 60 --reemplazar
+
+Si `DATABASE_URL` está definida se usa en lugar de --db.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as hora, timedelta
+
+TAMANO_LOTE = 20000
+
+SUBCATEGORIAS = {
+    "Alimentación": ["Mercado", "Restaurantes", "Domicilios", "Café"],
+    "Servicios": ["Energía", "Agua", "Internet", "Celular"],
+    "Transporte": ["Gasolina", "Taxi", "Transporte público", "Parqueadero"],
+    "Salud": ["Medicamentos", "Consultas", "Seguro"],
+    "Educación": ["Cursos", "Libros"],
+    "Entretenimiento": ["Cine", "Streaming", "Viajes"],
+    "Hogar": ["Arriendo", "Aseo", "Muebles"],
+    "Impuestos": ["Predial", "Vehículo"],
+    "Otros": ["Regalos", "Varios"],
+}
+
+# Monto típico por categoría: los montos siguen una lognormal alrededor de él
+MONTO_TIPICO = {
+    "Alimentación": 35000, "Servicios": 120000, "Transporte": 25000, "Salud": 80000,
+    "Educación": 150000, "Entretenimiento": 60000, "Hogar": 200000, "Impuestos": 400000,
+}
+
+NOMBRES_INGRESO = ["Salario", "Freelance", "Intereses", "Reembolso", "Venta", "Bono"]
+
+
+def _lotes(filas, tamano=TAMANO_LOTE):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _fechas(meses: int, hasta: date):
+    """Primer día del rango y cantidad de días para `meses` meses que terminan en `hasta`"""
+    desde = date(hasta.year, hasta.month, 1)
+    for _ in range(meses - 1):
+        desde = (desde - timedelta(days=1)).replace(day=1)
+    return desde, (hasta - desde).days + 1
+
+
+def generar(engine, gastos: int, semilla: int = 42, meses: int = 24, ingresos: int = None,
+            transferencias: int = None, cuentas: int = 8, hasta: date = None, progreso=print):
+    """Llena la base vacía de `engine`. Devuelve las cantidades insertadas por tabla."""
+    from sqlalchemy import insert, select, update
+    from sqlalchemy.orm import Session
+
+    from backend import crud, libro_mayor, models
+    from backend.datos_iniciales import BANCOS_INICIALES, CATEGORIAS_INICIALES
+
+    ingresos = max(50, gastos // 40) if ingresos is None else ingresos
+    transferencias = max(20, gastos // 100) if transferencias is None else transferencias
+    hasta = hasta or date.today()
+    desde, dias = _fechas(meses, hasta)
+
+    def rng(tabla):
+        return random.Random(f"{semilla}-{tabla}")
+
+    cantidades = {}
+    with engine.begin() as conn:
+        if conn.execute(select(models.Gasto.id).limit(1)).first():
+            raise RuntimeError("La base ya tiene gastos; usa --reemplazar para generarla de nuevo")
+
+        # Catálogos: nombres de datos_iniciales para que el arranque no duplique nada
+        conn.execute(insert(models.Categoria.__table__), [
+            {**c, "presupuesto_mensual": float(MONTO_TIPICO.get(c["nombre"], 50000) * 30)}
+            for c in CATEGORIAS_INICIALES
+        ])
+        categorias = {nombre: id_ for id_, nombre in conn.execute(select(models.Categoria.id, models.Categoria.nombre))}
+        conn.execute(insert(models.Subcategoria.__table__), [
+            {"nombre": sub, "categoria_id": categorias[cat]}
+            for cat, subs in SUBCATEGORIAS.items() for sub in subs
+        ])
+        subcategorias = {}
+        for id_, cat_id in conn.execute(select(models.Subcategoria.id, models.Subcategoria.categoria_id)):
+            subcategorias.setdefault(cat_id, []).append(id_)
+
+        conn.execute(insert(models.Banco.__table__), [{"nombre": b, "activo": 1} for b in BANCOS_INICIALES])
+        bancos = list(conn.scalars(select(models.Banco.id)))
+        conn.execute(insert(models.MedioPago.__table__), [
+            {"tipo": tipo, "nombre": f"Tarjeta {tipo} {nombre}", "banco_id": id_, "activo": 1}
+            for id_, nombre in zip(bancos, BANCOS_INICIALES) for tipo in ("Débito", "Crédito")
+        ])
+        medios = list(conn.execute(select(models.MedioPago.id, models.MedioPago.banco_id)))
+
+        r = rng("cuentas")
+        saldos_iniciales = {}
+        filas_cuentas = []
+        for i in range(cuentas):
+            transaccional, ahorro = float(r.randint(1, 20) * 1_000_000), float(r.randint(0, 50) * 1_000_000)
+            filas_cuentas.append({
+                "nombre": f"Cuenta {i + 1}", "banco_id": bancos[i % len(bancos)], "activa": 1,
+                "saldo_total": transaccional + ahorro, "saldo_transaccional": transaccional, "saldo_ahorro": ahorro,
+            })
+        conn.execute(insert(models.CuentaBancaria.__table__), filas_cuentas)
+        for id_, t, a in conn.execute(select(models.CuentaBancaria.id, models.CuentaBancaria.saldo_transaccional,
+                                             models.CuentaBancaria.saldo_ahorro)):
+            saldos_iniciales[id_] = [t, a]
+        ids_cuentas = list(saldos_iniciales)
+
+        cantidades.update(categorias=len(categorias), subcategorias=sum(map(len, subcategorias.values())),
+                          bancos=len(bancos), medios_pago=len(medios), cuentas_bancarias=len(ids_cuentas))
+
+        # Ingresos: mayormente salarios transaccionales a inicio de mes
+        r = rng("ingresos")
+        saldos = {k: list(v) for k, v in saldos_iniciales.items()}
+
+        def filas_ingresos():
+            for _ in range(ingresos):
+                tipo = "ahorro" if r.random() < 0.2 else "transaccional"
+                monto = float(round(r.lognormvariate(14.5, 0.6), -2))
+                cuenta = r.choice(ids_cuentas)
+                saldos[cuenta][tipo == "ahorro"] += monto
+                fecha = desde + timedelta(days=r.randrange(dias))
+                yield {
+                    "nombre": r.choice(NOMBRES_INGRESO), "monto": monto, "fecha": fecha, "tipo": tipo,
+                    "cuenta_bancaria_id": cuenta, "created_at": datetime.combine(fecha, hora(9)),
+                }
+
+        for lote in _lotes(filas_ingresos()):
+            conn.execute(insert(models.Ingreso.__table__), lote)
+        cantidades["ingresos"] = ingresos
+
+        # Transferencias: solo se generan las que el saldo del momento permite
+        r = rng("transferencias")
+        aplicadas = 0
+
+        def filas_transferencias():
+            nonlocal aplicadas
+            for _ in range(transferencias):
+                origen, destino = r.sample(ids_cuentas, 2)
+                monto = float(round(r.lognormvariate(13, 0.8), -2))
+                if saldos[origen][0] < monto:
+                    continue
+                saldos[origen][0] -= monto
+                saldos[destino][0] += monto
+                aplicadas += 1
+                fecha = desde + timedelta(days=r.randrange(dias))
+                yield {
+                    "cuenta_origen_id": origen, "cuenta_destino_id": destino, "monto": monto, "fecha": fecha,
+                    "descripcion": "Transferencia generada", "created_at": datetime.combine(fecha, hora(10)),
+                }
+
+        for lote in _lotes(filas_transferencias()):
+            conn.execute(insert(models.Transferencia.__table__), lote)
+        cantidades["transferencias"] = aplicadas
+
+        for cuenta, (transaccional, ahorro) in saldos.items():
+            conn.execute(update(models.CuentaBancaria.__table__).where(models.CuentaBancaria.id == cuenta).values(
+                saldo_transaccional=transaccional, saldo_ahorro=ahorro, saldo_total=transaccional + ahorro,
+            ))
+
+    # Gastos: en lotes, cada uno en su propia transacción para no acumular un WAL enorme
+    r = rng("gastos")
+    nombres_categoria = {id_: nombre for nombre, id_ in categorias.items()}
+    ids_categoria = list(nombres_categoria)
+    pesos = [4 if nombres_categoria[c] in ("Alimentación", "Transporte") else 1 for c in ids_categoria]
+
+    def filas_gastos():
+        for i in range(gastos):
+            categoria = r.choices(ids_categoria, pesos)[0]
+            nombre = nombres_categoria[categoria]
+            subs = subcategorias.get(categoria)
+            subcategoria = r.choice(subs) if subs and r.random() < 0.8 else None
+            medio, banco = r.choice(medios) if r.random() < 0.7 else (None, None)
+            fecha = desde + timedelta(days=r.randrange(dias))
+            yield {
+                "fecha": fecha,
+                "monto": float(round(r.lognormvariate(0, 0.7) * MONTO_TIPICO.get(nombre, 50000), -2) or 100),
+                "descripcion": f"{nombre} #{i + 1}",
+                "categoria_id": categoria,
+                "subcategoria_id": subcategoria,
+                "medio_pago_id": medio,
+                "banco_id": banco,
+                "created_at": datetime.combine(fecha, hora(12)),
+            }
+
+    tabla_gastos = models.Gasto.__table__
+    insertados = 0
+    for lote in _lotes(filas_gastos()):
+        with engine.begin() as conn:
+            conn.execute(insert(tabla_gastos), lote)
+        insertados += len(lote)
+        if insertados % (TAMANO_LOTE * 25) == 0:
+            progreso(f"  {insertados:,} gastos")
+    cantidades["gastos"] = insertados
+
+    progreso("  Reconstruyendo resumen mensual y libro mayor...")
+    with Session(engine) as db:
+        crud.reconstruir_resumen_mensual(db)
+        libro_mayor.reconstruir_libro(db)
+        db.commit()
+    return cantidades
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Archivo SQLite destino (defecto benchmark.db)")
+    parser.add_argument("--gastos", type=int, default=10000)
+    parser.add_argument("--ingresos", type=int, help="Defecto: gastos / 40")
+    parser.add_argument("--transferencias", type=int, help="Defecto: gastos / 100")
+    parser.add_argument("--cuentas", type=int, default=8)
+    parser.add_argument("--meses", type=int, default=24, help="Meses de historia hasta hoy")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Última fecha (defecto hoy; fíjala para reproducir)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--reemplazar", action="store_true", help="Borra las tablas existentes antes de generar")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+
+    # Importar después de fijar DATABASE_URL
+    from backend import busqueda, models
+    from backend.database import engine
+    from backend.migrations import aplicar_migraciones
+
+    if args.reemplazar:
+        models.Base.metadata.drop_all(bind=engine)
+        if engine.dialect.name == "sqlite":
+            # El índice FTS5 no es un modelo: sin borrarlo quedarían entradas de los gastos anteriores
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {busqueda.TABLA_FTS}")
+    aplicar_migraciones(engine)
+
+    inicio = time.perf_counter()
+    try:
+        cantidades = generar(
+            engine, args.gastos, semilla=args.semilla, meses=args.meses, ingresos=args.ingresos,
+            transferencias=args.transferencias, cuentas=args.cuentas, hasta=args.hasta,
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    duracion = time.perf_counter() - inicio
+
+    print(f"✅ Base generada en {duracion:.1f} s ({os.environ['DATABASE_URL']})")
+    for tabla, cantidad in cantidades.items():
+        print(f"  {tabla:<18} {cantidad:>12,}")
+
+
+if __name__ == "__main__":
+    main()
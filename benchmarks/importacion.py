@@ -0,0 +1,125 @@
+"""Throughput de POST /gastos/import (filas por segundo).
+
+Importa `--filas` gastos generados (CSV) en una base temporal, en proceso
+con TestClient, y mide de punta a punta: lectura del cuerpo, validación,
+inserción y commit. Se mide dos veces sobre `gastos` vacía, sin el índice de
+búsqueda (FTS5) y con él: la importación lo llena al final con una sola
+sentencia, así que no debería costar mucho más. Verifica además que la
+búsqueda encuentre todas las filas importadas. Cada medición se compara con
+el objetivo de `OBJETIVO_FILAS_S`.
+
+Uso:
+    python -m benchmarks.importacion --filas 200000 --salida importacion.json
+
+Sale con código 1 si la importación con índice baja de `--min-relacion`
+veces el throughput sin índice, si el índice no tiene todas las filas o,
+con `--exigir-objetivo`, si alguna medición no llega al objetivo (depende
+del equipo: no se exige por defecto).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import reporte
+
+OBJETIVO_FILAS_S = 50000
+
+
+def generar_csv(filas: int) -> str:
+    lineas = ["fecha,monto,descripcion,categoria_id"]
+    for i in range(filas):
+        lineas.append(f"2025-{1 + i % 12:02d}-{1 + i % 28:02d},{1 + i % 500},Importado {i} supermercado,{1 + i % 9}")
+    return "\n".join(lineas)
+
+
+def _preparar(engine, con_indice: bool):
+    """Deja `gastos` vacía, con o sin el índice de búsqueda"""
+    from backend import busqueda
+
+    with engine.begin() as conn:
+        for nombre in busqueda.OBJETOS[1:]:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nombre}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {busqueda.TABLA_FTS}")
+        for tabla in ("gastos", "resumen_mensual", "eventos"):
+            conn.exec_driver_sql(f"DELETE FROM {tabla}")
+        if con_indice:
+            busqueda.crear_indice(conn)
+
+
+def medir(cliente, engine, cuerpo: bytes, con_indice: bool) -> dict:
+    from backend import busqueda
+
+    _preparar(engine, con_indice)
+    inicio = time.perf_counter()
+    respuesta = cliente.post("/gastos/import", content=cuerpo, headers={"content-type": "text/csv"})
+    duracion = time.perf_counter() - inicio
+    respuesta.raise_for_status()
+    insertados = respuesta.json()["insertados"]
+    resultado = {"filas": insertados, "segundos": round(duracion, 3), "filas_s": round(insertados / duracion)}
+    if con_indice:
+        with engine.connect() as conn:
+            resultado["indexadas"] = conn.exec_driver_sql(
+                f"SELECT count(*) FROM {busqueda.TABLA_FTS} WHERE {busqueda.TABLA_FTS} MATCH 'supermercado'"
+            ).scalar()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=200000)
+    parser.add_argument("--min-relacion", type=float, default=0.6,
+                        help="Throughput mínimo con índice de búsqueda, relativo al de sin índice")
+    parser.add_argument("--exigir-objetivo", action="store_true",
+                        help=f"Falla si alguna medición no llega a {OBJETIVO_FILAS_S} filas/s")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    cuerpo = generar_csv(args.filas).encode()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'importacion.db')}"
+
+        # Importar después de fijar DATABASE_URL
+        from fastapi.testclient import TestClient
+        from backend.database import engine
+        from backend.main import app
+
+        with TestClient(app) as cliente:
+            resultados = {
+                "sin índice de búsqueda": medir(cliente, engine, cuerpo, con_indice=False),
+                "con índice de búsqueda": medir(cliente, engine, cuerpo, con_indice=True),
+            }
+        engine.dispose()
+
+    fallas = []
+    for nombre, r in resultados.items():
+        r["objetivo"] = r["filas_s"] >= OBJETIVO_FILAS_S
+        marca = "✅" if r["objetivo"] else "⚠️"
+        print(f"{nombre:<24} {r['filas']:>8} filas {r['segundos']:>8.2f} s {r['filas_s']:>9} filas/s  "
+              f"{marca} objetivo {OBJETIVO_FILAS_S}")
+        if args.exigir_objetivo and not r["objetivo"]:
+            fallas.append(f"{nombre}: {r['filas_s']} filas/s, objetivo {OBJETIVO_FILAS_S}")
+
+    con, sin = resultados["con índice de búsqueda"], resultados["sin índice de búsqueda"]
+    relacion = con["filas_s"] / sin["filas_s"]
+    print(f"Con índice / sin índice: {relacion:.2f} (mínimo {args.min_relacion})")
+    if relacion < args.min_relacion:
+        fallas.append(f"Con índice de búsqueda: {relacion:.2f} del throughput sin índice")
+    if con["indexadas"] != con["filas"]:
+        fallas.append(f"El índice de búsqueda tiene {con['indexadas']} de {con['filas']} filas")
+
+    if args.salida:
+        meta = reporte.metadatos(filas=args.filas, objetivo_filas_s=OBJETIVO_FILAS_S)
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+    if fallas:
+        for falla in fallas:
+            print(f"❌ {falla}")
+        sys.exit(1)
+    print("✅ Importación sin regresión")
+
+
+if __name__ == "__main__":
+    main()
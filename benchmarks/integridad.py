@@ -0,0 +1,105 @@
+"""Claves foráneas: los borrados no deben dejar filas que las violen.
+
+SQLite no valida las claves foráneas por defecto, así que un borrado que en
+PostgreSQL falla con ForeignKeyViolation pasa desapercibido. Este chequeo
+levanta la app sobre una base temporal con SQLITE_FOREIGN_KEYS=1 y recorre
+los casos de `CASOS`: cada uno prepara datos y borra una fila referenciada
+por tablas derivadas (por ejemplo `resumen_mensual`). Al final corre
+`PRAGMA foreign_key_check` sobre toda la base.
+
+Uso:
+    python -m benchmarks.integridad --salida integridad.json
+
+Sale con código 1 si algún borrado no responde 204 o si quedan filas que
+violan una clave foránea.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+from benchmarks import reporte
+
+HOY = date.today()
+
+
+def _categoria(cliente, nombre: str) -> int:
+    respuesta = cliente.post("/categorias", json={"nombre": nombre})
+    respuesta.raise_for_status()
+    return respuesta.json()["id"]
+
+
+def _gasto(cliente, categoria_id: int) -> int:
+    respuesta = cliente.post("/gastos", json={
+        "fecha": HOY.isoformat(), "monto": 1000.0, "descripcion": "Gasto integridad", "categoria_id": categoria_id,
+    })
+    respuesta.raise_for_status()
+    return respuesta.json()["id"]
+
+
+def categoria_con_gasto_borrado(cliente):
+    """La categoría tuvo un gasto que ya se borró: su fila agregada queda en 0"""
+    categoria_id = _categoria(cliente, "Integridad borrado")
+    cliente.delete(f"/gastos/{_gasto(cliente, categoria_id)}").raise_for_status()
+    return cliente.delete(f"/categorias/{categoria_id}")
+
+
+def categoria_con_gasto_movido(cliente):
+    """El gasto de la categoría pasó a otra"""
+    origen = _categoria(cliente, "Integridad origen")
+    destino = _categoria(cliente, "Integridad destino")
+    gasto_id = _gasto(cliente, origen)
+    cliente.put(f"/gastos/{gasto_id}", json={"categoria_id": destino}).raise_for_status()
+    return cliente.delete(f"/categorias/{origen}")
+
+
+CASOS = {
+    "DELETE /categorias (gasto borrado)": categoria_con_gasto_borrado,
+    "DELETE /categorias (gasto movido)": categoria_con_gasto_movido,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'integridad.db')}"
+        os.environ["SQLITE_FOREIGN_KEYS"] = "1"
+
+        # Importar después de fijar DATABASE_URL
+        from fastapi.testclient import TestClient
+        from backend.database import engine
+        from backend.main import app
+
+        resultados = {}
+        with TestClient(app, raise_server_exceptions=False) as cliente:
+            for nombre, caso in CASOS.items():
+                resultados[nombre] = {"status": caso(cliente).status_code}
+        with engine.connect() as conn:
+            violaciones = conn.exec_driver_sql("PRAGMA foreign_key_check").fetchall()
+        engine.dispose()
+
+    fallas = [f"{nombre}: {r['status']}" for nombre, r in resultados.items() if r["status"] != 204]
+    for nombre, r in resultados.items():
+        print(f"{nombre:<40} {r['status']:>5}")
+    print(f"{'filas que violan claves foráneas':<40} {len(violaciones):>5}")
+    if violaciones:
+        fallas.append(f"foreign_key_check: {[tuple(v) for v in violaciones]}")
+
+    if args.salida:
+        resultados["foreign_key_check"] = [list(v) for v in violaciones]
+        reporte.guardar(args.salida, reporte.metadatos(), resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+    if fallas:
+        for falla in fallas:
+            print(f"❌ {falla}")
+        sys.exit(1)
+    print("✅ Borrados sin violar claves foráneas")
+
+
+if __name__ == "__main__":
+    main()
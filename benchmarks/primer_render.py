@@ -0,0 +1,120 @@
+"""Tiempo hasta el primer render de la página principal, antes y después de /dashboard.
+
+Emula lo que hace el navegador al abrir la app contra un servidor uvicorn:
+GET / → GET del app.js con huella → datos. Los datos se piden de dos formas:
+- `cascada`: como hacía `init()` antes: /categorias, /bancos, /medios-pago,
+  /cuentas-bancarias e /ingresos en paralelo y después /gastos y /resumen
+- `dashboard`: una sola petición a /dashboard
+
+Cada carga usa un cliente nuevo con hasta 6 conexiones (como un navegador por
+origen) y `Accept-Encoding: gzip`. Con `--concurrencia N` se abren N páginas
+a la vez, que es donde SQLite más serializa las consultas.
+
+Uso:
+    python -m benchmarks.primer_render --db /tmp/bench.db --repeticiones 50 --concurrencia 4 --salida primer_render.json
+
+Requiere httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+import httpx
+
+from benchmarks import reporte
+from benchmarks.carga import _levantar_uvicorn
+
+CONEXIONES_NAVEGADOR = 6
+
+
+async def _cascada(cliente: httpx.AsyncClient, mes: int, anio: int):
+    periodo = {"mes": mes, "anio": anio}
+    await asyncio.gather(
+        cliente.get("/categorias"),
+        cliente.get("/bancos"),
+        cliente.get("/medios-pago"),
+        cliente.get("/cuentas-bancarias"),
+        cliente.get("/ingresos", params={**periodo, "limit": 100}),
+    )
+    await asyncio.gather(
+        cliente.get("/gastos", params={**periodo, "limit": 100}),
+        cliente.get("/resumen", params=periodo),
+    )
+
+
+async def _dashboard(cliente: httpx.AsyncClient, mes: int, anio: int):
+    (await cliente.get("/dashboard", params={"mes": mes, "anio": anio})).raise_for_status()
+
+
+ESTRATEGIAS = {"cascada": _cascada, "dashboard": _dashboard}
+
+
+async def _cargar_pagina(base: str, estrategia, mes: int, anio: int) -> float:
+    inicio = time.perf_counter()
+    limites = httpx.Limits(max_connections=CONEXIONES_NAVEGADOR)
+    async with httpx.AsyncClient(base_url=base, limits=limites, timeout=30,
+                                 headers={"Accept-Encoding": "gzip"}) as cliente:
+        html = (await cliente.get("/")).text
+        app_js = re.search(r'src="(/static/js/app\.[0-9a-f]+\.js)"', html).group(1)
+        await cliente.get(app_js)
+        await estrategia(cliente, mes, anio)
+    return time.perf_counter() - inicio
+
+
+async def _medir(base: str, estrategia, mes: int, anio: int, repeticiones: int, concurrencia: int) -> dict:
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        latencias.extend(await asyncio.gather(
+            *(_cargar_pagina(base, estrategia, mes, anio) for _ in range(concurrencia))
+        ))
+    return reporte.resumir_latencias(latencias, time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Base generada con benchmarks.generador")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--concurrencia", type=int, default=1, help="Páginas abiertas a la vez")
+    parser.add_argument("--puerto", type=int, default=8766)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}; genérala con: python -m benchmarks.generador --db {args.db}")
+        sys.exit(1)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+
+    servidor = _levantar_uvicorn(args.puerto, {"DATABASE_URL": os.environ["DATABASE_URL"]})
+    base = f"http://127.0.0.1:{args.puerto}"
+    try:
+        # El mes del gasto más reciente, para que /gastos y /resumen tengan datos
+        ultimo = httpx.get(f"{base}/gastos", params={"limit": 1}).json()
+        anio, mes = (int(p) for p in ultimo[0]["fecha"].split("-")[:2]) if ultimo else (2025, 1)
+        resultados = {}
+        for nombre, estrategia in ESTRATEGIAS.items():
+            # Una vuelta de calentamiento (cache de resumen, páginas de SQLite)
+            asyncio.run(_medir(base, estrategia, mes, anio, 1, 1))
+            resultados[nombre] = asyncio.run(
+                _medir(base, estrategia, mes, anio, args.repeticiones, args.concurrencia)
+            )
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    for nombre, r in resultados.items():
+        print(f"{nombre:<10} p50 {r['p50_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms  "
+              f"p99 {r['p99_ms']:8.1f} ms  ({r['peticiones']} cargas, concurrencia {args.concurrencia})")
+
+    if args.salida:
+        meta = reporte.metadatos(repeticiones=args.repeticiones, concurrencia=args.concurrencia,
+                                 base=os.environ["DATABASE_URL"].rsplit("@", 1)[-1])
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
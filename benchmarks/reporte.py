@@ -0,0 +1,130 @@
+"""Reportes de latencia en JSON y comparación entre corridas.
+
+Cada reporte guarda los metadatos de la corrida (commit, escala, modo) y,
+por endpoint, la cantidad de peticiones, errores, throughput y percentiles
+p50/p95/p99 en milisegundos.
+
+Uso:
+    python -m benchmarks.reporte base.json nuevo.json --umbral 10
+
+Sale con código 1 si algún endpoint empeoró más que el umbral (en %) en
+p95 o en throughput.
+"""
+import argparse
+import json
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def percentil(ordenadas: list, p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not ordenadas:
+        return 0.0
+    rango = max(1, math.ceil(p / 100 * len(ordenadas)))
+    return ordenadas[rango - 1]
+
+
+def resumir_latencias(latencias: list, duracion: float, errores: int = 0) -> dict:
+    """Resume latencias en segundos a peticiones, req/s y percentiles en ms"""
+    ordenadas = sorted(latencias)
+    return {
+        "peticiones": len(ordenadas),
+        "errores": errores,
+        "req_s": round(len(ordenadas) / duracion, 2) if duracion else 0.0,
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3) if ordenadas else 0.0,
+    }
+
+
+def commit_actual() -> str:
+    try:
+        salida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        sucio = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+        return salida + ("-dirty" if sucio else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def metadatos(**extra) -> dict:
+    return {
+        "commit": commit_actual(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        **extra,
+    }
+
+
+def guardar(ruta: str, meta: dict, endpoints: dict):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "endpoints": endpoints}, f, indent=2, ensure_ascii=False)
+
+
+def cargar(ruta: str) -> dict:
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _variacion(antes: float, despues: float) -> float:
+    return (despues - antes) / antes * 100 if antes else 0.0
+
+
+def comparar(base: dict, nuevo: dict, umbral: float = 10.0) -> list:
+    """Filas (endpoint, métricas, regresión) de dos reportes; solo endpoints comunes"""
+    filas = []
+    for nombre, b in base["endpoints"].items():
+        n = nuevo["endpoints"].get(nombre)
+        if not n:
+            continue
+        delta_p95 = _variacion(b["p95_ms"], n["p95_ms"])
+        delta_req = _variacion(b["req_s"], n["req_s"])
+        regresion = delta_p95 > umbral or delta_req < -umbral or n["errores"] > b["errores"]
+        filas.append((nombre, b, n, delta_p95, delta_req, regresion))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("nuevo")
+    parser.add_argument("--umbral", type=float, default=10.0, help="Variación tolerada en %% (defecto 10)")
+    args = parser.parse_args()
+
+    base, nuevo = cargar(args.base), cargar(args.nuevo)
+    print(f"base:  {base['meta']['commit']}  ({base['meta']['fecha']})")
+    print(f"nuevo: {nuevo['meta']['commit']}  ({nuevo['meta']['fecha']})\n")
+    distintos = [k for k in ("modo", "concurrencia", "repeticiones", "base")
+                 if base["meta"].get(k) != nuevo["meta"].get(k)]
+    if distintos:
+        print(f"⚠️  Las corridas difieren en: {', '.join(distintos)}; la comparación puede no ser justa\n")
+    print(f"{'endpoint':<42} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16} {'req/s':>18}")
+
+    filas = comparar(base, nuevo, args.umbral)
+    for nombre, b, n, delta_p95, delta_req, regresion in filas:
+        marca = " ❌" if regresion else ""
+        print(
+            f"{nombre:<42} {b['p50_ms']:7.2f}→{n['p50_ms']:<8.2f} {b['p95_ms']:7.2f}→{n['p95_ms']:<8.2f} "
+            f"{b['p99_ms']:7.2f}→{n['p99_ms']:<8.2f} {b['req_s']:8.1f}→{n['req_s']:<8.1f} "
+            f"({delta_p95:+.0f}% p95, {delta_req:+.0f}% req/s){marca}"
+        )
+
+    regresiones = [f[0] for f in filas if f[5]]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} endpoint(s) empeoraron más de {args.umbral:.0f}%")
+        sys.exit(1)
+    print(f"\n✅ Sin regresiones mayores a {args.umbral:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Bytes y CPU por petición de los listados grandes.
+
+Para /gastos, /ingresos y /transferencias con `--limit` filas mide:
+- serialización: validar los objetos del ORM con el schema y volcarlos con
+  pydantic (lo que hace FastAPI con `response_model`) contra leer los campos
+  del schema y volcar con orjson (`backend.respuestas`)
+- compresión: tamaño y tiempo de gzip del cuerpo en niveles 1, 5 y 9
+- petición completa por el TestClient, sin y con `Accept-Encoding: gzip`:
+  bytes transferidos y CPU del proceso por petición
+
+Uso:
+    python -m benchmarks.serializacion --db /tmp/bench.db --limit 1000 --salida serializacion.json
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+
+from benchmarks import reporte
+
+NIVELES_GZIP = (1, 5, 9)
+
+
+def _cpu_ms(funcion, repeticiones: int) -> float:
+    """CPU del proceso (todos los hilos) por llamada, en ms"""
+    funcion()
+    inicio = time.process_time()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.process_time() - inicio) / repeticiones * 1000
+
+
+def medir(cliente, db, limit: int, repeticiones: int) -> dict:
+    from pydantic import TypeAdapter
+
+    from backend import crud, crud_financiero, schemas
+    from backend.respuestas import respuesta_lista
+
+    listados = {
+        "/gastos": (lambda: crud.get_gastos(db, limit=limit), schemas.GastoDetallado),
+        "/ingresos": (lambda: crud_financiero.get_ingresos(db, limit=limit), schemas.Ingreso),
+        "/transferencias": (lambda: crud_financiero.get_transferencias(db, limit=limit), schemas.Transferencia),
+    }
+    resultados = {}
+    for ruta, (consultar, schema) in listados.items():
+        objetos = consultar()
+        adaptador = TypeAdapter(list[schema])
+        cuerpo = respuesta_lista(objetos, schema).body
+
+        fila = {
+            "filas": len(objetos),
+            "bytes": len(cuerpo),
+            "pydantic_ms": round(_cpu_ms(
+                lambda: adaptador.dump_json(adaptador.validate_python(objetos, from_attributes=True)), repeticiones
+            ), 3),
+            "orjson_ms": round(_cpu_ms(lambda: respuesta_lista(objetos, schema).body, repeticiones), 3),
+        }
+        for nivel in NIVELES_GZIP:
+            fila[f"gzip{nivel}_bytes"] = len(gzip.compress(cuerpo, nivel))
+            fila[f"gzip{nivel}_ms"] = round(_cpu_ms(lambda: gzip.compress(cuerpo, nivel), repeticiones), 3)
+
+        for codificacion in ("identity", "gzip"):
+            cabeceras = {"Accept-Encoding": codificacion}
+            respuesta = cliente.get(ruta, params={"limit": limit}, headers=cabeceras)
+            fila[f"http_{codificacion}_bytes"] = respuesta.num_bytes_downloaded
+            fila[f"http_{codificacion}_ms"] = round(_cpu_ms(
+                lambda: cliente.get(ruta, params={"limit": limit}, headers=cabeceras), repeticiones
+            ), 3)
+        resultados[ruta] = fila
+    return resultados
+
+
+def imprimir(resultados: dict):
+    print(f"{'endpoint':<16} {'filas':>6} {'JSON KB':>8} {'pydantic ms':>12} {'orjson ms':>10} "
+          f"{'gzip1 KB/ms':>12} {'gzip5 KB/ms':>12} {'gzip9 KB/ms':>12} {'HTTP KB':>14} {'HTTP CPU ms':>14}")
+    for ruta, f in resultados.items():
+        niveles = " ".join(
+            f"{f[f'gzip{n}_bytes'] / 1024:6.0f}/{f[f'gzip{n}_ms']:<5.1f}" for n in NIVELES_GZIP
+        )
+        print(
+            f"{ruta:<16} {f['filas']:>6} {f['bytes'] / 1024:8.0f} {f['pydantic_ms']:12.1f} {f['orjson_ms']:10.1f} "
+            f"{niveles} {f['http_identity_bytes'] / 1024:6.0f}→{f['http_gzip_bytes'] / 1024:<6.0f} "
+            f"{f['http_identity_ms']:6.1f}→{f['http_gzip_ms']:<6.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Base generada con benchmarks.generador")
+    parser.add_argument("--limit", type=int, default=1000, help="Filas por listado (máximo de la API: 1000)")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}; genérala con: python -m benchmarks.generador --db {args.db}")
+        sys.exit(1)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+
+    # Importar después de fijar DATABASE_URL
+    from fastapi.testclient import TestClient
+
+    from backend.database import SessionLocal
+    from backend.main import app
+
+    with TestClient(app) as cliente, SessionLocal() as db:
+        resultados = medir(cliente, db, args.limit, args.repeticiones)
+    imprimir(resultados)
+
+    if args.salida:
+        meta = reporte.metadatos(limit=args.limit, repeticiones=args.repeticiones,
+                                 base=os.environ["DATABASE_URL"].rsplit("@", 1)[-1])
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Sincronización incremental: GET /sync?since= contra descargar todo otra vez.
+
+Mide, en proceso (TestClient), una sincronización completa paginada y,
+para cada cantidad de `--cambios`, el delta después de modificar esa
+cantidad de gastos con PUT /gastos/{id}: mediana de `--repeticiones`
+peticiones, bytes y filas recibidas. Verifica que el delta traiga
+exactamente los gastos modificados.
+
+Uso:
+    python -m benchmarks.sincronizacion --db /tmp/bench.db --cambios 1,10,100,1000 --salida sincronizacion.json
+
+Los montos se restauran al terminar; los gastos modificados quedan con una
+versión nueva.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Optional
+
+from benchmarks import reporte
+
+LIMITE_PAGINA = 10000
+
+
+def _mediana_ms(funcion, repeticiones: int) -> tuple:
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return round(statistics.median(tiempos) * 1000, 3), resultado
+
+
+def sincronizar(cliente, since: Optional[int]) -> tuple:
+    """Recorre todas las páginas (sin `since`: sincronización completa).
+    Devuelve (version, filas por tabla, bytes, páginas)"""
+    filas, total_bytes, paginas, cursor = {}, 0, 0, None
+    while True:
+        params = {"limit": LIMITE_PAGINA}
+        if since is not None:
+            params["since"] = since
+        if cursor:
+            params["cursor"] = cursor
+        respuesta = cliente.get("/sync", params=params)
+        respuesta.raise_for_status()
+        datos = respuesta.json()
+        for tabla, cambios in datos["cambios"].items():
+            filas.setdefault(tabla, []).extend(fila["id"] for fila in cambios)
+        total_bytes += len(respuesta.content)
+        paginas += 1
+        cursor = respuesta.headers.get("X-Next-Cursor")
+        if not cursor:
+            return datos["version"], filas, total_bytes, paginas
+
+
+def medir(cliente, cantidades: list, repeticiones: int) -> dict:
+    resultados = {}
+    ms, (version, filas, total_bytes, paginas) = _mediana_ms(
+        lambda: sincronizar(cliente, None), max(1, repeticiones // 10)
+    )
+    resultados["completa"] = {
+        "filas": sum(len(ids) for ids in filas.values()), "paginas": paginas,
+        "kib": round(total_bytes / 1024, 1), "ms": ms,
+    }
+
+    gastos = cliente.get("/gastos", params={"limit": max(cantidades)}).json()
+    for cantidad in cantidades:
+        version = cliente.get("/sync", params={"limit": 1}).json()["version"]
+        modificados = gastos[:cantidad]
+        for gasto in modificados:
+            cliente.put(f"/gastos/{gasto['id']}", json={"monto": gasto["monto"] + 1}).raise_for_status()
+        ms, (_, filas, total_bytes, paginas) = _mediana_ms(lambda: sincronizar(cliente, version), repeticiones)
+        resultados[f"delta {cantidad} cambios"] = {
+            "filas": sum(len(ids) for ids in filas.values()), "paginas": paginas,
+            "kib": round(total_bytes / 1024, 1), "ms": ms,
+            "coinciden": sorted(filas.get("gastos", [])) == sorted(g["id"] for g in modificados),
+        }
+        for gasto in modificados:
+            cliente.put(f"/gastos/{gasto['id']}", json={"monto": gasto["monto"]}).raise_for_status()
+    return resultados
+
+
+def imprimir(resultados: dict):
+    completa = resultados["completa"]
+    print(f"{'sincronización':<24} {'filas':>8} {'páginas':>8} {'KiB':>10} {'ms':>10} {'vs completa':>12}")
+    for nombre, r in resultados.items():
+        factor = completa["ms"] / r["ms"] if r["ms"] else 0
+        marca = "" if r.get("coinciden", True) else "  ❌"
+        print(f"{nombre:<24} {r['filas']:>8} {r['paginas']:>8} {r['kib']:>10.1f} {r['ms']:>10.1f} {factor:>11.0f}x{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="benchmark.db", help="Base generada con benchmarks.generador")
+    parser.add_argument("--cambios", default="1,10,100,1000", help="Cantidades de gastos modificados, separadas por coma")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}; genérala con: python -m benchmarks.generador --db {args.db}")
+        sys.exit(1)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.db)}")
+    cantidades = [int(c) for c in args.cambios.split(",")]
+
+    # Importar después de fijar DATABASE_URL
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    with TestClient(app) as cliente:
+        resultados = medir(cliente, cantidades, args.repeticiones)
+    imprimir(resultados)
+
+    if args.salida:
+        meta = reporte.metadatos(repeticiones=args.repeticiones, base=os.environ["DATABASE_URL"].rsplit("@", 1)[-1])
+        reporte.guardar(args.salida, meta, resultados)
+        print(f"✅ Resultados guardados en {args.salida}")
+    if not all(r.get("coinciden", True) for r in resultados.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
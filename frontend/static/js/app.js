@@ -1,6 +1,9 @@
 // Detectar automáticamente la URL de la API
 const API_URL = window.location.origin;
 
+// Gastos del mes que muestra la página (los mismos que trae /dashboard)
+const LIMITE_GASTOS = 100;
+
 // Log de debug para verificar la URL en consola
 console.log('🔧 API URL configurada:', API_URL);
 console.log('📍 Location:', {
@@ -21,6 +24,10 @@ function expenseTracker() {
         cuentasBancarias: [],
         ingresos: [],
 
+        // Eventos en vivo (GET /eventos)
+        eventos: null,
+        ultimoEvento: 0,
+
         // Formulario
         nuevoGasto: {
             fecha: new Date().toISOString().split('T')[0],
@@ -87,14 +94,11 @@ function expenseTracker() {
 
         // Inicialización
         async init() {
-            await Promise.all([
-                this.cargarCategorias(),
-                this.cargarBancos(),
-                this.cargarMediosPago(),
-                this.cargarCuentasBancarias(),
-                this.cargarIngresos()
-            ]);
-            await this.cargarDatos();
+            const inicio = performance.now();
+            await this.cargarDashboard();
+            this.$nextTick(() => {
+                console.log(`⏱️ Primer render con datos: ${Math.round(performance.now() - inicio)} ms`);
+            });
 
             // Observar cambios en modalGrafico para actualizar el gráfico
             this.$watch('modalGrafico', (value) => {
@@ -106,6 +110,30 @@ function expenseTracker() {
         },
 
         // Cargar datos
+        async cargarDashboard() {
+            // Todo lo de la página principal en una sola petición (en lugar de siete)
+            try {
+                const response = await fetch(
+                    `${API_URL}/dashboard?mes=${this.mesSeleccionado}&anio=${this.anioSeleccionado}`
+                );
+                // Un 4xx/5xx trae {detail} en lugar de los datos: no tocar el estado
+                if (!response.ok) throw new Error(`GET /dashboard respondió ${response.status}`);
+                const datos = await response.json();
+                this.categorias = datos.categorias;
+                this.bancos = datos.bancos;
+                this.mediosPago = datos.medios_pago;
+                this.cuentasBancarias = datos.cuentas_bancarias;
+                this.ingresos = datos.ingresos;
+                this.gastos = datos.gastos;
+                this.resumen = datos.resumen;
+                this.ultimoEvento = datos.ultimo_evento;
+                this.conectarEventos();
+            } catch (error) {
+                console.error('Error cargando el dashboard:', error);
+                alert('Error al cargar los datos');
+            }
+        },
+
         async cargarCategorias() {
             try {
                 const response = await fetch(`${API_URL}/categorias`);
@@ -144,7 +172,7 @@ function expenseTracker() {
         async cargarGastos() {
             try {
                 const response = await fetch(
-                    `${API_URL}/gastos?mes=${this.mesSeleccionado}&anio=${this.anioSeleccionado}&limit=100`
+                    `${API_URL}/gastos?mes=${this.mesSeleccionado}&anio=${this.anioSeleccionado}&limit=${LIMITE_GASTOS}`
                 );
                 this.gastos = await response.json();
             } catch (error) {
@@ -163,6 +191,175 @@ function expenseTracker() {
             }
         },
 
+        // Eventos en vivo: los cambios (de esta pestaña o de otras) llegan por
+        // GET /eventos y se aplican sobre el estado local sin volver a pedir
+        // /gastos ni /resumen. Cada evento trae el registro y las filas del
+        // resumen como quedan, así que aplicar uno repetido no descuadra nada.
+        conectarEventos() {
+            if (!window.EventSource) return;
+            if (this.eventos) this.eventos.close();
+            // Desde el último evento incluido en el dashboard; al reconectarse el
+            // navegador envía Last-Event-ID y el servidor reenvía lo que faltó
+            this.eventos = new EventSource(`${API_URL}/eventos?desde=${this.ultimoEvento}`);
+            this.eventos.addEventListener('cambio', (e) => {
+                this.ultimoEvento = Number(e.lastEventId);
+                this.aplicarEvento(JSON.parse(e.data));
+            });
+            this.eventos.addEventListener('reiniciar', () => {
+                // Se perdieron eventos (desconexión larga): recargar todo
+                this.eventos.close();
+                this.eventos = null;
+                this.cargarDashboard();
+            });
+        },
+
+        eventosConectados() {
+            return this.eventos !== null && this.eventos.readyState === EventSource.OPEN;
+        },
+
+        esMesSeleccionado(mes, anio) {
+            return Number(mes) === Number(this.mesSeleccionado) && Number(anio) === Number(this.anioSeleccionado);
+        },
+
+        aplicarEvento(evento) {
+            if (evento.entidad === 'gasto') {
+                this.aplicarEventoGasto(evento);
+            } else if (evento.entidad === 'categoria') {
+                this.aplicarEventoCategoria(evento);
+            } else if (evento.entidad === 'subcategoria') {
+                this.aplicarEventoSubcategoria(evento);
+            }
+            this.aplicarEventoResumen(evento.resumen);
+            if (this.modalGrafico) {
+                this.$nextTick(() => this.actualizarGrafico());
+            }
+        },
+
+        aplicarEventoGasto(evento) {
+            const afectaMes = evento.periodos.some(p => this.esMesSeleccionado(p.mes, p.anio));
+            if (!afectaMes) return;
+
+            if (evento.operacion === 'importar') {
+                // Pueden ser miles de filas: solo se recargan los gastos del mes
+                this.cargarGastos();
+                return;
+            }
+
+            const estabaCompleta = this.gastos.length >= LIMITE_GASTOS;
+            this.gastos = this.gastos.filter(g => g.id !== evento.entidad_id);
+            const gasto = evento.datos;
+            if (gasto && this.esMesSeleccionado(gasto.fecha.slice(5, 7), gasto.fecha.slice(0, 4))) {
+                const categoria = this.categorias.find(c => c.id === gasto.categoria_id);
+                const detallado = {
+                    ...gasto,
+                    categoria,
+                    subcategoria: categoria && categoria.subcategorias.find(s => s.id === gasto.subcategoria_id) || null
+                };
+                // Mismo orden que /gastos: fecha y luego id, descendentes
+                const posterior = (a, b) => a.fecha > b.fecha || (a.fecha === b.fecha && a.id > b.id);
+                const indice = this.gastos.findIndex(g => posterior(detallado, g));
+                if (indice >= 0) {
+                    this.gastos.splice(indice, 0, detallado);
+                } else if (this.gastos.length < LIMITE_GASTOS) {
+                    this.gastos.push(detallado);
+                }
+                this.gastos = this.gastos.slice(0, LIMITE_GASTOS);
+            } else if (estabaCompleta && this.gastos.length < LIMITE_GASTOS) {
+                // Salió uno de una página llena: hay otro gasto del mes que ahora entra
+                this.cargarGastos();
+            }
+        },
+
+        aplicarEventoCategoria(evento) {
+            const anterior = this.categorias.find(c => c.id === evento.entidad_id);
+            if (evento.operacion === 'eliminar') {
+                this.categorias = this.categorias.filter(c => c.id !== evento.entidad_id);
+                this.subcategorias = this.subcategorias.filter(s => s.categoria_id !== evento.entidad_id);
+                this.gastos = this.gastos.filter(g => g.categoria_id !== evento.entidad_id);
+                if (anterior) {
+                    this.resumen.categorias = this.resumen.categorias.filter(f => f.categoria !== anterior.nombre);
+                }
+            } else if (anterior) {
+                const fila = this.resumen.categorias.find(f => f.categoria === anterior.nombre);
+                Object.assign(anterior, evento.datos);
+                if (fila) {
+                    fila.categoria = anterior.nombre;
+                    fila.color = anterior.color;
+                    fila.presupuesto_mensual = anterior.presupuesto_mensual;
+                }
+                this.gastos.forEach(g => {
+                    if (g.categoria_id === anterior.id) g.categoria = anterior;
+                });
+            } else if (evento.operacion === 'crear') {
+                this.categorias.push({ ...evento.datos, subcategorias: [] });
+                this.resumen.categorias.push({
+                    categoria: evento.datos.nombre,
+                    presupuesto_mensual: evento.datos.presupuesto_mensual,
+                    total_gastado: 0,
+                    color: evento.datos.color
+                });
+            }
+            this.recalcularResumen();
+        },
+
+        aplicarEventoSubcategoria(evento) {
+            // Se quita de donde estaba (también si cambió de categoría) y, salvo
+            // que se haya eliminado, se vuelve a agregar tal como quedó
+            const subcategoria = evento.operacion === 'eliminar' ? null : evento.datos;
+            const porId = (a, b) => a.id - b.id;
+            this.categorias.forEach(c => {
+                c.subcategorias = c.subcategorias.filter(s => s.id !== evento.entidad_id);
+            });
+            this.subcategorias = this.subcategorias.filter(s => s.id !== evento.entidad_id);
+            if (subcategoria) {
+                const categoria = this.categorias.find(c => c.id === subcategoria.categoria_id);
+                if (categoria) {
+                    categoria.subcategorias = [...categoria.subcategorias, subcategoria].sort(porId);
+                }
+                // Opciones del formulario de nuevo gasto
+                if (Number(this.nuevoGasto.categoria_id) === subcategoria.categoria_id) {
+                    this.subcategorias = [...this.subcategorias, subcategoria].sort(porId);
+                }
+            }
+            this.gastos.forEach(g => {
+                if (g.subcategoria_id !== evento.entidad_id) return;
+                // Al eliminarla, sus gastos quedan sin subcategoría
+                g.subcategoria = subcategoria;
+                if (!subcategoria) g.subcategoria_id = null;
+            });
+        },
+
+        aplicarEventoResumen(filas) {
+            // Filas de resumen_mensual como quedaron: se reemplaza el total gastado
+            const delMes = filas.filter(f => this.esMesSeleccionado(f.mes, f.anio));
+            if (delMes.length === 0) return;
+            delMes.forEach(f => {
+                const categoria = this.categorias.find(c => c.id === f.categoria_id);
+                const fila = categoria && this.resumen.categorias.find(r => r.categoria === categoria.nombre);
+                if (fila) fila.total_gastado = f.total;
+            });
+            this.recalcularResumen();
+        },
+
+        recalcularResumen() {
+            // Mismos cálculos que crud.armar_resumen
+            let presupuestoTotal = 0;
+            let gastadoTotal = 0;
+            this.resumen.categorias.forEach(fila => {
+                fila.diferencia = fila.presupuesto_mensual - fila.total_gastado;
+                fila.porcentaje_usado = fila.presupuesto_mensual > 0
+                    ? fila.total_gastado / fila.presupuesto_mensual * 100
+                    : 0;
+                presupuestoTotal += fila.presupuesto_mensual;
+                gastadoTotal += fila.total_gastado;
+            });
+            this.resumen.totales = {
+                presupuesto_total: presupuestoTotal,
+                gastado_total: gastadoTotal,
+                diferencia_total: presupuestoTotal - gastadoTotal
+            };
+        },
+
         // CRUD Gastos
         async crearGasto() {
             try {
@@ -194,8 +391,8 @@ function expenseTracker() {
                     };
                     this.subcategorias = [];
 
-                    // Recargar datos
-                    await this.cargarDatos();
+                    // Con /eventos conectado el gasto llega como evento; si no, recargar
+                    if (!this.eventosConectados()) await this.cargarDatos();
 
                     alert('Gasto registrado exitosamente');
                 } else {
@@ -217,7 +414,7 @@ function expenseTracker() {
                 });
 
                 if (response.ok) {
-                    await this.cargarDatos();
+                    if (!this.eventosConectados()) await this.cargarDatos();
                     alert('Gasto eliminado exitosamente');
                 } else {
                     alert('Error al eliminar el gasto');
@@ -253,8 +450,10 @@ function expenseTracker() {
 
                 if (response.ok) {
                     this.modalPresupuesto = false;
-                    await this.cargarCategorias();
-                    await this.cargarResumen();
+                    if (!this.eventosConectados()) {
+                        await this.cargarCategorias();
+                        await this.cargarResumen();
+                    }
                     alert('Presupuesto actualizado exitosamente');
                 } else {
                     alert('Error al actualizar el presupuesto');
@@ -282,28 +481,25 @@ function expenseTracker() {
 
         async guardarTodosPresupuestos() {
             try {
-                // Actualizar todas las categorías en paralelo
-                const promises = this.categorias.map(cat => {
-                    const presupuesto = parseFloat(this.presupuestosTemporales[cat.id]) || 0;
-                    return fetch(`${API_URL}/categorias/${cat.id}`, {
-                        method: 'PUT',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({
-                            presupuesto_mensual: presupuesto
-                        })
-                    });
+                // Enviar todos los presupuestos en una sola petición
+                const presupuestos = {};
+                this.categorias.forEach(cat => {
+                    presupuestos[cat.id] = parseFloat(this.presupuestosTemporales[cat.id]) || 0;
                 });
 
-                const responses = await Promise.all(promises);
-                const todosOk = responses.every(r => r.ok);
+                const response = await fetch(`${API_URL}/categorias/presupuestos`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(presupuestos)
+                });
 
-                if (todosOk) {
+                if (response.ok) {
                     this.modalPresupuestos = false;
-                    await this.cargarCategorias();
-                    await this.cargarResumen();
+                    this.categorias = await response.json();
+                    if (!this.eventosConectados()) await this.cargarResumen();
                     alert('Presupuestos actualizados exitosamente');
                 } else {
-                    alert('Error al actualizar algunos presupuestos');
+                    alert('Error al actualizar los presupuestos');
                 }
             } catch (error) {
                 console.error('Error guardando presupuestos:', error);
@@ -341,8 +537,10 @@ function expenseTracker() {
 
                 if (response.ok) {
                     this.modalNuevaCategoria = false;
-                    await this.cargarCategorias();
-                    await this.cargarResumen();
+                    if (!this.eventosConectados()) {
+                        await this.cargarCategorias();
+                        await this.cargarResumen();
+                    }
                     alert('Categoría creada exitosamente');
                 } else {
                     const error = await response.json();
@@ -365,8 +563,10 @@ function expenseTracker() {
                 });
 
                 if (response.ok) {
-                    await this.cargarCategorias();
-                    await this.cargarResumen();
+                    if (!this.eventosConectados()) {
+                        await this.cargarCategorias();
+                        await this.cargarResumen();
+                    }
                 } else {
                     alert('Error al actualizar la categoría');
                 }
@@ -387,8 +587,10 @@ function expenseTracker() {
                 });
 
                 if (response.ok) {
-                    await this.cargarCategorias();
-                    await this.cargarResumen();
+                    if (!this.eventosConectados()) {
+                        await this.cargarCategorias();
+                        await this.cargarResumen();
+                    }
                     alert('Categoría eliminada exitosamente');
                 } else {
                     alert('Error al eliminar la categoría');
@@ -21,4 +21,5 @@ echo ""
 echo "Presiona Ctrl+C para detener el servidor"
 echo ""
 
-python -m uvicorn backend.main:app --reload --host 0.0.0.0 --port 8000
+# La página y los estáticos se cargan en memoria al arrancar: recargar también si cambian
+python -m uvicorn backend.main:app --reload --reload-include '*.html' --reload-include '*.js' --reload-include '*.css' --host 0.0.0.0 --port 8000